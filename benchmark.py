@@ -0,0 +1,115 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+from dataclasses import asdict
+from datetime import datetime, timezone
+
+from benchmarks.fake_apis import FakeApiProfile, FakeApiServer
+from benchmarks.harness import BACKENDS, Scenario, run_isolated
+
+
+def _int_list(value: str):
+    return [int(v) for v in value.split(",") if v]
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return ""
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Measure collection throughput against local stand-in Google Routes / OpenWeather servers"
+    )
+    parser.add_argument("--routes", type=_int_list, default=[10, 100], help="Comma-separated catalog sizes")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 8, 32], help="Comma-separated worker counts")
+    parser.add_argument("--cycles", type=int, default=5, help="Measured cycles per scenario")
+    parser.add_argument(
+        "--backend", choices=BACKENDS, action="append",
+        help="Database to write to, repeatable (default: sqlite)"
+    )
+    parser.add_argument(
+        "--postgres-dsn",
+        help="libpq connection string of a scratch Postgres database, required for --backend postgres"
+    )
+    parser.add_argument("--latency-ms", type=float, default=80.0, help="Mean API response latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Lognormal spread of the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of API responses that fail")
+    parser.add_argument("--alternatives", type=int, default=3, help="Routes per computeRoutes response")
+    parser.add_argument("--polyline-points", type=int, default=300, help="Points per route polyline")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Results file (default: bench_results/benchmark-<UTC time>.json)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    backends = args.backend or ["sqlite"]
+    if "postgres" in backends and not args.postgres_dsn:
+        raise SystemExit("--backend postgres needs --postgres-dsn")
+    db_config = {"dsn": args.postgres_dsn} if args.postgres_dsn else None
+
+    profile = FakeApiProfile(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        alternatives=args.alternatives,
+        polyline_points=args.polyline_points,
+        seed=args.seed
+    )
+    server = FakeApiServer(profile)
+    server.start()
+
+    started_at = datetime.now(timezone.utc)
+    results = []
+
+    try:
+        for backend, routes, concurrency in itertools.product(backends, args.routes, args.concurrency):
+            scenario = Scenario(backend, routes, concurrency, args.cycles)
+            print(f"🔍 {backend}: {routes} routes x {concurrency} workers")
+
+            server.reset_counters()
+            result = run_isolated(scenario, server.url, db_config if backend == "postgres" else None)
+            result["api_requests"] = server.requests
+            result["api_errors"] = server.errors
+            results.append(result)
+
+            if "error" in result:
+                print(f"❌ Scenario failed:\n{result['error']}")
+                continue
+            print(
+                f"✅ {result['routes_per_second']:.1f} routes/s, "
+                f"cycle p50 {result['cycle_p50_seconds']:.2f}s p99 {result['cycle_p99_seconds']:.2f}s, "
+                f"{result['db_rows_per_second']:.0f} db rows/s, peak RSS {result['peak_rss_mb']:.0f} MB"
+            )
+    finally:
+        server.stop()
+
+    report = {
+        "started_at": started_at.isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "profile": asdict(profile),
+        "results": results
+    }
+
+    output = args.output or os.path.join(
+        "bench_results", f"benchmark-{started_at.strftime('%Y%m%dT%H%M%SZ')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"📊 Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import tempfile
+from datetime import datetime, timezone
+
+from benchmark import _git_commit
+from benchmarks.fake_apis import FakeApiProfile, FakeApiServer
+from benchmarks.startup import run_startup
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Measure cold-start time of one-shot collection (`collect.py --once`) against the full container"
+    )
+    parser.add_argument(
+        "--postgres-dsn", required=True,
+        help="libpq connection string of a scratch Postgres database"
+    )
+    parser.add_argument("--routes", type=int, default=10, help="Routes collected per cycle")
+    parser.add_argument("--runs", type=int, default=7, help="Fresh processes per variant")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Mean API response latency")
+    parser.add_argument("--output", help="Results file (default: bench_results/startup-<UTC time>.json)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    profile = FakeApiProfile(latency_ms=args.latency_ms)
+    server = FakeApiServer(profile)
+    server.start()
+
+    started_at = datetime.now(timezone.utc)
+    workdir = tempfile.mkdtemp(prefix="route-analyzer-startup-")
+
+    try:
+        results = run_startup(server.url, workdir, {"dsn": args.postgres_dsn}, args.routes, args.runs)
+    finally:
+        server.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "started_at": started_at.isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "routes": args.routes,
+        "latency_ms": args.latency_ms,
+        "results": results
+    }
+
+    output = args.output or os.path.join(
+        "bench_results", f"startup-{started_at.strftime('%Y%m%dT%H%M%SZ')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"📊 Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
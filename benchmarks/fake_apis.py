@@ -0,0 +1,184 @@
+import json
+import random
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from infrastructure.geometry import encode_polyline_deltas
+
+
+@dataclass
+class FakeApiProfile:
+    """ How the stand-in APIs behave
+
+    latency_ms: mean server-side delay per response; each delay is drawn from a
+        lognormal distribution with `latency_sigma`, so there is a realistic tail.
+    error_rate: share of responses answered with `error_status` instead of a result.
+    alternatives: routes per computeRoutes response (the first is the primary).
+    polyline_points: points per route polyline, which drives the payload size.
+    """
+    latency_ms: float = 80.0
+    latency_sigma: float = 0.5
+    error_rate: float = 0.0
+    error_status: int = 503
+    alternatives: int = 3
+    polyline_points: int = 300
+    seed: int = 7
+
+
+def _polyline(rng: random.Random, points: int) -> str:
+    # Around CDMX, in 1e-5 degree steps as the encoding uses
+    deltas = [1943260 + rng.randint(-5000, 5000), -9913320 + rng.randint(-5000, 5000)]
+    for _ in range(points - 1):
+        deltas.extend((rng.randint(-60, 60), rng.randint(-60, 60)))
+    return encode_polyline_deltas(deltas)
+
+
+class FakeApiServer:
+    """ Local stand-in for Google computeRoutes and OpenWeather current weather
+
+    Serves the response shapes `parse_routes` and `parse_weather` read, on one
+    threaded HTTP server, so collectors can be pointed at it through their
+    `api_root`. Responses are deterministic per route, so runs are reproducible.
+    """
+
+    def __init__(self, profile: FakeApiProfile = None, host: str = "127.0.0.1", port: int = 0):
+        self.profile = profile or FakeApiProfile()
+        self.host = host
+        self.port = port
+
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._rng = random.Random(self.profile.seed)
+
+        # A fixed pool of geometries keeps response generation cheap
+        pool_rng = random.Random(self.profile.seed)
+        self._polylines: List[str] = [
+            _polyline(pool_rng, self.profile.polyline_points) for _ in range(64)
+        ]
+
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    # ---------- Responses ----------
+    def _delay_and_fail(self) -> bool:
+        """ Sleep for one latency sample; True when this response should be an error """
+
+        with self._lock:
+            self.requests += 1
+            delay = self._rng.lognormvariate(0, self.profile.latency_sigma) * self.profile.latency_ms
+            failed = self._rng.random() < self.profile.error_rate
+            self.errors += failed
+
+        time.sleep(delay / 1000.0)
+        return failed
+
+    def routes_body(self, origin: str, destination: str) -> dict:
+        key = zlib.crc32(f"{origin}:{destination}".encode("utf-8"))
+        base = 900 + key % 2700
+
+        routes = []
+        for i in range(self.profile.alternatives):
+            static = base + 120 * i
+            routes.append({
+                "legs": [{
+                    "distanceMeters": 4000 + key % 20000 + 700 * i,
+                    "duration": f"{static + (key >> 8) % 900}s",
+                    "staticDuration": f"{static}s",
+                    "polyline": {"encodedPolyline": self._polylines[(key + i) % len(self._polylines)]},
+                    "startLocation": {"latLng": {"latitude": 19.4326, "longitude": -99.1332}}
+                }]
+            })
+        return {"routes": routes}
+
+    @staticmethod
+    def weather_body(latitude: str, longitude: str) -> dict:
+        return {
+            "weather": [{"main": "Clouds", "description": "scattered clouds"}],
+            "main": {"temp": 21.5, "feels_like": 21.1, "pressure": 1021, "humidity": 48},
+            "visibility": 10000,
+            "wind": {"speed": 3.1},
+            "coord": {"lat": float(latitude), "lon": float(longitude)}
+        }
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; avoid the delayed-ACK stall
+            disable_nagle_algorithm = True
+
+            def _reply(self, status: int, body: dict):
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+
+                if urlparse(self.path).path != "/directions/v2:computeRoutes":
+                    self._reply(404, {"error": {"code": 404}})
+                    return
+                if server._delay_and_fail():
+                    self._reply(server.profile.error_status, {"error": {"code": server.profile.error_status}})
+                    return
+
+                self._reply(200, server.routes_body(
+                    request["origin"]["placeId"], request["destination"]["placeId"]
+                ))
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != "/data/2.5/weather":
+                    self._reply(404, {"cod": 404})
+                    return
+                if server._delay_and_fail():
+                    self._reply(server.profile.error_status, {"cod": server.profile.error_status})
+                    return
+
+                query = parse_qs(url.query)
+                self._reply(200, server.weather_body(query["lat"][0], query["lon"][0]))
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    # ---------- Lifecycle ----------
+    def start(self):
+        if self._server is not None:
+            return
+        self._server = ThreadingHTTPServer((self.host, self.port), self._handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="fake-api-server", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        self._thread = None
+
+    def reset_counters(self):
+        with self._lock:
+            self.requests = 0
+            self.errors = 0
@@ -0,0 +1,196 @@
+import multiprocessing
+import os
+import resource
+import shutil
+import tempfile
+import time
+import traceback
+from dataclasses import asdict, dataclass
+from typing import List, Optional
+
+import numpy as np
+from dependency_injector import providers
+
+from domains.entities import RoutePair
+from infrastructure.database.forecasts import SQLiteRouteForecastRepository
+from infrastructure.database.repositories import SQLiteTrafficRepository, SQLiteWeatherRepository
+from infrastructure.database.rollups import SQLiteCongestionRollupRepository
+from infrastructure.database.route_matrix import SQLiteRouteMatrixRepository
+from infrastructure.database.route_variants import SQLiteRouteVariantRepository
+from infrastructure.database.sqlite_engine import SQLiteEngine
+
+
+BACKENDS = ("sqlite", "postgres")
+
+
+@dataclass
+class Scenario:
+    backend: str
+    routes: int
+    concurrency: int
+    cycles: int = 5
+
+
+class BenchSettings:
+    """ Settings for a benchmark run: generous client limits, scratch directories """
+
+    GOOGLE_MAPS_API_KEY = "bench"
+    OPENWEATHER_API_KEY = "bench"
+    COORD1 = "bench-origin"
+    COORD2 = "bench-destination"
+    LATITUDE = 19.4326
+    LONGITUDE = -99.1332
+
+    HTTP_MAX_RETRIES = 3
+    HTTP_BACKOFF_FACTOR = 0.05
+    HTTP_CONNECT_TIMEOUT = 3.05
+    HTTP_READ_TIMEOUT = 30.0
+
+    # The stand-in servers are not metered, so the limiters never throttle
+    GOOGLE_RATE_PER_SECOND = 1e6
+    GOOGLE_RATE_BURST = 100000
+    GOOGLE_DAILY_QUOTA = None
+    OPENWEATHER_RATE_PER_SECOND = 1e6
+    OPENWEATHER_RATE_BURST = 100000
+    OPENWEATHER_DAILY_QUOTA = None
+
+    WEATHER_CACHE_TTL = 600
+    WEATHER_CELL_SIZE_KM = 2.0
+    DB_SCHEMA_MODE = "heap"
+
+    SAMPLING_HOURLY_BUDGET = 1000
+    SAMPLING_MIN_INTERVAL = 300
+    SAMPLING_MAX_INTERVAL = 3600
+    WORKER_CONCURRENCY = 4
+
+    def __init__(self, workdir: str, concurrency: int, db_config: Optional[dict] = None):
+        self.HTTP_POOL_SIZE = max(10, concurrency)
+        self.OUTBOX_DIR = os.path.join(workdir, "outbox")
+        self.RESPONSE_ARCHIVE_DIR = os.path.join(workdir, "archive")
+        self.ANOMALY_CHECKPOINT_PATH = os.path.join(workdir, "anomalies.npz")
+        self.db_config = db_config or {}
+
+
+def build_container(settings: BenchSettings, api_url: str, backend: str, workdir: str):
+    """ Production wiring, pointed at the stand-in APIs and the chosen database """
+
+    from main import Container
+
+    container = Container()
+    container.settings.override(providers.Object(settings))
+    container.google_client.add_kwargs(api_root=api_url)
+    container.weather_client.add_kwargs(api_root=api_url)
+
+    if backend == "sqlite":
+        engine = providers.Singleton(SQLiteEngine, db_path=os.path.join(workdir, "bench.db"))
+        container.sqlite_engine = engine
+        container.traffic_repository.override(providers.Singleton(SQLiteTrafficRepository, engine=engine))
+        container.weather_repository.override(providers.Singleton(SQLiteWeatherRepository, engine=engine))
+        container.rollup_repository.override(
+            providers.Singleton(SQLiteCongestionRollupRepository, engine=engine)
+        )
+        container.matrix_repository.override(providers.Singleton(SQLiteRouteMatrixRepository, engine=engine))
+        container.forecast_repository.override(
+            providers.Singleton(SQLiteRouteForecastRepository, engine=engine)
+        )
+        container.variant_repository.override(
+            providers.Singleton(SQLiteRouteVariantRepository, engine=engine)
+        )
+
+    return container
+
+
+def _drain(container) -> int:
+    drainer = container.outbox_drainer()
+    delivered = 0
+    while True:
+        batch = drainer.drain_once()
+        if not batch:
+            return delivered
+        delivered += batch
+
+
+def run_scenario(scenario: Scenario, api_url: str, workdir: str, db_config: Optional[dict] = None) -> dict:
+    """ Collect `cycles` catalog cycles through the full wiring, then drain them into the database
+
+    Place ids are unique per run, so repeated runs against one database never
+    collide. Cycles of a run that fall in the same minute share record ids and are
+    deduplicated by the database, exactly as live collection would be.
+    """
+
+    settings = BenchSettings(workdir, scenario.concurrency, db_config)
+    container = build_container(settings, api_url, scenario.backend, workdir)
+
+    run_id = os.urandom(4).hex()
+    pairs = [
+        RoutePair(f"bench-{run_id}-o{i}", f"bench-{run_id}-d{i}", round_trip=False)
+        for i in range(scenario.routes)
+    ]
+
+    use_case = container.collect_route_catalog_use_case(max_workers=scenario.concurrency)
+    weather_use_case = container.collect_weather_use_case()
+
+    try:
+        # Warm-up opens the HTTP and database connections and creates the tables
+        use_case.execute(pairs[:scenario.concurrency])
+        _drain(container)
+
+        latencies: List[float] = []
+        for _ in range(scenario.cycles):
+            started = time.perf_counter()
+            use_case.execute(pairs)
+            weather_use_case.execute(settings.LONGITUDE, settings.LATITUDE)
+            latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        rows = _drain(container)
+        drain_seconds = time.perf_counter() - started
+
+        collected = scenario.routes * scenario.cycles
+        return {
+            **asdict(scenario),
+            "routes_per_second": collected / sum(latencies),
+            "cycle_p50_seconds": float(np.percentile(latencies, 50)),
+            "cycle_p99_seconds": float(np.percentile(latencies, 99)),
+            "cycle_max_seconds": max(latencies),
+            "db_rows": rows,
+            "db_seconds": drain_seconds,
+            "db_rows_per_second": rows / drain_seconds if drain_seconds else 0.0,
+            # ru_maxrss is in KiB on Linux
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        }
+    finally:
+        use_case.shutdown()
+        container.outbox().close()
+        container.response_archive().close()
+        if scenario.backend == "sqlite":
+            container.sqlite_engine().close()
+        else:
+            container.db_pool().close()
+        container.http_session().close()
+
+
+def _scenario_process(results, scenario: Scenario, api_url: str, db_config: Optional[dict]):
+    workdir = tempfile.mkdtemp(prefix="route-analyzer-bench-")
+    try:
+        results.put(run_scenario(scenario, api_url, workdir, db_config))
+    except Exception:
+        results.put({**asdict(scenario), "error": traceback.format_exc()})
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def run_isolated(scenario: Scenario, api_url: str, db_config: Optional[dict] = None) -> dict:
+    """ Run one scenario in a fresh interpreter, so peak RSS and caches are its own """
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(
+        target=_scenario_process,
+        args=(results, scenario, api_url, db_config),
+        name=f"bench-{scenario.backend}-{scenario.routes}x{scenario.concurrency}"
+    )
+    process.start()
+    result = results.get()
+    process.join()
+    return result
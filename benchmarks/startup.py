@@ -0,0 +1,113 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from benchmarks.harness import BenchSettings
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The same cycle run the way a cron job would before `collect.py --once` existed
+CONTAINER_CYCLE = """
+from infrastructure.route_catalog import load_route_catalog
+from main import Container
+
+container = Container()
+use_case = container.collect_route_catalog_use_case()
+use_case.execute(load_route_catalog({catalog!r}))
+use_case.shutdown()
+container.duration_anomalies().checkpoint()
+container.outbox_drainer().stop()
+container.outbox().close()
+container.response_archive().close()
+container.http_session().close()
+container.db_pool().close()
+"""
+
+
+def write_settings(settings: BenchSettings, api_url: str, directory: str) -> str:
+    """ A `config.settings` package holding `settings`, for child interpreters to import """
+
+    values = {
+        name: getattr(settings, name) for name in dir(settings)
+        if name.isupper() or name == "db_config"
+    }
+    values["API_ROOT"] = api_url
+    values["SCHEMA_CACHE_PATH"] = os.path.join(directory, "schema_cache.json")
+
+    package = os.path.join(directory, "config")
+    os.makedirs(package, exist_ok=True)
+    with open(os.path.join(package, "__init__.py"), "w", encoding="utf-8"):
+        pass
+    with open(os.path.join(package, "settings.py"), "w", encoding="utf-8") as f:
+        f.write("class Settings:\n")
+        for name, value in sorted(values.items()):
+            f.write(f"    {name} = {value!r}\n")
+
+    return values["SCHEMA_CACHE_PATH"]
+
+
+def write_catalog(routes: int, path: str):
+    run_id = os.urandom(4).hex()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([
+            {"origin": f"cold-{run_id}-o{i}", "destination": f"cold-{run_id}-d{i}", "round_trip": False}
+            for i in range(routes)
+        ], f)
+
+
+def time_process(command: List[str], settings_dir: str, runs: int, before_run=None) -> Dict[str, float]:
+    """ Wall time of `runs` fresh interpreters running `command`, from spawn to exit """
+
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([settings_dir, REPO_ROOT]))
+    timings = []
+
+    for _ in range(runs):
+        if before_run is not None:
+            before_run()
+        started = time.perf_counter()
+        subprocess.run(command, cwd=REPO_ROOT, env=env, check=True, stdout=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - started)
+
+    return {
+        "runs": runs,
+        "p50_ms": float(np.percentile(timings, 50)) * 1000,
+        "min_ms": min(timings) * 1000,
+        "max_ms": max(timings) * 1000
+    }
+
+
+def run_startup(api_url: str, workdir: str, db_config: dict, routes: int, runs: int) -> Dict[str, dict]:
+    """ Cold-start timings of the one-shot CLI against the full container, same cycle each """
+
+    settings = BenchSettings(workdir, concurrency=16, db_config=db_config)
+    schema_cache = write_settings(settings, api_url, workdir)
+    catalog = os.path.join(workdir, "catalog.json")
+    write_catalog(routes, catalog)
+
+    def forget_schema():
+        if os.path.exists(schema_cache):
+            os.remove(schema_cache)
+
+    once = [sys.executable, "collect.py", "--once", "--catalog", catalog]
+    variants = {
+        "interpreter": ([sys.executable, "-c", "pass"], None),
+        "container_cycle": ([sys.executable, "-c", CONTAINER_CYCLE.format(catalog=catalog)], None),
+        "once_cycle_schema_check": (once, forget_schema),
+        "once_cycle_cached_schema": (once, None),
+        "once_startup_cached_schema": (once + ["--dry-run"], None)
+    }
+
+    # One untimed run creates the tables, so no variant pays for first-time DDL
+    time_process(once, workdir, 1)
+
+    results = {}
+    for name, (command, before_run) in variants.items():
+        results[name] = time_process(command, workdir, runs, before_run)
+        print(f"⏱️ {name}: p50 {results[name]['p50_ms']:.0f} ms")
+    return results
@@ -0,0 +1,208 @@
+import argparse
+import os
+import time
+
+from infrastructure.settings import setting
+
+STARTED = time.perf_counter()
+
+
+# One-shot runs (cron, serverless jobs) pay every import and every DDL statement on
+# each invocation. Backends are therefore imported inside the builders below, only
+# for what the cycle uses, and the dependency container of main.py is not built.
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Collect traffic data: forever on the hourly schedule, or one cycle with --once"
+    )
+    parser.add_argument("--once", action="store_true", help="Run a single collection cycle and exit")
+    parser.add_argument("--catalog", help="Route catalog JSON (default: ROUTE_CATALOG_PATH, else COORD1 → COORD2)")
+    parser.add_argument("--origin", help="Origin placeId of a single route")
+    parser.add_argument("--destination", help="Destination placeId of a single route")
+    parser.add_argument("--one-way", action="store_true", help="Skip the return leg of a single route")
+    parser.add_argument("--weather", action="store_true", help="Also collect the weather at LATITUDE, LONGITUDE")
+    parser.add_argument(
+        "--dry-run", action="store_true",
+        help="Build the collectors and check the schema, then exit without calling the APIs"
+    )
+    parser.add_argument(
+        "--replay-quarantine", action="store_true",
+        help="With --once, also deliver the outbox records the database rejected before (once fixed)"
+    )
+    return parser.parse_args()
+
+
+def _route_pairs(args, settings):
+    from domains.entities import RoutePair
+
+    if args.origin or args.destination:
+        if not (args.origin and args.destination):
+            raise SystemExit("--origin and --destination go together")
+        return [RoutePair(args.origin, args.destination, round_trip=not args.one_way)]
+
+    catalog_path = args.catalog or setting(settings, "ROUTE_CATALOG_PATH")
+    if catalog_path:
+        from infrastructure.route_catalog import load_route_catalog
+        return load_route_catalog(catalog_path)
+
+    return [RoutePair(settings.COORD1, settings.COORD2, round_trip=not args.one_way)]
+
+
+class OneShotCollector:
+    """ The production collection pipeline of main.Container, for a single cycle
+
+    Built from the same `wiring` builders as the container, without the container
+    itself and the scheduled jobs it imports.
+
+    Tables are only created or migrated when the local schema cache does not know
+    the database at the current SCHEMA_VERSION. Observations are spooled to the
+    outbox like in the service, then drained before exit; whatever the database
+    did not take stays spooled for the next run.
+    """
+
+    def __init__(self, settings, weather: bool = False):
+        import wiring
+        from infrastructure.database.pool import PostgresConnectionPool
+        from infrastructure.database.repositories import PostgresTrafficRepository, PostgresWeatherRepository
+        from infrastructure.database.rollups import PostgresCongestionRollupRepository
+        from infrastructure.database.route_variants import PostgresRouteVariantRepository
+        from infrastructure.database.schema_cache import SchemaCache, database_key
+        from infrastructure.outbox import DurableOutbox, OutboxTrafficRepository, OutboxWeatherRepository
+        from use_cases.analytics.congestion_rollups import CongestionRollupUseCase
+        from use_cases.analytics.route_spatial_index import RouteSpatialIndexUseCase
+
+        self.settings = settings
+
+        # Database
+        self.pool = PostgresConnectionPool(db_config=settings.db_config)
+        partitions = wiring.build_partition_manager(settings, self.pool)
+
+        schema_cache = SchemaCache(
+            setting(settings, "SCHEMA_CACHE_PATH")
+            or os.path.join(setting(settings, "OUTBOX_DIR"), "schema_cache.json")
+        )
+        database = database_key(settings.db_config, setting(settings, "DB_SCHEMA_MODE"))
+        self.schema_checked = not schema_cache.is_current(database)
+        create = self.schema_checked
+
+        self.traffic_repo = PostgresTrafficRepository(self.pool, partitions, create_schema=create)
+        self.weather_repo = PostgresWeatherRepository(self.pool, partitions, create_schema=create)
+        rollup_repo = PostgresCongestionRollupRepository(self.pool, create_schema=create)
+        variant_repo = PostgresRouteVariantRepository(self.pool, create_schema=create)
+        if create:
+            schema_cache.mark_current(database)
+
+        # HTTP
+        self.http_session = wiring.build_session(settings)
+        self.archive = wiring.build_response_archive(settings)
+        google_client = wiring.build_google_client(
+            settings,
+            session=self.http_session,
+            rate_limiter=wiring.build_rate_limiter(settings, "GOOGLE"),
+            archive=self.archive
+        )
+
+        # Outbox
+        self.outbox = DurableOutbox(directory=setting(settings, "OUTBOX_DIR"))
+
+        # Use cases
+        self.anomalies = wiring.build_duration_anomalies(settings, self.traffic_repo)
+        self.routes = wiring.build_route_catalog_use_case(
+            traffic_gateway=wiring.build_traffic_gateway(google_client, variant_repo),
+            traffic_repo=OutboxTrafficRepository(self.outbox, self.traffic_repo),
+            rollups=CongestionRollupUseCase(rollup_repo=rollup_repo, traffic_repo=self.traffic_repo),
+            spatial_index=RouteSpatialIndexUseCase(traffic_repo=self.traffic_repo),
+            anomalies=self.anomalies
+        )
+
+        self.weather = None
+        if weather:
+            from use_cases.data_collection.collect_weather_data import CollectWeatherDataUseCase
+
+            weather_client = wiring.build_weather_client(
+                settings,
+                session=self.http_session,
+                rate_limiter=wiring.build_rate_limiter(settings, "OPENWEATHER"),
+                archive=self.archive
+            )
+            self.weather = CollectWeatherDataUseCase(
+                weather_gateway=wiring.build_weather_gateway(settings, weather_client),
+                weather_repo=OutboxWeatherRepository(self.outbox, self.weather_repo)
+            )
+
+    def run(self, pairs) -> bool:
+        print(f"🔍 Collecting Route Data for {len(pairs)} routes")
+        try:
+            success = self.routes.execute(pairs)
+        except Exception as e:
+            print(f"❌ Error while traffic collecting data: {e}")
+            success = False
+
+        if self.weather is not None:
+            print("🔍 Collecting Weather Data")
+            try:
+                success = self.weather.execute(self.settings.LONGITUDE, self.settings.LATITUDE) and success
+            except Exception as e:
+                print(f"❌ Error while weather collecting data: {e}")
+                success = False
+
+        return success
+
+    def close(self, drain: bool = True, replay_quarantine: bool = False):
+        from infrastructure.outbox import OutboxDrainer
+
+        self.routes.shutdown()
+        self.anomalies.checkpoint()
+        drainer = OutboxDrainer(self.outbox, self.traffic_repo, self.weather_repo)
+
+        if replay_quarantine:
+            try:
+                print(f"♻️ Replayed {drainer.replay_quarantine()} quarantined outbox records")
+            except Exception as e:
+                print(f"⚠️ Quarantine not replayed, it is kept for the next run: {e}")
+
+        # The drainer's final pass delivers this cycle and any backlog, without a thread
+        if drain:
+            drainer.stop()
+
+        self.outbox.close()
+        self.archive.close()
+        self.http_session.close()
+        self.pool.close()
+
+
+def run_once(args) -> bool:
+    from config.settings import Settings
+
+    settings = Settings()
+    pairs = _route_pairs(args, settings)
+
+    collector = OneShotCollector(settings, weather=args.weather)
+    ready = time.perf_counter()
+    schema = "checked" if collector.schema_checked else "cached"
+    print(f"⏱️ Ready in {(ready - STARTED) * 1000:.0f} ms (schema {schema})")
+
+    success = True
+    try:
+        if not args.dry_run:
+            success = collector.run(pairs)
+    finally:
+        collector.close(drain=not args.dry_run, replay_quarantine=args.replay_quarantine)
+
+    print(f"{'✅' if success else '⚠️'} Cycle finished in {(time.perf_counter() - ready) * 1000:.0f} ms")
+    return success
+
+
+def main():
+    args = parse_args()
+
+    if not args.once:
+        from main import main as run_forever
+        run_forever()
+        return
+
+    raise SystemExit(0 if run_once(args) else 1)
+
+
+if __name__ == "__main__":
+    main()
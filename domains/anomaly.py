@@ -0,0 +1,208 @@
+import math
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+
+# Route identity for anomaly tracking: origin, destination, and the route variant id,
+# or "#<index>" of the route within its response when it has none
+SeriesKey = Tuple[str, str, str]
+
+CHECKPOINT_VERSION = 2
+
+
+@dataclass
+class Baseline:
+    """ What a slot looked like before the observation being judged """
+
+    count: int
+    mean: float
+    stddev: float
+    ewma: float
+    recent_median: float
+
+
+@dataclass
+class DurationAnomaly:
+    origin: str
+    destination: str
+    route_type: str
+    timestamp: datetime
+    slot: int
+    duration_seconds: float
+    expected_seconds: float
+    stddev_seconds: float
+    zscore: float
+    ewma_seconds: float
+    recent_median_seconds: float
+
+
+class SlotStatistics:
+    """ Incremental duration statistics for every series and slot of the week
+
+    Each (series, slot) cell keeps a Welford mean/variance, an EWMA and a ring of
+    the last `window` values. Extra cells after the week aggregate the same time of
+    day across all weekdays; they fill up seven times faster and stand in for slots
+    that have not seen enough samples yet. All state lives in a handful of
+    preallocated arrays, so memory is fixed per series and an update costs the same
+    however much history a cell has.
+    """
+
+    def __init__(self, slots: int = 168, window: int = 16, alpha: float = 0.2, capacity: int = 64):
+        self.slots = slots
+        self.window = window
+        self.alpha = alpha
+        self.day_slots = slots // 7
+
+        self.keys: Dict[SeriesKey, int] = {}
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int):
+        cells = (capacity, self.slots + self.day_slots)
+        self.count = np.zeros(cells, dtype=np.int64)
+        self.mean = np.zeros(cells, dtype=np.float64)
+        self.m2 = np.zeros(cells, dtype=np.float64)
+        self.ewma = np.zeros(cells, dtype=np.float64)
+        self.ring = np.zeros(cells + (self.window,), dtype=np.float32)
+        self.last_seen = np.full(capacity, np.iinfo(np.int64).min, dtype=np.int64)
+
+    def _grow(self):
+        size = len(self.keys)
+        old = (self.count, self.mean, self.m2, self.ewma, self.ring, self.last_seen)
+        self._allocate(max(2 * len(self.last_seen), 1))
+        for new, previous in zip((self.count, self.mean, self.m2, self.ewma, self.ring, self.last_seen), old):
+            new[:size] = previous[:size]
+
+    def series(self, key: SeriesKey) -> int:
+        """ Row of `key`, allocated on first sight """
+
+        row = self.keys.get(key)
+        if row is None:
+            if len(self.keys) == len(self.last_seen):
+                self._grow()
+            row = self.keys[key] = len(self.keys)
+        return row
+
+    def is_new(self, row: int, timestamp_us: int) -> bool:
+        """ Whether an observation is newer than the last one folded into the row """
+
+        return timestamp_us > self.last_seen[row]
+
+    def _columns(self, slot: int) -> Tuple[int, int]:
+        return slot, self.slots + slot % self.day_slots
+
+    def baseline(self, row: int, slot: int, min_samples: int) -> Optional[Baseline]:
+        """ Slot statistics, or the time-of-day ones while the slot is too sparse """
+
+        for column in self._columns(slot):
+            count = int(self.count[row, column])
+            if count >= min_samples:
+                ring = self.ring[row, column, :min(count, self.window)]
+                return Baseline(
+                    count=count,
+                    mean=float(self.mean[row, column]),
+                    stddev=math.sqrt(self.m2[row, column] / (count - 1)) if count > 1 else 0.0,
+                    ewma=float(self.ewma[row, column]),
+                    recent_median=float(np.median(ring))
+                )
+        return None
+
+    def add(self, row: int, slot: int, value: float, timestamp_us: int):
+        for column in self._columns(slot):
+            count = int(self.count[row, column]) + 1
+            mean = self.mean[row, column]
+            delta = value - mean
+            mean += delta / count
+
+            self.count[row, column] = count
+            self.mean[row, column] = mean
+            self.m2[row, column] += delta * (value - mean)
+            self.ewma[row, column] = value if count == 1 else (
+                self.alpha * value + (1 - self.alpha) * self.ewma[row, column]
+            )
+            self.ring[row, column, (count - 1) % self.window] = value
+
+        self.last_seen[row] = max(self.last_seen[row], timestamp_us)
+
+    # ---------- Checkpoints ----------
+    def save(self, path: str):
+        """ Write the state to `path` atomically (temporary file, then rename) """
+
+        size = len(self.keys)
+        keys = sorted(self.keys, key=self.keys.get)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as f:
+            np.savez(
+                f,
+                version=np.int64(CHECKPOINT_VERSION),
+                shape=np.array([self.slots, self.window], dtype=np.int64),
+                alpha=np.float64(self.alpha),
+                keys=np.array(keys, dtype=str).reshape(size, 3),
+                count=self.count[:size],
+                mean=self.mean[:size],
+                m2=self.m2[:size],
+                ewma=self.ewma[:size],
+                ring=self.ring[:size],
+                last_seen=self.last_seen[:size]
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SlotStatistics":
+        """ State saved by `save`; raises ValueError when it does not fit this version """
+
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != CHECKPOINT_VERSION:
+                raise ValueError(f"checkpoint version {int(data['version'])}, expected {CHECKPOINT_VERSION}")
+
+            slots, window = (int(value) for value in data["shape"])
+            keys = [tuple(key) for key in data["keys"].tolist()]
+            stats = cls(slots, window, float(data["alpha"]), capacity=max(len(keys), 1))
+
+            size = len(keys)
+            stats.keys = {key: row for row, key in enumerate(keys)}
+            stats.count[:size] = data["count"]
+            stats.mean[:size] = data["mean"]
+            stats.m2[:size] = data["m2"]
+            stats.ewma[:size] = data["ewma"]
+            stats.ring[:size] = data["ring"]
+            stats.last_seen[:size] = data["last_seen"]
+
+        return stats
+
+
+def judge(
+    value: float,
+    baseline: Optional[Baseline],
+    zscore_threshold: float,
+    min_excess: float,
+    min_relative_stddev: float
+) -> Optional[float]:
+    """ Z-score of `value` when it is anomalously long for its baseline, else None
+
+    A value must sit `zscore_threshold` deviations above the long-run mean and
+    `min_excess` (relative) above the recent EWMA, so a level that has been high for
+    a while stops alerting once the EWMA catches up. The deviation is floored at
+    `min_relative_stddev` of the mean so a flat slot does not flag every wobble.
+    """
+
+    if baseline is None:
+        return None
+
+    stddev = max(baseline.stddev, min_relative_stddev * baseline.mean)
+    if stddev <= 0:
+        return None
+
+    zscore = (value - baseline.mean) / stddev
+    if zscore >= zscore_threshold and value >= (1 + min_excess) * baseline.ewma:
+        return zscore
+    return None
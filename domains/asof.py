@@ -0,0 +1,62 @@
+from typing import Optional
+
+import numpy as np
+
+
+def _backward(left: np.ndarray, right: np.ndarray, tolerance: int, right_ids: np.ndarray) -> np.ndarray:
+    """ Latest right row at or before each left time; `right` must be sorted """
+
+    positions = np.searchsorted(right, left, side="right") - 1
+    found = positions >= 0
+
+    matched = np.full(len(left), -1, dtype=np.int64)
+    lags = left[found] - right[positions[found]]
+    close = lags <= tolerance
+    matched[np.flatnonzero(found)[close]] = right_ids[positions[found][close]]
+    return matched
+
+
+def asof_indices(
+    left_times: np.ndarray,
+    right_times: np.ndarray,
+    tolerance: int,
+    left_groups: Optional[np.ndarray] = None,
+    right_groups: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """ Index of the latest right row at or before each left row, or -1
+
+    Times are int64 in one shared unit and `tolerance` is the largest allowed lag
+    in that unit. With groups, a left row only matches right rows of its own
+    group; left rows of a group with no right rows stay unmatched. Of several
+    right rows at the same time, the last one wins.
+    """
+
+    left_times = np.asarray(left_times, dtype=np.int64)
+    right_times = np.asarray(right_times, dtype=np.int64)
+
+    if left_groups is None:
+        order = np.argsort(right_times, kind="stable")
+        return _backward(left_times, right_times[order], tolerance, order)
+
+    left_groups = np.asarray(left_groups)
+    right_groups = np.asarray(right_groups)
+    matched = np.full(len(left_times), -1, dtype=np.int64)
+
+    # Right rows by (group, time) and left rows by group, so every group is one slice of each
+    right_order = np.lexsort((right_times, right_groups))
+    groups, right_starts = np.unique(right_groups[right_order], return_index=True)
+    right_ends = np.append(right_starts[1:], len(right_order))
+
+    left_order = np.argsort(left_groups, kind="stable")
+    sorted_groups = left_groups[left_order]
+    left_starts = np.searchsorted(sorted_groups, groups, side="left")
+    left_ends = np.searchsorted(sorted_groups, groups, side="right")
+
+    for r0, r1, l0, l1 in zip(right_starts, right_ends, left_starts, left_ends):
+        if l0 == l1:
+            continue
+        rows = left_order[l0:l1]
+        ids = right_order[r0:r1]
+        matched[rows] = _backward(left_times[rows], right_times[ids], tolerance, ids)
+
+    return matched
@@ -0,0 +1,140 @@
+import math
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterable, Optional
+
+import numpy as np
+
+from domains.entities import Route
+
+
+# Rollup granularities: name -> slot width in minutes, slots cover one week
+HOUR_OF_WEEK = "hour_of_week"
+QUARTER_HOUR_OF_WEEK = "quarter_hour_of_week"
+
+GRANULARITIES = {
+    HOUR_OF_WEEK: 60,
+    QUARTER_HOUR_OF_WEEK: 15
+}
+
+
+def week_slot(timestamp: datetime, granularity: str) -> int:
+    """ Slot of the week (Monday 00:00 = 0) the local `timestamp` falls in """
+
+    minutes = GRANULARITIES[granularity]
+    minute_of_week = timestamp.weekday() * 1440 + timestamp.hour * 60 + timestamp.minute
+    return minute_of_week // minutes
+
+
+def congestion_index(route: Route) -> Optional[float]:
+    """ Traffic-aware duration over free-flow duration; None when undefined """
+
+    if not route.static_duration_seconds or route.static_duration_seconds <= 0:
+        return None
+    return route.duration_seconds / route.static_duration_seconds
+
+
+class QuantileSketch:
+    """ Mergeable log-bucketed histogram with ~1% relative error on quantiles
+
+    Every sketch shares the same bucket layout, so merging is element-wise addition
+    of the counts. Values outside [MIN_VALUE, MAX_VALUE] are clamped to the edges.
+    """
+
+    RELATIVE_ACCURACY = 0.01
+    MIN_VALUE = 0.1
+    MAX_VALUE = 20.0
+
+    _GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+    _LOG_GAMMA = math.log(_GAMMA)
+    _OFFSET = math.floor(math.log(MIN_VALUE) / _LOG_GAMMA)
+    BUCKETS = math.ceil(math.log(MAX_VALUE) / _LOG_GAMMA) - _OFFSET + 1
+
+    def __init__(self, counts: Optional[np.ndarray] = None):
+        if counts is None:
+            counts = np.zeros(self.BUCKETS, dtype=np.int64)
+        elif len(counts) != self.BUCKETS:
+            raise ValueError(f"Expected {self.BUCKETS} sketch buckets, got {len(counts)}")
+        self.counts = counts
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    def _indexes(self, values: np.ndarray) -> np.ndarray:
+        values = np.clip(values, self.MIN_VALUE, self.MAX_VALUE)
+        indexes = np.ceil(np.log(values) / self._LOG_GAMMA).astype(np.int64) - self._OFFSET
+        return np.clip(indexes, 0, self.BUCKETS - 1)
+
+    def add_many(self, values: Iterable[float]):
+        values = np.asarray(values, dtype=np.float64)
+        if values.size:
+            self.counts += np.bincount(self._indexes(values), minlength=self.BUCKETS)
+
+    def add(self, value: float):
+        self.add_many([value])
+
+    def merge(self, other: "QuantileSketch"):
+        self.counts += other.counts
+
+    def quantile(self, q: float) -> Optional[float]:
+        total = self.total
+        if total == 0:
+            return None
+
+        rank = q * (total - 1)
+        index = int(np.searchsorted(np.cumsum(self.counts), rank, side="right"))
+        index = min(index, self.BUCKETS - 1)
+
+        # Midpoint (in relative terms) of the bucket (gamma^(i-1), gamma^i]
+        return 2 * self._GAMMA ** (index + self._OFFSET) / (self._GAMMA + 1)
+
+    def to_bytes(self) -> bytes:
+        return self.counts.astype("<i4").tobytes()
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "QuantileSketch":
+        return cls(np.frombuffer(blob, dtype="<i4").astype(np.int64))
+
+
+@dataclass
+class CongestionStats:
+    count: int = 0
+    total: float = 0.0
+    total_sq: float = 0.0
+    sketch: QuantileSketch = field(default_factory=QuantileSketch)
+
+    def add_many(self, values: Iterable[float]):
+        values = np.asarray(values, dtype=np.float64)
+        self.count += int(values.size)
+        self.total += float(values.sum())
+        self.total_sq += float(np.square(values).sum())
+        self.sketch.add_many(values)
+
+    def merge(self, other: "CongestionStats"):
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+        self.sketch.merge(other.sketch)
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    @property
+    def stddev(self) -> Optional[float]:
+        if self.count < 2:
+            return None
+        variance = (self.total_sq - self.total ** 2 / self.count) / (self.count - 1)
+        return math.sqrt(max(variance, 0.0))
+
+
+@dataclass
+class SlotProfile:
+    slot: int
+    count: int
+    mean: float
+    stddev: Optional[float]
+    p50: float
+    p90: float
+    p95: float
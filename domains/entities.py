@@ -1,6 +1,9 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum, auto
+from typing import List, Optional, Tuple
+
+import numpy as np
 
 
 class RouteType(Enum):
@@ -17,6 +20,25 @@ class Route:
     static_duration_seconds: float
     encoded_polyline: str
     timestamp: datetime
+    polyline_hash: Optional[str] = None
+    record_id: Optional[str] = None
+    variant_id: Optional[str] = None
+
+@dataclass
+class RouteVariant:
+    """ A physical path between an origin and destination, identified across responses """
+    variant_id: str
+    origin: str
+    destination: str
+    encoded_polyline: str
+    first_seen: Optional[datetime] = None
+
+@dataclass
+class RouteGeometry:
+    """ A stored polyline as (n, 2) lat/lng degrees, with every origin/destination that used it """
+    polyline_hash: str
+    coordinates: np.ndarray
+    pairs: List[Tuple[str, str]]
 
 @dataclass
 class WeatherConditions:
@@ -29,3 +51,46 @@ class WeatherConditions:
     wind_speed: float
     humidity: float
     timestamp: datetime
+    location: Optional[str] = None
+    record_id: Optional[str] = None
+
+@dataclass
+class RouteMatrix:
+    """ Travel times between every origin and destination at one snapshot time
+
+    Arrays are (origins, destinations), with NaN where no route was returned.
+    """
+    origins: List[str]
+    destinations: List[str]
+    duration_seconds: np.ndarray
+    static_duration_seconds: np.ndarray
+    distance_meters: np.ndarray
+    timestamp: datetime
+
+@dataclass
+class RouteForecast:
+    """ Travel time predicted at `observed_at` for a departure at `departure_at` """
+    origin: str
+    destination: str
+    route_index: int
+    observed_at: datetime
+    departure_at: datetime
+    distance_meters: float
+    duration_seconds: float
+    static_duration_seconds: float
+
+@dataclass(frozen=True)
+class RoutePair:
+    origin: str
+    destination: str
+    round_trip: bool = True
+
+@dataclass
+class CollectionTask:
+    kind: str
+    key: str
+    payload: dict = field(default_factory=dict)
+    interval_seconds: int = 3600
+    task_id: Optional[int] = None
+    next_due_at: Optional[datetime] = None
+    attempts: int = 0
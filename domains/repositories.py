@@ -1,12 +1,204 @@
 from abc import ABC, abstractmethod
-from domains.entities import Route
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from domains.congestion import CongestionStats
+from domains.entities import (
+    CollectionTask, Route, RouteForecast, RouteGeometry, RouteMatrix, RouteVariant,
+    WeatherConditions
+)
+
+ROUTE_RECORD_FIELDS = (
+    "id", "route_type", "origin", "destination", "distance_meters",
+    "duration_seconds", "static_duration_seconds",
+    "polyline", "polyline_hash", "timestamp", "variant_id"
+)
+
+WEATHER_RECORD_FIELDS = (
+    "id", "weather_type", "weather_description",
+    "temperature", "feels_like", "pressure", "visibility",
+    "wind_speed", "humidity", "timestamp", "location"
+)
 
 class ITrafficRepository(ABC):
     @abstractmethod
     def save_route(self, route: Route) -> bool:
         pass
 
+    @abstractmethod
+    def save_routes(self, routes: List[Route]) -> bool:
+        pass
+
+    @abstractmethod
+    def iter_route_records(
+        self,
+        after_id: int = 0,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        origin: Optional[str] = None,
+        destination: Optional[str] = None,
+        batch_size: int = 5000
+    ) -> Iterator[List[tuple]]:
+        """ Raw rows (ROUTE_RECORD_FIELDS) with id > after_id, in id order, chunked """
+        pass
+
+    @abstractmethod
+    def iter_routes(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        origin: Optional[str] = None,
+        destination: Optional[str] = None,
+        batch_size: int = 5000
+    ) -> Iterator[List[Route]]:
+        """ Stored routes in insertion order, yielded in chunks of `batch_size` """
+        pass
+
+    @abstractmethod
+    def iter_route_records_by_time(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        batch_size: int = 5000
+    ) -> Iterator[List[tuple]]:
+        """ Raw rows (ROUTE_RECORD_FIELDS) in [start, end), in (timestamp, id) order, chunked """
+        pass
+
+    @abstractmethod
+    def iter_route_geometries(self, batch_size: int = 1000) -> Iterator[List[RouteGeometry]]:
+        """ Every distinct stored geometry with the origin/destination pairs that used it """
+        pass
+
+    def flush(self):
+        """ Block until every route saved so far is durable; raises if any could not be stored
+
+        No-op for synchronous stores, whose `save_routes` already reports failures.
+        """
+        pass
+
 class IWeatherRepository(ABC):
     @abstractmethod
-    def save_weather(self, route: Route) -> bool:
-        pass
\ No newline at end of file
+    def save_weather(self, weather: WeatherConditions) -> bool:
+        pass
+
+    @abstractmethod
+    def save_weather_batch(self, weathers: List[WeatherConditions]) -> bool:
+        pass
+
+    @abstractmethod
+    def iter_weather_records(
+        self,
+        after_id: int = 0,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        location: Optional[str] = None,
+        batch_size: int = 5000
+    ) -> Iterator[List[tuple]]:
+        """ Raw rows (WEATHER_RECORD_FIELDS) with id > after_id, in id order, chunked """
+        pass
+
+    @abstractmethod
+    def iter_weather_records_by_time(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        batch_size: int = 5000
+    ) -> Iterator[List[tuple]]:
+        """ Raw rows (WEATHER_RECORD_FIELDS) in [start, end), in (timestamp, id) order, chunked """
+        pass
+
+    def flush(self):
+        """ Block until every weather record saved so far is durable; raises if any could not be stored """
+        pass
+
+class IRouteVariantRepository(ABC):
+    @abstractmethod
+    def load_variants(self, origin: str, destination: str) -> List[RouteVariant]:
+        """ Known variants of one origin/destination, oldest first """
+        pass
+
+    @abstractmethod
+    def save_variants(self, variants: List[RouteVariant]) -> bool:
+        pass
+
+class IRouteMatrixRepository(ABC):
+    @abstractmethod
+    def save_matrix(self, matrix: RouteMatrix) -> bool:
+        pass
+
+    @abstractmethod
+    def iter_matrices(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> Iterator[RouteMatrix]:
+        """ Stored snapshots in time order """
+        pass
+
+class IRouteForecastRepository(ABC):
+    @abstractmethod
+    def save_forecasts(self, forecasts: List[RouteForecast]) -> bool:
+        pass
+
+    @abstractmethod
+    def iter_forecasts(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        origin: Optional[str] = None,
+        destination: Optional[str] = None,
+        batch_size: int = 5000
+    ) -> Iterator[List[RouteForecast]]:
+        """ Forecasts observed in [start, end), ordered by (observed_at, departure_at), chunked """
+        pass
+
+# (origin, destination, route_type name, slot)
+RollupKey = Tuple[str, str, str, int]
+
+class ICongestionRollupRepository(ABC):
+    @abstractmethod
+    def merge_stats(self, granularity: str, stats: Dict[RollupKey, CongestionStats]) -> bool:
+        pass
+
+    @abstractmethod
+    def get_stats(
+        self,
+        granularity: str,
+        origin: str,
+        destination: str,
+        route_type: str
+    ) -> Dict[int, CongestionStats]:
+        pass
+
+    @abstractmethod
+    def clear(self):
+        pass
+
+class ICollectionTaskQueue(ABC):
+    @abstractmethod
+    def sync_tasks(self, tasks: List[CollectionTask], prune: bool = False) -> int:
+        """ Upsert the task catalog by key; `prune` deletes tasks not in it """
+        pass
+
+    @abstractmethod
+    def claim(self, worker_id: str, limit: int, lease_seconds: float) -> List[CollectionTask]:
+        """ Lease up to `limit` due tasks that no live worker holds """
+        pass
+
+    @abstractmethod
+    def heartbeat(self, worker_id: str, task_ids: List[int], lease_seconds: float) -> List[int]:
+        """ Extend the leases still held by `worker_id`; returns their ids """
+        pass
+
+    @abstractmethod
+    def complete(self, task_id: int, worker_id: str) -> bool:
+        """ Release the lease and schedule the next run; False if the lease was lost """
+        pass
+
+    @abstractmethod
+    def fail(self, task_id: int, worker_id: str, retry_in: float, error: str = "") -> bool:
+        pass
+
+    @abstractmethod
+    def reclaim_expired(self) -> int:
+        """ Clear leases whose worker stopped heartbeating """
+        pass
@@ -0,0 +1,137 @@
+import math
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+
+METERS_PER_DEGREE_LAT = 111320.0
+
+
+@dataclass
+class PathSignature:
+    """ A path resampled to a fixed number of evenly spaced points, in local meters """
+    points: np.ndarray
+    bbox: np.ndarray
+    length: float
+
+
+def path_signature(coordinates: np.ndarray, ref_lat: float, samples: int = 96) -> PathSignature:
+    """ Project (n, 2) lat/lng degrees around `ref_lat` and resample by arc length """
+
+    coordinates = np.asarray(coordinates, dtype=np.float64)
+    xy = np.empty_like(coordinates)
+    xy[:, 0] = coordinates[:, 1] * METERS_PER_DEGREE_LAT * math.cos(math.radians(ref_lat))
+    xy[:, 1] = coordinates[:, 0] * METERS_PER_DEGREE_LAT
+
+    steps = np.hypot(*np.diff(xy, axis=0).T) if len(xy) > 1 else np.zeros(0)
+    travelled = np.concatenate(([0.0], np.cumsum(steps)))
+    length = float(travelled[-1])
+
+    targets = np.linspace(0.0, length, samples)
+    points = np.column_stack((
+        np.interp(targets, travelled, xy[:, 0]),
+        np.interp(targets, travelled, xy[:, 1])
+    ))
+
+    bbox = np.concatenate((xy.min(axis=0), xy.max(axis=0)))
+    return PathSignature(points, bbox, length)
+
+
+def hausdorff_many(points: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+    """ Symmetric Hausdorff distance from (k, 2) `points` to each of (v, k, 2) `candidates` """
+
+    if len(candidates) == 0:
+        return np.empty(0)
+
+    # (v, k, k) pairwise distances, one broadcast for every candidate
+    diff = points[None, :, None, :] - candidates[:, None, :, :]
+    dist = np.sqrt(np.einsum("vijd,vijd->vij", diff, diff))
+
+    forward = dist.min(axis=2).max(axis=1)
+    backward = dist.min(axis=1).max(axis=1)
+    return np.maximum(forward, backward)
+
+
+class VariantIndex:
+    """ Known variants of one origin/destination as stacked arrays
+
+    Matching is a cheap prefilter on bounding boxes and path lengths, then one
+    vectorised Hausdorff check against the surviving candidates. Paths are
+    compared after resampling, so the tolerance is widened by half the sample
+    spacing to absorb the phase difference between two samplings of one road.
+    """
+
+    def __init__(
+        self,
+        ref_lat: float,
+        samples: int = 96,
+        tolerance_m: float = 150.0,
+        length_tolerance: float = 0.15
+    ):
+        self.ref_lat = ref_lat
+        self.samples = samples
+        self.tolerance_m = tolerance_m
+        self.length_tolerance = length_tolerance
+
+        self.variant_ids: List[str] = []
+        self._points = np.empty((0, samples, 2))
+        self._bboxes = np.empty((0, 4))
+        self._lengths = np.empty(0)
+
+    def __len__(self) -> int:
+        return len(self.variant_ids)
+
+    def signature(self, coordinates: np.ndarray) -> PathSignature:
+        return path_signature(coordinates, self.ref_lat, self.samples)
+
+    def add(self, variant_id: str, signature: PathSignature):
+        self.variant_ids.append(variant_id)
+        self._points = np.concatenate((self._points, signature.points[None]))
+        self._bboxes = np.vstack((self._bboxes, signature.bbox))
+        self._lengths = np.append(self._lengths, signature.length)
+
+    def distances(self, signature: PathSignature) -> np.ndarray:
+        """ Hausdorff distance to every variant; inf where the prefilter rejects it """
+
+        result = np.full(len(self), np.inf)
+        if not len(self):
+            return result
+
+        margin = self.tolerance_m
+        overlaps = (
+            (self._bboxes[:, 0] - margin <= signature.bbox[2])
+            & (signature.bbox[0] - margin <= self._bboxes[:, 2])
+            & (self._bboxes[:, 1] - margin <= signature.bbox[3])
+            & (signature.bbox[1] - margin <= self._bboxes[:, 3])
+        )
+        longest = np.maximum(self._lengths, signature.length)
+        similar_length = np.abs(self._lengths - signature.length) <= self.length_tolerance * np.maximum(longest, 1.0)
+
+        candidates = np.flatnonzero(overlaps & similar_length)
+        if len(candidates):
+            result[candidates] = hausdorff_many(signature.points, self._points[candidates])
+        return result
+
+    def match(self, signatures: List[PathSignature]) -> List[Optional[int]]:
+        """ Variant index for each path, or None; one response never reuses a variant """
+
+        if not signatures or not len(self):
+            return [None] * len(signatures)
+
+        distances = np.vstack([self.distances(signature) for signature in signatures])
+
+        spacing = np.maximum.outer(
+            np.array([signature.length for signature in signatures]), self._lengths
+        ) / max(self.samples - 1, 1)
+        distances[distances > self.tolerance_m + spacing / 2] = np.inf
+
+        # Greedy on the closest remaining (path, variant) pair
+        matches: List[Optional[int]] = [None] * len(signatures)
+        while np.isfinite(distances).any():
+            path, variant = np.unravel_index(np.argmin(distances), distances.shape)
+            matches[path] = int(variant)
+            distances[path, :] = np.inf
+            distances[:, variant] = np.inf
+
+        return matches
@@ -0,0 +1,84 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+from domains.congestion import CongestionStats
+
+
+@dataclass
+class SamplingRate:
+    origin: str
+    destination: str
+    urgency: float
+    interval: float
+    target_per_hour: float
+    effective_per_hour: float
+
+
+def change_rate(observations: Sequence[Tuple[datetime, float]]) -> Optional[float]:
+    """ Mean relative change of duration per hour between consecutive observations """
+
+    rates = []
+    for (t0, d0), (t1, d1) in zip(observations, observations[1:]):
+        hours = max((t1 - t0).total_seconds() / 3600, 1 / 60)
+        if d0 > 0:
+            rates.append(abs(d1 - d0) / d0 / hours)
+    return sum(rates) / len(rates) if rates else None
+
+
+def band_deviation(
+    index: float,
+    stats: Optional[CongestionStats],
+    min_stddev: float = 0.05
+) -> Optional[float]:
+    """ Distance of a congestion index from its slot mean, in slot standard deviations
+
+    The standard deviation is floored at `min_stddev` so a slot that happened to be
+    perfectly flat does not turn every small wobble into an outlier.
+    """
+
+    if stats is None or stats.stddev is None:
+        return None
+    return abs(index - stats.mean) / max(stats.stddev, min_stddev)
+
+
+def interval_for_urgency(urgency: float, min_interval: float, max_interval: float) -> float:
+    """ Geometric interpolation: urgency 0 samples every max_interval, >= 1 every min_interval """
+
+    urgency = min(max(urgency, 0.0), 1.0)
+    return max_interval * (min_interval / max_interval) ** urgency
+
+
+def allocate_budget(
+    demands: Dict[Hashable, Tuple[float, float, int]],
+    budget_per_hour: Optional[float]
+) -> Dict[Hashable, float]:
+    """ Scale desired sampling rates so their API calls fit a global hourly budget
+
+    demands: key -> (desired samples/hour, floor samples/hour, API calls per sample).
+    Everyone keeps their floor first and the remaining budget is shared in proportion
+    to the demand above it; if even the floors do not fit, all floors shrink evenly.
+    """
+
+    if budget_per_hour is None:
+        return {key: rate for key, (rate, _, _) in demands.items()}
+
+    floor_cost = sum(floor * calls for _, floor, calls in demands.values())
+    extra_cost = sum(max(rate - floor, 0.0) * calls for rate, floor, calls in demands.values())
+
+    if floor_cost >= budget_per_hour:
+        scale = budget_per_hour / floor_cost if floor_cost else 0.0
+        return {key: floor * scale for key, (_, floor, _) in demands.items()}
+
+    share = min(1.0, (budget_per_hour - floor_cost) / extra_cost) if extra_cost else 0.0
+    return {
+        key: floor + max(rate - floor, 0.0) * share
+        for key, (rate, floor, _) in demands.items()
+    }
+
+
+def effective_rate(sample_times: List[float], now: float, window: float = 3600.0) -> float:
+    """ Samples per hour actually taken over the last `window` seconds """
+
+    recent = sum(1 for t in sample_times if t > now - window)
+    return recent * 3600.0 / window
@@ -0,0 +1,361 @@
+import math
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from domains.route_variants import METERS_PER_DEGREE_LAT
+
+
+# Cell coordinates are shifted into [0, 2**21) so a cell packs into one int64 key
+_CELL_OFFSET = 1 << 20
+_CELL_SHIFT = 1 << 21
+
+# Candidate segments per chunk in the (segments x polygon edges) tests
+_CHUNK_ELEMENTS = 1 << 21
+
+
+@dataclass
+class GeometryHit:
+    """ A stored geometry matched by a spatial query
+
+    segments: indices of the matched segments within the geometry, where segment
+        i runs from vertex i to vertex i + 1.
+    distance_m: distance to the query point, for nearest-segment queries.
+    """
+    polyline_hash: str
+    pairs: List[Tuple[str, str]]
+    segments: np.ndarray
+    distance_m: Optional[float] = None
+
+
+def _cell_keys(cx: np.ndarray, cy: np.ndarray) -> np.ndarray:
+    return (cx + _CELL_OFFSET) * _CELL_SHIFT + (cy + _CELL_OFFSET)
+
+
+def _distinct(values: np.ndarray) -> np.ndarray:
+    """ Sorted distinct values; much faster than np.unique on int arrays with many repeats """
+
+    values = np.sort(values)
+    if len(values) < 2:
+        return values
+    return values[np.concatenate(([True], values[1:] != values[:-1]))]
+
+
+def _cross(ax, ay, bx, by, px, py):
+    """ z of (b - a) x (p - a); the sign tells which side of a->b the point is on """
+    return (bx - ax) * (py - ay) - (by - ay) * (px - ax)
+
+
+class SegmentGrid:
+    """ Polyline segments bucketed into a uniform grid of `cell_size_m` square cells
+
+    Everything is flat arrays: the vertices of every geometry back to back in
+    local meters (float32, relative to the reference point), one start vertex per
+    segment, and the grid as (cell key, segment) entries sorted by key. A segment
+    is entered in every cell its bounding box touches. Keys are column-major, so
+    a rectangle of cells is one contiguous key range per column.
+
+    Added geometries are buffered and merged into the sorted entries by `merge`,
+    which is linear in the size of the index.
+    """
+
+    def __init__(self, ref_lat: float, ref_lng: float, cell_size_m: float = 250.0):
+        self.ref_lat = ref_lat
+        self.ref_lng = ref_lng
+        self.cell_size_m = cell_size_m
+        self._x_scale = METERS_PER_DEGREE_LAT * math.cos(math.radians(ref_lat))
+
+        self._vertices = np.empty((0, 2), dtype=np.float32)
+        self._segment_starts = np.empty(0, dtype=np.int64)
+        self._segment_geometry = np.empty(0, dtype=np.int32)
+        self._geometry_first_segment = np.empty(0, dtype=np.int64)
+
+        self._keys = np.empty(0, dtype=np.int64)
+        self._entries = np.empty(0, dtype=np.int64)
+        self._cy_range = (0, -1)
+
+        self._pending: List[np.ndarray] = []
+        self.geometries = 0
+
+    @property
+    def segments(self) -> int:
+        return len(self._segment_starts)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def project(self, lat, lng) -> Tuple[np.ndarray, np.ndarray]:
+        """ Local x/y meters of lat/lng degrees (equirectangular around the reference point) """
+
+        lat = np.asarray(lat, dtype=np.float64)
+        lng = np.asarray(lng, dtype=np.float64)
+        return (lng - self.ref_lng) * self._x_scale, (lat - self.ref_lat) * METERS_PER_DEGREE_LAT
+
+    def add(self, coordinates: np.ndarray) -> int:
+        """ Buffer an (n, 2) lat/lng polyline; returns its geometry number """
+
+        self._pending.append(np.asarray(coordinates, dtype=np.float64).reshape(-1, 2))
+        self.geometries += 1
+        return self.geometries - 1
+
+    # ---------- Building ----------
+    def merge(self):
+        """ Move buffered geometries into the grid """
+
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+
+        vertex_counts = np.array([len(coords) for coords in pending], dtype=np.int64)
+        segment_counts = np.maximum(vertex_counts - 1, 0)
+        vertex_offsets = len(self._vertices) + np.cumsum(vertex_counts) - vertex_counts
+        first_segments = np.cumsum(segment_counts) - segment_counts
+
+        coordinates = np.concatenate(pending)
+        x, y = self.project(coordinates[:, 0], coordinates[:, 1])
+        vertices = np.column_stack((x, y)).astype(np.float32)
+
+        # Segment j of geometry g starts at vertex j of g
+        owners = np.repeat(np.arange(len(pending)), segment_counts)
+        within = np.arange(segment_counts.sum()) - np.repeat(first_segments, segment_counts)
+        starts = vertex_offsets[owners] + within
+
+        segment_base = len(self._segment_starts)
+        geometry_base = len(self._geometry_first_segment)
+
+        self._vertices = np.concatenate((self._vertices, vertices))
+        self._segment_starts = np.concatenate((self._segment_starts, starts))
+        self._segment_geometry = np.concatenate((
+            self._segment_geometry, (geometry_base + owners).astype(np.int32)
+        ))
+        self._geometry_first_segment = np.concatenate((
+            self._geometry_first_segment, segment_base + first_segments
+        ))
+
+        keys, entries = self._cell_entries(segment_base + np.arange(len(starts)))
+        if not len(keys):
+            return
+
+        order = np.argsort(keys, kind="stable")
+        keys, entries = keys[order], entries[order]
+
+        # Sorted merge: every new entry goes after the existing entries of its cell
+        positions = np.searchsorted(self._keys, keys, side="right")
+        self._keys = np.insert(self._keys, positions, keys)
+        self._entries = np.insert(self._entries, positions, entries)
+
+        cy = keys % _CELL_SHIFT - _CELL_OFFSET
+        low, high = self._cy_range
+        self._cy_range = (
+            int(cy.min()) if high < low else min(low, int(cy.min())),
+            int(cy.max()) if high < low else max(high, int(cy.max()))
+        )
+
+    def _endpoints(self, segments: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        starts = self._segment_starts[segments]
+        return (
+            self._vertices[starts].astype(np.float64),
+            self._vertices[starts + 1].astype(np.float64)
+        )
+
+    def _cell_entries(self, segments: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """ (cell key, segment) for every cell each segment's bounding box touches """
+
+        a, b = self._endpoints(segments)
+        low = np.floor(np.minimum(a, b) / self.cell_size_m).astype(np.int64)
+        high = np.floor(np.maximum(a, b) / self.cell_size_m).astype(np.int64)
+
+        heights = high[:, 1] - low[:, 1] + 1
+        counts = (high[:, 0] - low[:, 0] + 1) * heights
+
+        owners = np.repeat(np.arange(len(segments)), counts)
+        k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cx = low[owners, 0] + k // heights[owners]
+        cy = low[owners, 1] + k % heights[owners]
+
+        return _cell_keys(cx, cy), segments[owners]
+
+    # ---------- Lookup ----------
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return math.floor(x / self.cell_size_m), math.floor(y / self.cell_size_m)
+
+    def _in_cells(self, cx0: int, cy0: int, cx1: int, cy1: int) -> np.ndarray:
+        """ Distinct segments entered in any cell of the inclusive cell rectangle """
+
+        if not len(self._keys):
+            return np.empty(0, dtype=np.int64)
+
+        # Clip to the occupied columns and rows; the key range per column does the rest
+        cx0 = max(cx0, int(self._keys[0] // _CELL_SHIFT) - _CELL_OFFSET)
+        cx1 = min(cx1, int(self._keys[-1] // _CELL_SHIFT) - _CELL_OFFSET)
+        cy0, cy1 = max(cy0, self._cy_range[0]), min(cy1, self._cy_range[1])
+        if cx1 < cx0 or cy1 < cy0:
+            return np.empty(0, dtype=np.int64)
+
+        columns = np.arange(cx0, cx1 + 1, dtype=np.int64)
+        lo = np.searchsorted(self._keys, _cell_keys(columns, cy0), side="left")
+        hi = np.searchsorted(self._keys, _cell_keys(columns, cy1), side="right")
+
+        lengths = hi - lo
+        positions = np.repeat(lo - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())
+        return _distinct(self._entries[positions])
+
+    def _in_rect(self, x0: float, y0: float, x1: float, y1: float) -> np.ndarray:
+        cx0, cy0 = self._cell(x0, y0)
+        cx1, cy1 = self._cell(x1, y1)
+        return self._in_cells(cx0, cy0, cx1, cy1)
+
+    # ---------- Queries ----------
+    def query_bbox(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float) -> np.ndarray:
+        """ Segments that intersect a lat/lng box """
+
+        x0, y0 = self.project(min_lat, min_lng)
+        x1, y1 = self.project(max_lat, max_lng)
+        candidates = self._in_rect(x0, y0, x1, y1)
+        a, b = self._endpoints(candidates)
+
+        overlaps = (
+            (np.minimum(a[:, 0], b[:, 0]) <= x1) & (np.maximum(a[:, 0], b[:, 0]) >= x0)
+            & (np.minimum(a[:, 1], b[:, 1]) <= y1) & (np.maximum(a[:, 1], b[:, 1]) >= y0)
+        )
+
+        # With overlapping boxes, the segment misses only if all four corners are on one side
+        sides = np.column_stack([
+            _cross(a[:, 0], a[:, 1], b[:, 0], b[:, 1], cx, cy)
+            for cx, cy in ((x0, y0), (x0, y1), (x1, y0), (x1, y1))
+        ])
+        separated = (sides > 0).all(axis=1) | (sides < 0).all(axis=1)
+
+        return candidates[overlaps & ~separated]
+
+    def query_polygon(self, polygon: np.ndarray) -> np.ndarray:
+        """ Segments inside or crossing a lat/lng polygon, given as its (m, 2) outer ring """
+
+        polygon = np.asarray(polygon, dtype=np.float64).reshape(-1, 2)
+        px, py = self.project(polygon[:, 0], polygon[:, 1])
+        ring = np.column_stack((px, py))
+        if len(ring) > 1 and np.array_equal(ring[0], ring[-1]):
+            ring = ring[:-1]
+        if len(ring) < 3:
+            return np.empty(0, dtype=np.int64)
+
+        candidates = self._in_rect(px.min(), py.min(), px.max(), py.max())
+        edges_from, edges_to = ring, np.roll(ring, -1, axis=0)
+
+        matched = []
+        chunk = max(1, _CHUNK_ELEMENTS // len(ring))
+        for i in range(0, len(candidates), chunk):
+            segments = candidates[i:i + chunk]
+            a, b = self._endpoints(segments)
+            hit = (
+                _inside(a, edges_from, edges_to)
+                | _inside(b, edges_from, edges_to)
+                | _crosses(a, b, edges_from, edges_to)
+            )
+            matched.append(segments[hit])
+
+        return np.concatenate(matched) if matched else np.empty(0, dtype=np.int64)
+
+    def nearest(
+        self,
+        lat: float,
+        lng: float,
+        k: int = 1,
+        max_distance_m: float = math.inf,
+        per_geometry: bool = False
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """ The k segments closest to a point, and their distances in meters
+
+        Searches squares of cells around the point, doubling the radius until the
+        k-th distance is inside the square, so only nearby cells are read.
+        With `per_geometry`, only the closest segment of each geometry competes.
+        """
+
+        x, y = self.project(lat, lng)
+        x, y = float(x), float(y)
+        cx, cy = self._cell(x, y)
+
+        empty = (np.empty(0, dtype=np.int64), np.empty(0))
+        if not len(self._keys) or k < 1:
+            return empty
+
+        # Radius at which the square covers every occupied cell
+        col_low = int(self._keys[0] // _CELL_SHIFT) - _CELL_OFFSET
+        col_high = int(self._keys[-1] // _CELL_SHIFT) - _CELL_OFFSET
+        full_radius = max(
+            abs(cx - col_low), abs(cx - col_high),
+            abs(cy - self._cy_range[0]), abs(cy - self._cy_range[1])
+        )
+        if math.isfinite(max_distance_m):
+            full_radius = min(full_radius, math.ceil(max_distance_m / self.cell_size_m) + 1)
+
+        radius = 1
+        while True:
+            candidates = self._in_cells(cx - radius, cy - radius, cx + radius, cy + radius)
+            distances = self._distances(x, y, candidates)
+
+            keep = distances <= max_distance_m
+            candidates, distances = candidates[keep], distances[keep]
+
+            if per_geometry and len(candidates):
+                order = np.lexsort((distances, self._segment_geometry[candidates]))
+                candidates, distances = candidates[order], distances[order]
+                _, first = np.unique(self._segment_geometry[candidates], return_index=True)
+                candidates, distances = candidates[first], distances[first]
+
+            order = np.argsort(distances, kind="stable")[:k]
+            candidates, distances = candidates[order], distances[order]
+
+            # Anything closer than `radius` cells lies inside the searched square
+            covered = radius * self.cell_size_m
+            if (len(candidates) == k and distances[-1] <= covered) or radius >= full_radius:
+                return candidates, distances
+            radius *= 2
+
+    def _distances(self, x: float, y: float, segments: np.ndarray) -> np.ndarray:
+        a, b = self._endpoints(segments)
+        ab = b - a
+        lengths = np.einsum("ij,ij->i", ab, ab)
+        t = np.einsum("ij,ij->i", np.array([x, y]) - a, ab) / np.where(lengths > 0, lengths, 1.0)
+        closest = a + np.clip(t, 0.0, 1.0)[:, None] * ab
+        return np.hypot(closest[:, 0] - x, closest[:, 1] - y)
+
+    # ---------- Segment info ----------
+    def geometry_of(self, segments: np.ndarray) -> np.ndarray:
+        return self._segment_geometry[segments]
+
+    def segment_index(self, segments: np.ndarray) -> np.ndarray:
+        """ Position of each segment within its own geometry """
+        return segments - self._geometry_first_segment[self._segment_geometry[segments]]
+
+
+def _inside(points: np.ndarray, edges_from: np.ndarray, edges_to: np.ndarray) -> np.ndarray:
+    """ Even-odd rule for (s, 2) points against the polygon edges """
+
+    x, y = points[:, 0:1], points[:, 1:2]
+    xi, yi = edges_from[:, 0], edges_from[:, 1]
+    xj, yj = edges_to[:, 0], edges_to[:, 1]
+
+    straddles = (yi > y) != (yj > y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_at_y = xi + (y - yi) * (xj - xi) / (yj - yi)
+    return (straddles & (x < x_at_y)).sum(axis=1) % 2 == 1
+
+
+def _crosses(a: np.ndarray, b: np.ndarray, edges_from: np.ndarray, edges_to: np.ndarray) -> np.ndarray:
+    """ Whether each (a, b) segment touches any polygon edge """
+
+    ax, ay, bx, by = a[:, 0:1], a[:, 1:2], b[:, 0:1], b[:, 1:2]
+    cx, cy = edges_from[:, 0], edges_from[:, 1]
+    dx, dy = edges_to[:, 0], edges_to[:, 1]
+
+    boxes = (
+        (np.minimum(ax, bx) <= np.maximum(cx, dx)) & (np.minimum(cx, dx) <= np.maximum(ax, bx))
+        & (np.minimum(ay, by) <= np.maximum(cy, dy)) & (np.minimum(cy, dy) <= np.maximum(ay, by))
+    )
+    straddle_edge = _cross(ax, ay, bx, by, cx, cy) * _cross(ax, ay, bx, by, dx, dy) <= 0
+    straddle_segment = _cross(cx, cy, dx, dy, ax, ay) * _cross(cx, cy, dx, dy, bx, by) <= 0
+
+    return (boxes & straddle_edge & straddle_segment).any(axis=1)
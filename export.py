@@ -0,0 +1,72 @@
+import argparse
+from datetime import datetime
+
+from main import Container
+
+from infrastructure.export import ROUTE_SCHEMA, WEATHER_SCHEMA, ColumnarExporter
+
+
+def _parse_datetime(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Stream routes/weather into date-partitioned Parquet or Arrow files"
+    )
+    parser.add_argument("table", choices=["routes", "weather"])
+    parser.add_argument("output_dir")
+    parser.add_argument("--format", choices=["parquet", "arrow"], default="parquet")
+    parser.add_argument("--start", type=_parse_datetime, help="ISO timestamp, inclusive")
+    parser.add_argument("--end", type=_parse_datetime, help="ISO timestamp, exclusive")
+    parser.add_argument("--origin")
+    parser.add_argument("--destination")
+    parser.add_argument("--location")
+    parser.add_argument("--batch-size", type=int, default=100000)
+    parser.add_argument(
+        "--no-resume", action="store_true",
+        help="Ignore the stored watermark and export from the first row"
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    container = Container()
+    exporter = ColumnarExporter(args.output_dir, file_format=args.format)
+
+    filters = {"start": args.start, "end": args.end}
+    if args.table == "routes":
+        filters.update(origin=args.origin, destination=args.destination)
+    else:
+        filters.update(location=args.location)
+
+    after_id = 0 if args.no_resume else exporter.load_watermark(args.table, filters)
+    print(f"🔍 Exporting {args.table} after id {after_id} to {args.output_dir}")
+
+    if args.table == "routes":
+        records = container.traffic_repository().iter_route_records(
+            after_id=after_id,
+            start=args.start,
+            end=args.end,
+            origin=args.origin,
+            destination=args.destination,
+            batch_size=args.batch_size
+        )
+        schema = ROUTE_SCHEMA
+    else:
+        records = container.weather_repository().iter_weather_records(
+            after_id=after_id,
+            start=args.start,
+            end=args.end,
+            location=args.location,
+            batch_size=args.batch_size
+        )
+        schema = WEATHER_SCHEMA
+
+    result = exporter.export(args.table, records, schema, filters)
+    print(f"✅ Exported {result.rows} rows into {len(result.files)} files (watermark {result.last_id})")
+
+
+if __name__ == "__main__":
+    main()
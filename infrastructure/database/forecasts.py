@@ -0,0 +1,255 @@
+import uuid
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional
+
+from psycopg2.extras import execute_values
+
+from domains.entities import RouteForecast
+from domains.repositories import IRouteForecastRepository
+from infrastructure.database.pool import PostgresConnectionPool
+from infrastructure.database.sqlite_engine import SQLiteEngine
+from infrastructure.metrics import track_write
+
+
+_FIELDS = (
+    "observed_at", "departure_at", "origin", "destination", "route_index",
+    "distance_meters", "duration_seconds", "static_duration_seconds"
+)
+
+
+def _utc(value: datetime) -> datetime:
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def _to_forecast(row: tuple) -> RouteForecast:
+    observed_at, departure_at, origin, destination, route_index, distance, duration, static_duration = row
+    return RouteForecast(
+        origin=origin,
+        destination=destination,
+        route_index=route_index,
+        observed_at=observed_at,
+        departure_at=departure_at,
+        distance_meters=distance,
+        duration_seconds=duration,
+        static_duration_seconds=static_duration
+    )
+
+
+def _filters(placeholder: str, start, end, origin, destination, to_param):
+    filters, params = [], []
+    if start is not None:
+        filters.append(f"observed_at >= {placeholder}")
+        params.append(to_param(start))
+    if end is not None:
+        filters.append(f"observed_at < {placeholder}")
+        params.append(to_param(end))
+    if origin is not None:
+        filters.append(f"origin = {placeholder}")
+        params.append(origin)
+    if destination is not None:
+        filters.append(f"destination = {placeholder}")
+        params.append(destination)
+    return filters, params
+
+
+# ---------- SQLite ----------
+class SQLiteRouteForecastRepository(IRouteForecastRepository):
+    _INSERT = f"""
+        INSERT OR IGNORE INTO route_forecasts ({", ".join(_FIELDS)})
+        VALUES ({", ".join("?" * len(_FIELDS))})
+    """
+
+    def __init__(self, engine: SQLiteEngine):
+        self.engine = engine
+        self._create_table()
+
+    def _create_table(self):
+
+        # Keyed by sweep time first so a whole sweep is stored contiguously
+        self.engine.execute_script("""
+            CREATE TABLE IF NOT EXISTS route_forecasts (
+                observed_at TEXT NOT NULL,
+                departure_at TEXT NOT NULL,
+                origin TEXT NOT NULL,
+                destination TEXT NOT NULL,
+                route_index INTEGER NOT NULL,
+                distance_meters REAL,
+                duration_seconds REAL,
+                static_duration_seconds REAL,
+                PRIMARY KEY (observed_at, departure_at, origin, destination, route_index)
+            ) WITHOUT ROWID;
+
+            CREATE INDEX IF NOT EXISTS idx_route_forecasts_route_departure
+                ON route_forecasts (origin, destination, departure_at);
+        """)
+
+    @staticmethod
+    def _to_row(forecast: RouteForecast) -> tuple:
+        return (
+            _utc(forecast.observed_at).isoformat(),
+            _utc(forecast.departure_at).isoformat(),
+            forecast.origin,
+            forecast.destination,
+            forecast.route_index,
+            forecast.distance_meters,
+            forecast.duration_seconds,
+            forecast.static_duration_seconds
+        )
+
+    @track_write("sqlite", "route_forecasts")
+    def save_forecasts(self, forecasts: List[RouteForecast]) -> bool:
+        """ Queue the sweep as one executemany on the writer thread """
+
+        if not forecasts:
+            return True
+
+        try:
+            self.engine.write(self._INSERT, [self._to_row(forecast) for forecast in forecasts])
+            return True
+        except Exception as e:
+            print(f"Error saving route forecasts: {e}")
+            return False
+
+    def iter_forecasts(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        origin: Optional[str] = None,
+        destination: Optional[str] = None,
+        batch_size: int = 5000
+    ) -> Iterator[List[RouteForecast]]:
+
+        filters, params = _filters(
+            "?", start, end, origin, destination, lambda value: _utc(value).isoformat()
+        )
+
+        # Keyset pagination over the primary key
+        filters.append("(observed_at, departure_at, origin, destination, route_index) > (?, ?, ?, ?, ?)")
+        where = " AND ".join(filters)
+        last = ("", "", "", "", -1)
+
+        while True:
+            rows = self.engine.query(f"""
+                SELECT {", ".join(_FIELDS)} FROM route_forecasts
+                WHERE {where}
+                ORDER BY observed_at, departure_at, origin, destination, route_index
+                LIMIT ?
+            """, params + list(last) + [batch_size])
+
+            if not rows:
+                return
+
+            yield [
+                _to_forecast((
+                    datetime.fromisoformat(row[0]), datetime.fromisoformat(row[1])
+                ) + tuple(row[2:]))
+                for row in rows
+            ]
+
+            if len(rows) < batch_size:
+                return
+            last = tuple(rows[-1][:5])
+
+
+# ---------- Postgres ----------
+class PostgresRouteForecastRepository(IRouteForecastRepository):
+    _INSERT = f"""
+        INSERT INTO route_forecasts ({", ".join(_FIELDS)})
+        VALUES %s
+        ON CONFLICT (observed_at, departure_at, origin, destination, route_index) DO NOTHING
+    """
+
+    def __init__(self, pool: PostgresConnectionPool):
+        self.pool = pool
+        self._create_table()
+
+    def _get_connection(self):
+        return self.pool.connection()
+
+    def _create_table(self):
+
+        with self._get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS route_forecasts (
+                        observed_at TIMESTAMP WITH TIME ZONE NOT NULL,
+                        departure_at TIMESTAMP WITH TIME ZONE NOT NULL,
+                        origin VARCHAR(255) NOT NULL,
+                        destination VARCHAR(255) NOT NULL,
+                        route_index SMALLINT NOT NULL,
+                        distance_meters REAL,
+                        duration_seconds REAL,
+                        static_duration_seconds REAL,
+                        PRIMARY KEY (observed_at, departure_at, origin, destination, route_index)
+                    )
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_route_forecasts_route_departure
+                        ON route_forecasts (origin, destination, departure_at)
+                """)
+                conn.commit()
+
+    @staticmethod
+    def _to_row(forecast: RouteForecast) -> tuple:
+        return (
+            _utc(forecast.observed_at),
+            _utc(forecast.departure_at),
+            forecast.origin,
+            forecast.destination,
+            forecast.route_index,
+            forecast.distance_meters,
+            forecast.duration_seconds,
+            forecast.static_duration_seconds
+        )
+
+    @track_write("postgres", "route_forecasts")
+    def save_forecasts(self, forecasts: List[RouteForecast]) -> bool:
+        """ Insert the sweep as multi-row VALUES statements in one transaction """
+
+        if not forecasts:
+            return True
+
+        with self._get_connection() as conn:
+            try:
+                with conn.cursor() as cursor:
+                    execute_values(
+                        cursor,
+                        self._INSERT,
+                        [self._to_row(forecast) for forecast in forecasts],
+                        page_size=1000
+                    )
+                    conn.commit()
+                    return True
+            except Exception as e:
+                conn.rollback()
+                print(f"Error saving route forecasts to PostgreSQL: {e}")
+                return False
+
+    def iter_forecasts(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        origin: Optional[str] = None,
+        destination: Optional[str] = None,
+        batch_size: int = 5000
+    ) -> Iterator[List[RouteForecast]]:
+
+        filters, params = _filters("%s", start, end, origin, destination, _utc)
+        where = f"WHERE {' AND '.join(filters)}" if filters else ""
+
+        with self._get_connection() as conn:
+            # Named cursor streams the rows instead of fetching the whole range at once
+            with conn.cursor(name=f"iter_forecasts_{uuid.uuid4().hex}") as cursor:
+                cursor.itersize = batch_size
+                cursor.execute(f"""
+                    SELECT {", ".join(_FIELDS)} FROM route_forecasts
+                    {where}
+                    ORDER BY observed_at, departure_at, origin, destination, route_index
+                """, params)
+
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield [_to_forecast(row) for row in rows]
+            conn.commit()
@@ -0,0 +1,242 @@
+import re
+from datetime import date, datetime, timezone
+from typing import List, Optional, Tuple
+
+from psycopg2 import sql
+
+from infrastructure.database.pool import PostgresConnectionPool
+
+
+def _month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def _add_months(day: date, months: int) -> date:
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class PartitionManager:
+    """ Creates and retires monthly range partitions of timestamp-partitioned tables
+
+    Partitions are named `<table>_yYYYYmMM` and cover one UTC calendar month. A
+    DEFAULT partition catches rows outside the pre-created range; `ensure_partitions`
+    moves them into their own monthly partitions, so retention covers them too.
+    """
+
+    def __init__(
+        self,
+        pool: PostgresConnectionPool,
+        months_ahead: int = 3,
+        archive_schema: str = "archive"
+    ):
+        self.pool = pool
+        self.months_ahead = months_ahead
+        self.archive_schema = archive_schema
+        self.tables: List[str] = []
+
+    def partition_name(self, table: str, month: date) -> str:
+        return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+    def register(self, table: str):
+        """ Track a partitioned table and create its partitions up to `months_ahead` """
+
+        if table not in self.tables:
+            self.tables.append(table)
+        self.ensure_partitions(table)
+
+    def is_partitioned(self, cursor, table: str) -> Optional[bool]:
+        """ True for a partitioned table, False for a plain one, None when it does not exist """
+
+        cursor.execute("""
+            SELECT c.relkind FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE c.relname = %s AND n.nspname = current_schema()
+        """, (table,))
+        row = cursor.fetchone()
+        return None if row is None else row[0] == "p"
+
+    def ensure_partitions(self, table: str, today: Optional[date] = None) -> List[str]:
+        """ Create the current month's partition and the next `months_ahead` ones
+
+        Rows that landed in the DEFAULT partition are first moved into partitions of
+        their own months, created on demand.
+        """
+
+        today = today or datetime.now(timezone.utc).date()
+        first = _month_start(today)
+
+        with self.pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    sql.SQL("CREATE TABLE IF NOT EXISTS {} PARTITION OF {} DEFAULT").format(
+                        sql.Identifier(f"{table}_default"), sql.Identifier(table)
+                    )
+                )
+
+                created = self._rehome_default(cursor, table)
+                existing = set(self._partition_names(cursor, table))
+
+                for offset in range(self.months_ahead + 1):
+                    start = _add_months(first, offset)
+                    name = self.partition_name(table, start)
+                    if name in existing:
+                        continue
+
+                    self._create_month(cursor, table, start)
+                    created.append(name)
+
+            conn.commit()
+
+        return created
+
+    def maintain(self):
+        """ Periodic job: keep future partitions available for every registered table """
+
+        for table in self.tables:
+            created = self.ensure_partitions(table)
+            if created:
+                print(f"✅ Created partitions {', '.join(created)}")
+
+    def list_partitions(self, table: str) -> List[Tuple[str, date]]:
+        """ Monthly partitions of `table` as (name, month start), oldest first """
+
+        with self.pool.connection() as conn:
+            with conn.cursor() as cursor:
+                return self._monthly_partitions(cursor, table)
+
+    def detach_before(self, table: str, cutoff: date, drop: bool = False) -> List[str]:
+        """ Detach partitions that end on or before `cutoff`
+
+        Detached partitions are moved to the archive schema, where they stay queryable
+        and can be dumped, or dropped when `drop` is set.
+        """
+
+        detached = []
+
+        with self.pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    sql.SQL("CREATE SCHEMA IF NOT EXISTS {}").format(
+                        sql.Identifier(self.archive_schema)
+                    )
+                )
+
+                for name, month in self._monthly_partitions(cursor, table):
+                    if _add_months(month, 1) > cutoff:
+                        continue
+
+                    cursor.execute(
+                        sql.SQL("ALTER TABLE {} DETACH PARTITION {}").format(
+                            sql.Identifier(table), sql.Identifier(name)
+                        )
+                    )
+                    if drop:
+                        cursor.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(name)))
+                    elif self._is_archived(cursor, name):
+                        # A month re-created for late DEFAULT rows joins its earlier archive
+                        cursor.execute(
+                            sql.SQL("INSERT INTO {} SELECT * FROM {}").format(
+                                sql.Identifier(self.archive_schema, name), sql.Identifier(name)
+                            )
+                        )
+                        cursor.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(name)))
+                    else:
+                        cursor.execute(
+                            sql.SQL("ALTER TABLE {} SET SCHEMA {}").format(
+                                sql.Identifier(name), sql.Identifier(self.archive_schema)
+                            )
+                        )
+                    detached.append(name)
+
+            conn.commit()
+
+        return detached
+
+    def _create_month(self, cursor, table: str, start: date):
+        cursor.execute(
+            sql.SQL(
+                "CREATE TABLE IF NOT EXISTS {} PARTITION OF {} "
+                "FOR VALUES FROM ({}) TO ({})"
+            ).format(
+                sql.Identifier(self.partition_name(table, start)),
+                sql.Identifier(table),
+                sql.Literal(f"{start.isoformat()} 00:00:00+00"),
+                sql.Literal(f"{_add_months(start, 1).isoformat()} 00:00:00+00")
+            )
+        )
+
+    def _rehome_default(self, cursor, table: str) -> List[str]:
+        """ Move DEFAULT partition rows into monthly partitions, creating them as needed
+
+        Postgres refuses a new partition while DEFAULT holds rows in its range, so each
+        month's rows are parked in a temporary table, the partition is created, and the
+        rows are inserted back through the parent. DEFAULT stays locked against inserts
+        for the duration of the transaction.
+        """
+
+        default = sql.Identifier(f"{table}_default")
+        cursor.execute(sql.SQL("LOCK TABLE {} IN EXCLUSIVE MODE").format(default))
+        cursor.execute(
+            sql.SQL(
+                "SELECT DISTINCT date_trunc('month', timestamp AT TIME ZONE 'UTC')::date FROM {}"
+            ).format(default)
+        )
+        months = sorted(row[0] for row in cursor.fetchall())
+
+        moved = []
+        for start in months:
+            end = _add_months(start, 1)
+            cursor.execute(
+                sql.SQL("CREATE TEMP TABLE rehomed_rows (LIKE {}) ON COMMIT DROP").format(
+                    sql.Identifier(table)
+                )
+            )
+            cursor.execute(
+                sql.SQL(
+                    "WITH moved AS ("
+                    "DELETE FROM {} WHERE timestamp >= {} AND timestamp < {} RETURNING *"
+                    ") INSERT INTO rehomed_rows SELECT * FROM moved"
+                ).format(
+                    default,
+                    sql.Literal(f"{start.isoformat()} 00:00:00+00"),
+                    sql.Literal(f"{end.isoformat()} 00:00:00+00")
+                )
+            )
+            self._create_month(cursor, table, start)
+            cursor.execute(
+                sql.SQL("INSERT INTO {} SELECT * FROM rehomed_rows").format(sql.Identifier(table))
+            )
+            cursor.execute("DROP TABLE rehomed_rows")
+            moved.append(self.partition_name(table, start))
+
+        if moved:
+            print(f"⚠️ Moved out-of-range rows of `{table}` into {', '.join(moved)}")
+        return moved
+
+    def _is_archived(self, cursor, name: str) -> bool:
+        cursor.execute("""
+            SELECT 1 FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE c.relname = %s AND n.nspname = %s
+        """, (name, self.archive_schema))
+        return cursor.fetchone() is not None
+
+    def _partition_names(self, cursor, table: str) -> List[str]:
+        cursor.execute("""
+            SELECT child.relname FROM pg_inherits i
+            JOIN pg_class parent ON parent.oid = i.inhparent
+            JOIN pg_class child ON child.oid = i.inhrelid
+            JOIN pg_namespace n ON n.oid = parent.relnamespace
+            WHERE parent.relname = %s AND n.nspname = current_schema()
+        """, (table,))
+        return [row[0] for row in cursor.fetchall()]
+
+    def _monthly_partitions(self, cursor, table: str) -> List[Tuple[str, date]]:
+        pattern = re.compile(rf"^{re.escape(table)}_y(\d{{4}})m(\d{{2}})$")
+        months = []
+        for name in self._partition_names(cursor, table):
+            match = pattern.match(name)
+            if match:
+                months.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+        return sorted(months, key=lambda item: item[1])
@@ -0,0 +1,204 @@
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Optional, Tuple
+
+import psycopg2
+from psycopg2 import extensions
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+class PostgresConnectionPool:
+    """ Thread-safe, bounded pool of PostgreSQL connections shared by repositories """
+
+    def __init__(
+        self,
+        db_config: dict,
+        min_size: int = 1,
+        max_size: int = 10,
+        max_lifetime: float = 1800.0,
+        max_idle: float = 300.0,
+        checkout_timeout: float = 30.0,
+        health_check_after: float = 30.0
+    ):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError("Invalid pool size: expected 0 <= min_size <= max_size and max_size >= 1")
+
+        self.db_config = db_config
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.checkout_timeout = checkout_timeout
+        self.health_check_after = health_check_after
+
+        # Idle connections as (connection, created_at, last_used_at)
+        self._idle: Deque[Tuple[extensions.connection, float, float]] = deque()
+        # Creation time of every connection owned by the pool, idle or checked out
+        self._created_at = {}
+        self._opening = 0
+        self._lock = threading.Condition(threading.Lock())
+        self._closed = False
+
+        for _ in range(min_size):
+            conn = self._open()
+            self._idle.append((conn, self._created_at[id(conn)], time.monotonic()))
+
+    @property
+    def size(self) -> int:
+        with self._lock:
+            return len(self._created_at) + self._opening
+
+    @property
+    def in_use(self) -> int:
+        with self._lock:
+            return len(self._created_at) + self._opening - len(self._idle)
+
+    def _open(self) -> extensions.connection:
+        conn = psycopg2.connect(**self.db_config)
+        self._created_at[id(conn)] = time.monotonic()
+        return conn
+
+    def _discard(self, conn: extensions.connection):
+        self._created_at.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.max_lifetime is not None and now - created_at >= self.max_lifetime
+
+    def _ping(self, conn: extensions.connection) -> bool:
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def getconn(self, timeout: Optional[float] = None) -> extensions.connection:
+        """ Checkout a connection, waiting up to `timeout` seconds when the pool is exhausted """
+
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            conn, last_used = None, None
+
+            with self._lock:
+                while True:
+                    if self._closed:
+                        raise PoolTimeoutError("Connection pool is closed")
+
+                    now = time.monotonic()
+
+                    # Reuse the most recently returned connection, recycling stale ones
+                    while self._idle:
+                        candidate, created_at, used_at = self._idle.pop()
+                        if (
+                            candidate.closed
+                            or self._is_expired(created_at, now)
+                            or now - used_at >= self.max_idle
+                        ):
+                            self._discard(candidate)
+                            continue
+                        conn, last_used = candidate, used_at
+                        break
+
+                    if conn is not None:
+                        break
+
+                    if len(self._created_at) + self._opening < self.max_size:
+                        # Reserve a slot and connect outside the lock
+                        self._opening += 1
+                        break
+
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        raise PoolTimeoutError(
+                            f"Timed out after {timeout}s waiting for a connection "
+                            f"({self.max_size} in use)"
+                        )
+                    self._lock.wait(remaining)
+
+            if conn is None:
+                try:
+                    new_conn = psycopg2.connect(**self.db_config)
+                except Exception:
+                    # Give the reserved slot back to the next waiter
+                    with self._lock:
+                        self._opening -= 1
+                        self._lock.notify()
+                    raise
+
+                # The reservation becomes a registered connection in one step, so a
+                # waiter never sees the slot free in between
+                with self._lock:
+                    self._opening -= 1
+                    self._created_at[id(new_conn)] = time.monotonic()
+                return new_conn
+
+            # Only ping connections that sat idle long enough to have been dropped
+            if time.monotonic() - last_used < self.health_check_after or self._ping(conn):
+                return conn
+
+            with self._lock:
+                self._discard(conn)
+                self._lock.notify()
+
+    def putconn(self, conn: extensions.connection, discard: bool = False):
+        """ Return a connection to the pool, resetting any open transaction """
+
+        with self._lock:
+            if id(conn) not in self._created_at:
+                return
+
+            created_at = self._created_at[id(conn)]
+            now = time.monotonic()
+
+            if not discard and not conn.closed:
+                try:
+                    if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                        conn.rollback()
+                except Exception:
+                    discard = True
+
+            if discard or conn.closed or self._closed or self._is_expired(created_at, now):
+                self._discard(conn)
+            else:
+                self._idle.append((conn, created_at, now))
+
+            self._lock.notify()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        conn = self.getconn(timeout)
+        try:
+            yield conn
+        except Exception:
+            broken = conn.closed != 0
+            if not broken:
+                try:
+                    conn.rollback()
+                except Exception:
+                    broken = True
+            self.putconn(conn, discard=broken)
+            raise
+        else:
+            self.putconn(conn)
+
+    def close(self):
+        """ Close idle connections; checked out ones are closed when returned """
+
+        with self._lock:
+            self._closed = True
+            while self._idle:
+                conn, _, _ = self._idle.pop()
+                self._discard(conn)
+            self._lock.notify_all()
@@ -1,252 +1,1052 @@
-import sqlite3
-import psycopg2
+import threading
+import uuid
 from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+import psycopg2
 from psycopg2 import sql
-from domains.entities import Route, WeatherConditions
-from domains.repositories import ITrafficRepository, IWeatherRepository
+from psycopg2.extras import execute_values
+from domains.entities import Route, RouteGeometry, RouteType, WeatherConditions
+from domains.repositories import (
+    ROUTE_RECORD_FIELDS, WEATHER_RECORD_FIELDS, ITrafficRepository, IWeatherRepository
+)
+from infrastructure.database.partitions import PartitionManager
+from infrastructure.database.pool import PostgresConnectionPool
+from infrastructure.database.sqlite_engine import SQLiteEngine
+from infrastructure.geometry import pack_polyline, unpack_coordinates
+from infrastructure.metrics import track_write
+
+
+def _pack_geometries(routes: List[Route]) -> Tuple[Dict[str, tuple], List[Optional[str]]]:
+    """ Distinct (hash, point_count, blob) geometries of a batch and each route's hash """
+
+    by_polyline: Dict[str, tuple] = {}
+    hashes = []
+
+    for route in routes:
+        if not route.encoded_polyline:
+            hashes.append(None)
+            continue
+
+        packed = by_polyline.get(route.encoded_polyline)
+        if packed is None:
+            packed = pack_polyline(route.encoded_polyline)
+            by_polyline[route.encoded_polyline] = packed
+        hashes.append(packed[0])
+
+    geometries = {packed[0]: packed for packed in by_polyline.values()}
+    return geometries, hashes
+
+
+def _pairs_by_geometry(rows: List[tuple]) -> Dict[str, List[Tuple[str, str]]]:
+    pairs: Dict[str, List[Tuple[str, str]]] = {}
+    for polyline_hash, origin, destination in rows:
+        pairs.setdefault(polyline_hash, []).append((origin, destination))
+    return pairs
+
+
+_SELECT_GEOMETRY_PAIRS = """
+    SELECT DISTINCT polyline_hash, origin, destination FROM routes
+    WHERE polyline_hash IS NOT NULL
+"""
+
+_SELECT_ROUTES = f"SELECT {', '.join(ROUTE_RECORD_FIELDS)} FROM routes"
+
+_SELECT_WEATHER = f"SELECT {', '.join(WEATHER_RECORD_FIELDS)} FROM weather_conditions"
+
+
+def _record_filters(
+    placeholder: str,
+    start: Optional[datetime],
+    end: Optional[datetime],
+    equals: Dict[str, Optional[str]],
+    iso_timestamps: bool
+) -> Tuple[List[str], list]:
+    """ WHERE clauses and parameters shared by the record iterators """
+
+    filters, params = [], []
+
+    for clause, value in (("timestamp >= ", start), ("timestamp < ", end)):
+        if value is not None:
+            filters.append(clause + placeholder)
+            params.append(value.astimezone(timezone.utc).isoformat() if iso_timestamps else value)
+
+    for column, value in equals.items():
+        if value is not None:
+            filters.append(f"{column} = {placeholder}")
+            params.append(value)
+
+    return filters, params
+
+
+def _iter_sqlite_records(
+    engine: SQLiteEngine,
+    select: str,
+    after_id: int,
+    filters: List[str],
+    params: list,
+    batch_size: int
+) -> Iterator[List[tuple]]:
+    """ Keyset pagination on id, one short read per chunk """
+
+    where = "".join(f" AND {f}" for f in filters)
+    last_id = after_id
+
+    while True:
+        rows = engine.query(
+            f"{select} WHERE id > ?{where} ORDER BY id LIMIT ?",
+            [last_id, *params, batch_size]
+        )
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        yield rows
+
+
+def _iter_postgres_records(
+    pool: PostgresConnectionPool,
+    select: str,
+    after_id: int,
+    filters: List[str],
+    params: list,
+    batch_size: int
+) -> Iterator[List[tuple]]:
+    """ Server-side (named) cursor so only `batch_size` rows are held client-side """
+
+    where = "".join(f" AND {f}" for f in filters)
+
+    with pool.connection() as conn:
+        with conn.cursor(name=f"iter_records_{uuid.uuid4().hex}") as cursor:
+            cursor.itersize = batch_size
+            cursor.execute(f"{select} WHERE id > %s{where} ORDER BY id", [after_id, *params])
+
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        conn.commit()
+
+
+def _iter_sqlite_records_by_time(
+    engine: SQLiteEngine,
+    select: str,
+    time_column: int,
+    filters: List[str],
+    params: list,
+    batch_size: int
+) -> Iterator[List[tuple]]:
+    """ Keyset pagination on (timestamp, id), served by the timestamp index """
+
+    where = "".join(f" AND {f}" for f in filters)
+    last = ("", 0)
+
+    while True:
+        rows = engine.query(
+            f"{select} WHERE (timestamp, id) > (?, ?){where} ORDER BY timestamp, id LIMIT ?",
+            [*last, *params, batch_size]
+        )
+        if not rows:
+            return
+        last = (rows[-1][time_column], rows[-1][0])
+        yield rows
+
+
+def _iter_postgres_records_by_time(
+    pool: PostgresConnectionPool,
+    select: str,
+    filters: List[str],
+    params: list,
+    batch_size: int
+) -> Iterator[List[tuple]]:
+    """ Server-side cursor in (timestamp, id) order """
+
+    where = f" WHERE {' AND '.join(filters)}" if filters else ""
+
+    with pool.connection() as conn:
+        with conn.cursor(name=f"iter_records_by_time_{uuid.uuid4().hex}") as cursor:
+            cursor.itersize = batch_size
+            cursor.execute(f"{select}{where} ORDER BY timestamp, id", params)
+
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        conn.commit()
+
+
+def _route_from_row(row: tuple) -> Route:
+    (
+        _, route_type, origin, destination, distance, duration, static,
+        polyline, polyline_hash, ts, variant_id
+    ) = row
+
+    if isinstance(ts, str):
+        ts = datetime.fromisoformat(ts)
+
+    return Route(
+        route_type=RouteType[route_type],
+        origin=origin,
+        destination=destination,
+        distance_meters=distance,
+        duration_seconds=duration,
+        static_duration_seconds=static,
+        encoded_polyline=polyline,
+        timestamp=ts,
+        polyline_hash=polyline_hash.strip() if polyline_hash else None,
+        variant_id=variant_id.strip() if variant_id else None
+    )
 
 
 # ---------- SQLite ----------
 class SQLiteTrafficRepository(ITrafficRepository):
-    def __init__(self, db_path: str = "traffic_data.db"):
-        self.db_path = db_path
-        self._create_table()
+    def __init__(self, engine: SQLiteEngine, create_schema: bool = True):
+        self.engine = engine
+        if create_schema:
+            self._create_table()
 
-    def _get_connection(self):
-        return sqlite3.connect(self.db_path)
-    
     def _create_table(self):
 
-         with self._get_connection() as conn: 
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS routes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    route_type TEXT NOT NULL,
-                    origin TEXT NOT NULL,
-                    destination TEXT NOT NULL,
-                    distance_meters REAL NOT NULL,
-                    duration_seconds REAL NOT NULL,
-                    static_duration_seconds REAL NOT NULL,
-                    polyline TEXT,
-                    timestamp TEXT NOT NULL        
-                )
-            """
-            )
-            conn.commit()
+        self.engine.execute_script("""
+            CREATE TABLE IF NOT EXISTS routes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                route_type TEXT NOT NULL,
+                origin TEXT NOT NULL,
+                destination TEXT NOT NULL,
+                distance_meters REAL NOT NULL,
+                duration_seconds REAL NOT NULL,
+                static_duration_seconds REAL NOT NULL,
+                polyline TEXT,
+                timestamp TEXT NOT NULL,
+                polyline_hash TEXT,
+                record_id TEXT,
+                variant_id TEXT
+            );
+
+            CREATE TABLE IF NOT EXISTS route_geometries (
+                hash TEXT PRIMARY KEY,
+                point_count INTEGER NOT NULL,
+                coords BLOB NOT NULL
+            ) WITHOUT ROWID;
+
+            CREATE INDEX IF NOT EXISTS idx_routes_od_type_timestamp
+                ON routes (origin, destination, route_type, timestamp);
+            CREATE INDEX IF NOT EXISTS idx_routes_timestamp
+                ON routes (timestamp);
+        """)
+
+        # Databases created before geometries were split out of `routes`
+        columns = [row[1] for row in self.engine.query("PRAGMA table_info(routes)")]
+        if "polyline_hash" not in columns:
+            self.engine.execute_script("ALTER TABLE routes ADD COLUMN polyline_hash TEXT;")
+        if "record_id" not in columns:
+            self.engine.execute_script("ALTER TABLE routes ADD COLUMN record_id TEXT;")
+        if "variant_id" not in columns:
+            self.engine.execute_script("ALTER TABLE routes ADD COLUMN variant_id TEXT;")
+
+        # Replayed rows carry the same record_id and are skipped on insert
+        self.engine.execute_script("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_routes_record_id ON routes (record_id);
+            CREATE INDEX IF NOT EXISTS idx_routes_od_variant_timestamp
+                ON routes (origin, destination, variant_id, timestamp);
+        """)
     
+    _INSERT_ROUTE = """
+        INSERT INTO routes (
+            route_type, origin, destination, distance_meters,
+            duration_seconds, static_duration_seconds,
+            polyline_hash, timestamp, record_id, variant_id
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (record_id) DO NOTHING
+    """
+
+    _INSERT_GEOMETRY = """
+        INSERT OR IGNORE INTO route_geometries (hash, point_count, coords)
+        VALUES (?, ?, ?)
+    """
+
+    @staticmethod
+    def _to_row(route: Route, polyline_hash: Optional[str]) -> tuple:
+        return (
+            route.route_type.name,
+            route.origin,
+            route.destination,
+            route.distance_meters,
+            route.duration_seconds,
+            route.static_duration_seconds,
+            polyline_hash,
+            route.timestamp.isoformat(),
+            route.record_id,
+            route.variant_id
+        )
+
     def save_route(self, route: Route) -> bool:
+        return self.save_routes([route])
 
-        with self._get_connection() as conn:
-            try:
-                conn.execute("""
-                    INSERT INTO routes (
-                        route_type, origin, destination, distance_meters,
-                        duration_seconds, static_duration_seconds,
-                        polyline, timestamp
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    route.route_type.name,
-                    route.origin,
-                    route.destination,
-                    route.distance_meters,
-                    route.duration_seconds,
-                    route.static_duration_seconds,
-                    route.encoded_polyline,
-                    route.timestamp.isoformat()
-                ))
-                conn.commit()
-                return True
-            except Exception as e:
-                print(f"Error saving route: {e}")
-            return False
+    @track_write("sqlite", "routes")
+    def save_routes(self, routes: List[Route]) -> bool:
+        """ Queue routes on the engine writer; `flush` commits them and raises if any failed """
+
+        if not routes:
+            return True
+
+        try:
+            geometries, hashes = _pack_geometries(routes)
+
+            # Queued in order, so geometries land in the same flush as their routes
+            self.engine.write(self._INSERT_GEOMETRY, list(geometries.values()), owner=self)
+            self.engine.write(
+                self._INSERT_ROUTE,
+                [self._to_row(route, h) for route, h in zip(routes, hashes)],
+                owner=self
+            )
+            return True
+        except Exception as e:
+            print(f"Error saving routes: {e}")
+        return False
+
+    def iter_route_records(
+        self,
+        after_id: int = 0,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        origin: Optional[str] = None,
+        destination: Optional[str] = None,
+        batch_size: int = 5000
+    ) -> Iterator[List[tuple]]:
+
+        filters, params = _record_filters(
+            "?", start, end, {"origin": origin, "destination": destination}, True
+        )
+        return _iter_sqlite_records(
+            self.engine, _SELECT_ROUTES, after_id, filters, params, batch_size
+        )
+
+    def iter_routes(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        origin: Optional[str] = None,
+        destination: Optional[str] = None,
+        batch_size: int = 5000
+    ) -> Iterator[List[Route]]:
+
+        for rows in self.iter_route_records(0, start, end, origin, destination, batch_size):
+            yield [_route_from_row(row) for row in rows]
+
+    def iter_route_records_by_time(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        batch_size: int = 5000
+    ) -> Iterator[List[tuple]]:
+
+        filters, params = _record_filters("?", start, end, {}, True)
+        return _iter_sqlite_records_by_time(
+            self.engine, _SELECT_ROUTES, ROUTE_RECORD_FIELDS.index("timestamp"),
+            filters, params, batch_size
+        )
+
+    def iter_route_geometries(self, batch_size: int = 1000) -> Iterator[List[RouteGeometry]]:
+        """ One scan for the pairs, then keyset pages over route_geometries """
+
+        pairs = _pairs_by_geometry(self.engine.query(_SELECT_GEOMETRY_PAIRS))
+        last_hash = ""
+
+        while True:
+            rows = self.engine.query(
+                "SELECT hash, coords FROM route_geometries WHERE hash > ? ORDER BY hash LIMIT ?",
+                (last_hash, batch_size)
+            )
+            if not rows:
+                return
+            last_hash = rows[-1][0]
+
+            geometries = [
+                RouteGeometry(polyline_hash, unpack_coordinates(blob), pairs[polyline_hash])
+                for polyline_hash, blob in rows if polyline_hash in pairs
+            ]
+            if geometries:
+                yield geometries
+
+    def flush(self):
+        self.engine.flush(owner=self)
+
+    def get_geometry(self, polyline_hash: str) -> Optional[np.ndarray]:
+        """ Decoded (n, 2) lat/lng array for a stored geometry """
+
+        rows = self.engine.query(
+            "SELECT coords FROM route_geometries WHERE hash = ?", (polyline_hash,)
+        )
+        return unpack_coordinates(rows[0][0]) if rows else None
+
+    def migrate_polylines(self, batch_size: int = 1000) -> int:
+        """ Move inline `polyline` text of existing rows into route_geometries """
+
+        migrated = 0
+
+        while True:
+            rows = self.engine.query("""
+                SELECT id, polyline FROM routes
+                WHERE polyline IS NOT NULL AND polyline_hash IS NULL
+                LIMIT ?
+            """, (batch_size,))
+            if not rows:
+                return migrated
+
+            geometries = {}
+            updates = []
+            for route_id, polyline in rows:
+                packed = pack_polyline(polyline)
+                geometries[packed[0]] = packed
+                updates.append((packed[0], route_id))
+
+            def apply(conn):
+                conn.execute("BEGIN")
+                try:
+                    conn.executemany(self._INSERT_GEOMETRY, list(geometries.values()))
+                    conn.executemany(
+                        "UPDATE routes SET polyline_hash = ?, polyline = NULL WHERE id = ?",
+                        updates
+                    )
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+
+            self.engine.run(apply)
+            migrated += len(updates)
         
 
 class SQLiteWeatherRepository(IWeatherRepository):
-    def __init__(self, db_path: str = "traffic_data.db"):
-        self.db_path = db_path
-        self._create_table()
+    def __init__(self, engine: SQLiteEngine, create_schema: bool = True):
+        self.engine = engine
+        if create_schema:
+            self._create_table()
 
-    def _get_connection(self):
-        return sqlite3.connect(self.db_path)
-    
     def _create_table(self):
 
-        with self._get_connection() as conn:
-            conn.execute("""
-            CREATE TABLE IF NOT EXISTS weather_conditions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                weather_type TEXT NOT NULL,
-                weather_description TEXT NOT NULL,
-                temperature REAL NOT NULL,
-                feels_like REAL NOT NULL,
-                pressure REAL NOT NULL,
-                visibility INTEGER NOT NULL,
-                wind_speed REAL NOT NULL,
-                humidity REAL NOT NULL,
-                timestamp TEXT NOT NULL,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-            """)
-            conn.commit()
+        self.engine.execute_script("""
+        CREATE TABLE IF NOT EXISTS weather_conditions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            weather_type TEXT NOT NULL,
+            weather_description TEXT NOT NULL,
+            temperature REAL NOT NULL,
+            feels_like REAL NOT NULL,
+            pressure REAL NOT NULL,
+            visibility INTEGER NOT NULL,
+            wind_speed REAL NOT NULL,
+            humidity REAL NOT NULL,
+            timestamp TEXT NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            location TEXT,
+            record_id TEXT
+        );
+        """)
+
+        # Databases created before `location` existed
+        columns = [row[1] for row in self.engine.query("PRAGMA table_info(weather_conditions)")]
+        if "location" not in columns:
+            self.engine.execute_script("ALTER TABLE weather_conditions ADD COLUMN location TEXT;")
+        if "record_id" not in columns:
+            self.engine.execute_script("ALTER TABLE weather_conditions ADD COLUMN record_id TEXT;")
+
+        self.engine.execute_script("""
+            CREATE INDEX IF NOT EXISTS idx_weather_timestamp
+                ON weather_conditions (timestamp);
+            CREATE INDEX IF NOT EXISTS idx_weather_location_timestamp
+                ON weather_conditions (location, timestamp);
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_weather_record_id
+                ON weather_conditions (record_id);
+        """)
+
+    _INSERT_WEATHER = """
+        INSERT INTO weather_conditions (
+            weather_type, weather_description,
+            temperature, feels_like,
+            pressure, visibility,
+            wind_speed, humidity,
+            timestamp, location, record_id
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (record_id) DO NOTHING
+    """
+
+    @staticmethod
+    def _to_row(weather: WeatherConditions) -> tuple:
+        return (
+            weather.weather_type,
+            weather.weather_description,
+            weather.temperature,
+            weather.feels_like,
+            weather.pressure,
+            weather.visibility,
+            weather.wind_speed,
+            weather.humidity,
+            weather.timestamp.isoformat(),
+            weather.location,
+            weather.record_id
+        )
 
     def save_weather(self, weather: WeatherConditions) -> bool:
-        with self._get_connection() as conn:
-            try:
-                conn.execute("""
-                INSERT INTO weather_conditions (
-                    weather_type, weather_description,
-                    temperature, feels_like,
-                    pressure, visibility,
-                    wind_speed, humidity,
-                    timestamp
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    weather.weather_type,
-                    weather.weather_description,
-                    weather.temperature,
-                    weather.feels_like,
-                    weather.pressure,
-                    weather.visibility,
-                    weather.wind_speed,
-                    weather.humidity,
-                    weather.timestamp.isoformat()
-                ))
-                conn.commit()
-                return True
-            except sqlite3.Error as e:
-                print(f"Error saving weather data: {e}")
-                return False
+        return self.save_weather_batch([weather])
+
+    @track_write("sqlite", "weather")
+    def save_weather_batch(self, weathers: List[WeatherConditions]) -> bool:
+        """ Queue observations on the engine writer; `flush` commits them and raises if any failed """
+
+        if not weathers:
+            return True
+
+        try:
+            self.engine.write(
+                self._INSERT_WEATHER,
+                [self._to_row(weather) for weather in weathers],
+                owner=self
+            )
+            return True
+        except Exception as e:
+            print(f"Error saving weather data: {e}")
+            return False
+
+    def iter_weather_records(
+        self,
+        after_id: int = 0,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        location: Optional[str] = None,
+        batch_size: int = 5000
+    ) -> Iterator[List[tuple]]:
+
+        filters, params = _record_filters(
+            "?", start, end, {"location": location}, True
+        )
+        return _iter_sqlite_records(
+            self.engine, _SELECT_WEATHER, after_id, filters, params, batch_size
+        )
+
+    def iter_weather_records_by_time(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        batch_size: int = 5000
+    ) -> Iterator[List[tuple]]:
+
+        filters, params = _record_filters("?", start, end, {}, True)
+        return _iter_sqlite_records_by_time(
+            self.engine, _SELECT_WEATHER, WEATHER_RECORD_FIELDS.index("timestamp"),
+            filters, params, batch_size
+        )
+
+    def flush(self):
+        self.engine.flush(owner=self)
 
 
 # ---------- Postgres ----------
+class _RejectedSaves:
+    """ The last error a thread's save swallowed, raised by that thread's next `flush` """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def record(self, error: Exception):
+        self._local.error = error
+
+    def raise_pending(self):
+        error, self._local.error = getattr(self._local, "error", None), None
+        if error is not None:
+            raise error
+
+
 class PostgresTrafficRepository(ITrafficRepository):
-    def __init__(self, db_config: dict):
-        self.db_config = db_config
-        self._create_table()
+    """ Routes stored in a plain table, or in monthly partitions when `partitions` is given
+
+    `create_schema=False` skips the DDL, for callers that know the tables are current.
+    """
+
+    def __init__(
+        self,
+        pool: PostgresConnectionPool,
+        partitions: Optional[PartitionManager] = None,
+        create_schema: bool = True
+    ):
+        self.pool = pool
+        self.partitions = partitions
+        self._rejected = _RejectedSaves()
+        if create_schema:
+            self._create_table()
 
     def _get_connection(self):
-        return psycopg2.connect(**self.db_config)
+        return self.pool.connection()
     
     def _create_table(self):
 
         with self._get_connection() as conn:
             with conn.cursor() as cursor: 
                 
+                if self.partitions is None:
+                    cursor.execute(f"""
+                        CREATE TABLE IF NOT EXISTS routes (
+                            id SERIAL PRIMARY KEY,
+                            {self._COLUMNS}
+                        )
+                    """)
+
+                    # Time-ordered reads (weather as-of joins) walk this index
+                    cursor.execute("""
+                        CREATE INDEX IF NOT EXISTS idx_routes_timestamp
+                            ON routes (timestamp)
+                    """)
+                else:
+                    if self.partitions.is_partitioned(cursor, "routes") is False:
+                        raise RuntimeError(
+                            "Table `routes` already exists as a plain table; "
+                            "migrate it before enabling the partitioned schema"
+                        )
+
+                    cursor.execute(f"""
+                        CREATE TABLE IF NOT EXISTS routes (
+                            id BIGSERIAL,
+                            {self._COLUMNS},
+                            PRIMARY KEY (id, timestamp)
+                        ) PARTITION BY RANGE (timestamp)
+                    """)
+                    cursor.execute("""
+                        CREATE INDEX IF NOT EXISTS idx_routes_timestamp_brin
+                            ON routes USING BRIN (timestamp)
+                    """)
+                    cursor.execute("""
+                        CREATE INDEX IF NOT EXISTS idx_routes_od_type_timestamp
+                            ON routes (origin, destination, route_type, timestamp)
+                    """)
+
+                # Tables created before geometries were split out of `routes`
                 cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS routes (
-                        id SERIAL PRIMARY KEY,
-                        route_type VARCHAR(20) NOT NULL,
-                        origin VARCHAR(255) NOT NULL,
-                        destination VARCHAR(255) NOT NULL,
-                        distance_meters DOUBLE PRECISION NOT NULL,
-                        duration_seconds DOUBLE PRECISION NOT NULL,
-                        static_duration_seconds DOUBLE PRECISION NOT NULL,
-                        polyline TEXT,
-                        timestamp TIMESTAMP WITH TIME ZONE NOT NULL,
-                        created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+                    ALTER TABLE routes ADD COLUMN IF NOT EXISTS polyline_hash CHAR(32)
+                """)
+
+                # Replayed rows carry the same record_id and are skipped on insert
+                cursor.execute("""
+                    ALTER TABLE routes ADD COLUMN IF NOT EXISTS record_id UUID
+                """)
+                cursor.execute("""
+                    CREATE UNIQUE INDEX IF NOT EXISTS idx_routes_record_id
+                        ON routes (record_id, timestamp)
+                """)
+
+                # Variant labels, added after route variants were introduced
+                cursor.execute("""
+                    ALTER TABLE routes ADD COLUMN IF NOT EXISTS variant_id CHAR(32)
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_routes_od_variant_timestamp
+                        ON routes (origin, destination, variant_id, timestamp)
+                """)
+
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS route_geometries (
+                        hash CHAR(32) PRIMARY KEY,
+                        point_count INTEGER NOT NULL,
+                        coords BYTEA NOT NULL
                     )
-                """
-                )
+                """)
 
                 conn.commit()
+
+        if self.partitions is not None:
+            self.partitions.register("routes")
+
+    _COLUMNS = """
+        route_type VARCHAR(20) NOT NULL,
+        origin VARCHAR(255) NOT NULL,
+        destination VARCHAR(255) NOT NULL,
+        distance_meters DOUBLE PRECISION NOT NULL,
+        duration_seconds DOUBLE PRECISION NOT NULL,
+        static_duration_seconds DOUBLE PRECISION NOT NULL,
+        polyline TEXT,
+        timestamp TIMESTAMP WITH TIME ZONE NOT NULL,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+        polyline_hash CHAR(32),
+        record_id UUID,
+        variant_id CHAR(32)
+    """
     
-    def save_route(self, route: Route) -> bool:
+    _INSERT_ROUTES = """
+        INSERT INTO routes (
+            route_type, origin, destination, distance_meters,
+            duration_seconds, static_duration_seconds,
+            polyline_hash, timestamp, record_id, variant_id
+        ) VALUES %s
+        ON CONFLICT (record_id, timestamp) DO NOTHING
+    """
 
-        
+    _INSERT_GEOMETRIES = """
+        INSERT INTO route_geometries (hash, point_count, coords)
+        VALUES %s
+        ON CONFLICT (hash) DO NOTHING
+    """
+
+    @staticmethod
+    def _to_row(route: Route, polyline_hash: Optional[str]) -> tuple:
         utc_time = route.timestamp.astimezone(timezone.utc)
+        return (
+            route.route_type.name,
+            route.origin,
+            route.destination,
+            route.distance_meters,
+            route.duration_seconds,
+            route.static_duration_seconds,
+            polyline_hash,
+            utc_time.isoformat(),
+            route.record_id,
+            route.variant_id
+        )
+
+    @staticmethod
+    def _to_geometry_row(packed: tuple) -> tuple:
+        polyline_hash, point_count, blob = packed
+        return (polyline_hash, point_count, psycopg2.Binary(blob))
+
+    def save_route(self, route: Route) -> bool:
+        return self.save_routes([route])
+
+    @track_write("postgres", "routes")
+    def save_routes(self, routes: List[Route]) -> bool:
+        """ Insert all routes as multi-row VALUES statements in one transaction """
+
+        if not routes:
+            return True
+
+        geometries, hashes = _pack_geometries(routes)
 
         with self._get_connection() as conn:
             try:
                 with conn.cursor() as cursor:
-                    cursor.execute("""
-                        INSERT INTO routes (
-                            route_type, origin, destination, distance_meters,
-                            duration_seconds, static_duration_seconds,
-                            polyline, timestamp
-                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                    """, (
-                        route.route_type.name,
-                        route.origin,
-                        route.destination,
-                        route.distance_meters,
-                        route.duration_seconds,
-                        route.static_duration_seconds,
-                        route.encoded_polyline,
-                        utc_time.isoformat()
-                    ))
+                    if geometries:
+                        execute_values(
+                            cursor,
+                            self._INSERT_GEOMETRIES,
+                            [self._to_geometry_row(packed) for packed in geometries.values()],
+                            page_size=500
+                        )
+                    execute_values(
+                        cursor,
+                        self._INSERT_ROUTES,
+                        [self._to_row(route, h) for route, h in zip(routes, hashes)],
+                        page_size=500
+                    )
                     conn.commit()
                     return True
                 
             except Exception as e:
                 conn.rollback()
-                print(f"Error saving route to PostgreSQL: {e}")
+                self._rejected.record(e)
+                print(f"Error saving routes to PostgreSQL: {e}")
                 return False
             
             return False
+
+    def flush(self):
+        """ Saves commit synchronously; raises the error of this thread's last failed save """
+
+        self._rejected.raise_pending()
+
+    def iter_route_records(
+        self,
+        after_id: int = 0,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        origin: Optional[str] = None,
+        destination: Optional[str] = None,
+        batch_size: int = 5000
+    ) -> Iterator[List[tuple]]:
+
+        filters, params = _record_filters(
+            "%s", start, end, {"origin": origin, "destination": destination}, False
+        )
+        return _iter_postgres_records(
+            self.pool, _SELECT_ROUTES, after_id, filters, params, batch_size
+        )
+
+    def iter_routes(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        origin: Optional[str] = None,
+        destination: Optional[str] = None,
+        batch_size: int = 5000
+    ) -> Iterator[List[Route]]:
+
+        for rows in self.iter_route_records(0, start, end, origin, destination, batch_size):
+            yield [_route_from_row(row) for row in rows]
+
+    def iter_route_records_by_time(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        batch_size: int = 5000
+    ) -> Iterator[List[tuple]]:
+
+        filters, params = _record_filters("%s", start, end, {}, False)
+        return _iter_postgres_records_by_time(
+            self.pool, _SELECT_ROUTES, filters, params, batch_size
+        )
+
+    def iter_route_geometries(self, batch_size: int = 1000) -> Iterator[List[RouteGeometry]]:
+        """ One scan for the pairs, then a named cursor over route_geometries """
+
+        with self._get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(_SELECT_GEOMETRY_PAIRS)
+                pairs = _pairs_by_geometry(cursor.fetchall())
+
+            with conn.cursor(name=f"iter_geometries_{uuid.uuid4().hex}") as cursor:
+                cursor.itersize = batch_size
+                cursor.execute("SELECT hash, coords FROM route_geometries ORDER BY hash")
+
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+
+                    geometries = [
+                        RouteGeometry(polyline_hash, unpack_coordinates(bytes(blob)), pairs[polyline_hash])
+                        for polyline_hash, blob in rows if polyline_hash in pairs
+                    ]
+                    if geometries:
+                        yield geometries
+            conn.commit()
+
+    def get_geometry(self, polyline_hash: str) -> Optional[np.ndarray]:
+        """ Decoded (n, 2) lat/lng array for a stored geometry """
+
+        with self._get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    "SELECT coords FROM route_geometries WHERE hash = %s", (polyline_hash,)
+                )
+                row = cursor.fetchone()
+        return unpack_coordinates(bytes(row[0])) if row else None
+
+    def migrate_polylines(self, batch_size: int = 1000) -> int:
+        """ Move inline `polyline` text of existing rows into route_geometries """
+
+        migrated = 0
+
+        while True:
+            with self._get_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("""
+                        SELECT id, polyline FROM routes
+                        WHERE polyline IS NOT NULL AND polyline_hash IS NULL
+                        LIMIT %s
+                        FOR UPDATE SKIP LOCKED
+                    """, (batch_size,))
+                    rows = cursor.fetchall()
+                    if not rows:
+                        conn.commit()
+                        return migrated
+
+                    geometries = {}
+                    updates = []
+                    for route_id, polyline in rows:
+                        packed = pack_polyline(polyline)
+                        geometries[packed[0]] = packed
+                        updates.append((route_id, packed[0]))
+
+                    execute_values(
+                        cursor,
+                        self._INSERT_GEOMETRIES,
+                        [self._to_geometry_row(packed) for packed in geometries.values()]
+                    )
+                    execute_values(cursor, """
+                        UPDATE routes AS r
+                        SET polyline_hash = v.hash, polyline = NULL
+                        FROM (VALUES %s) AS v(id, hash)
+                        WHERE r.id = v.id
+                    """, updates)
+                conn.commit()
+
+            migrated += len(updates)
         
 class PostgresWeatherRepository(IWeatherRepository):
-    def __init__(self, db_config: dict):
+    """ Weather stored in a plain table, or in monthly partitions when `partitions` is given
 
-        self.db_config = db_config
-        self._create_table()
+    `create_schema=False` skips the DDL, for callers that know the tables are current.
+    """
+
+    def __init__(
+        self,
+        pool: PostgresConnectionPool,
+        partitions: Optional[PartitionManager] = None,
+        create_schema: bool = True
+    ):
+
+        self.pool = pool
+        self.partitions = partitions
+        self._rejected = _RejectedSaves()
+        if create_schema:
+            self._create_table()
         
 
     def _get_connection(self):
-        return psycopg2.connect(**self.db_config)
+        return self.pool.connection()
     
     def _create_table(self):
 
         with self._get_connection() as conn:
             with conn.cursor() as cursor:
+                if self.partitions is None:
+                    cursor.execute(f"""
+                        CREATE TABLE IF NOT EXISTS weather_conditions (
+                            id SERIAL PRIMARY KEY,
+                            {self._COLUMNS}
+                        )
+                    """)
+                    cursor.execute("""
+                        CREATE INDEX IF NOT EXISTS idx_weather_timestamp
+                            ON weather_conditions (timestamp)
+                    """)
+                else:
+                    if self.partitions.is_partitioned(cursor, "weather_conditions") is False:
+                        raise RuntimeError(
+                            "Table `weather_conditions` already exists as a plain table; "
+                            "migrate it before enabling the partitioned schema"
+                        )
+
+                    cursor.execute(f"""
+                        CREATE TABLE IF NOT EXISTS weather_conditions (
+                            id BIGSERIAL,
+                            {self._COLUMNS},
+                            PRIMARY KEY (id, timestamp)
+                        ) PARTITION BY RANGE (timestamp)
+                    """)
+                    cursor.execute("""
+                        CREATE INDEX IF NOT EXISTS idx_weather_timestamp_brin
+                            ON weather_conditions USING BRIN (timestamp)
+                    """)
+                    cursor.execute("""
+                        CREATE INDEX IF NOT EXISTS idx_weather_location_timestamp
+                            ON weather_conditions (location, timestamp)
+                    """)
+
+                # Replayed rows carry the same record_id and are skipped on insert
                 cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS weather_conditions (
-                        id SERIAL PRIMARY KEY,
-                        weather_type VARCHAR(50) NOT NULL,
-                        weather_description VARCHAR(100) NOT NULL,
-                        temperature DECIMAL(5,2) NOT NULL,
-                        feels_like DECIMAL(5,2) NOT NULL,
-                        pressure INTEGER NOT NULL,
-                        visibility INTEGER NOT NULL,
-                        wind_speed DECIMAL(5,2) NOT NULL,
-                        humidity DECIMAL(5,2) NOT NULL,
-                        timestamp TIMESTAMP WITH TIME ZONE NOT NULL,
-                        created_at TIMESTAMP WITH TIME ZONE 
-                            DEFAULT CURRENT_TIMESTAMP,
-                        location VARCHAR(100)  -- Nuevo campo para ubicación
-                    )
+                    ALTER TABLE weather_conditions ADD COLUMN IF NOT EXISTS record_id UUID
+                """)
+                cursor.execute("""
+                    CREATE UNIQUE INDEX IF NOT EXISTS idx_weather_record_id
+                        ON weather_conditions (record_id, timestamp)
                 """)
                 conn.commit()
+
+        if self.partitions is not None:
+            self.partitions.register("weather_conditions")
+
+    _COLUMNS = """
+        weather_type VARCHAR(50) NOT NULL,
+        weather_description VARCHAR(100) NOT NULL,
+        temperature DECIMAL(5,2) NOT NULL,
+        feels_like DECIMAL(5,2) NOT NULL,
+        pressure INTEGER NOT NULL,
+        visibility INTEGER NOT NULL,
+        wind_speed DECIMAL(5,2) NOT NULL,
+        humidity DECIMAL(5,2) NOT NULL,
+        timestamp TIMESTAMP WITH TIME ZONE NOT NULL,
+        created_at TIMESTAMP WITH TIME ZONE 
+            DEFAULT CURRENT_TIMESTAMP,
+        location VARCHAR(100),  -- Nuevo campo para ubicación
+        record_id UUID
+    """
     
-    def save_weather(self, weather: WeatherConditions, location: str = None) -> bool:
+    _INSERT_WEATHER = """
+        INSERT INTO weather_conditions (
+            weather_type, weather_description,
+            temperature, feels_like,
+            pressure, visibility,
+            wind_speed, humidity,
+            timestamp, location, record_id
+        ) VALUES %s
+        ON CONFLICT (record_id, timestamp) DO NOTHING
+    """
 
+    @staticmethod
+    def _to_row(weather: WeatherConditions, location: str = None) -> tuple:
         utc_time = weather.timestamp.astimezone(timezone.utc)
+        return (
+            weather.weather_type,
+            weather.weather_description,
+            weather.temperature,
+            weather.feels_like,
+            weather.pressure,
+            weather.visibility,
+            weather.wind_speed,
+            weather.humidity,
+            utc_time.isoformat(),
+            location or weather.location,
+            weather.record_id
+        )
+
+    def save_weather(self, weather: WeatherConditions, location: str = None) -> bool:
+        return self.save_weather_batch([weather], location)
+
+    @track_write("postgres", "weather")
+    def save_weather_batch(
+        self,
+        weathers: List[WeatherConditions],
+        location: str = None
+    ) -> bool:
+        """ Insert all observations as multi-row VALUES statements in one transaction """
+
+        if not weathers:
+            return True
 
         with self._get_connection() as conn:
             try:
                 with conn.cursor() as cursor:
-                    cursor.execute("""
-                        INSERT INTO weather_conditions (
-                            weather_type, weather_description,
-                            temperature, feels_like,
-                            pressure, visibility,
-                            wind_speed, humidity,
-                            timestamp, location
-                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    """, (
-                        weather.weather_type,
-                        weather.weather_description,
-                        weather.temperature,
-                        weather.feels_like,
-                        weather.pressure,
-                        weather.visibility,
-                        weather.wind_speed,
-                        weather.humidity,
-                        utc_time.isoformat(),
-                        location
-                    ))
+                    execute_values(
+                        cursor,
+                        self._INSERT_WEATHER,
+                        [self._to_row(weather, location) for weather in weathers],
+                        page_size=500
+                    )
                     conn.commit()
                     return True
             except Exception as e:
                 conn.rollback()
+                self._rejected.record(e)
                 print(f"Error saving weather data: {e}")
-                return False
\ No newline at end of file
+                return False
+
+    def flush(self):
+        """ Saves commit synchronously; raises the error of this thread's last failed save """
+
+        self._rejected.raise_pending()
+
+    def iter_weather_records(
+        self,
+        after_id: int = 0,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        location: Optional[str] = None,
+        batch_size: int = 5000
+    ) -> Iterator[List[tuple]]:
+
+        filters, params = _record_filters(
+            "%s", start, end, {"location": location}, False
+        )
+        return _iter_postgres_records(
+            self.pool, _SELECT_WEATHER, after_id, filters, params, batch_size
+        )
+
+    def iter_weather_records_by_time(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        batch_size: int = 5000
+    ) -> Iterator[List[tuple]]:
+
+        filters, params = _record_filters("%s", start, end, {}, False)
+        return _iter_postgres_records_by_time(
+            self.pool, _SELECT_WEATHER, filters, params, batch_size
+        )
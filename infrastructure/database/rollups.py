@@ -0,0 +1,205 @@
+from typing import Dict
+
+import numpy as np
+from psycopg2.extras import execute_values
+
+from domains.congestion import CongestionStats, QuantileSketch
+from domains.repositories import ICongestionRollupRepository, RollupKey
+from infrastructure.database.pool import PostgresConnectionPool
+from infrastructure.database.sqlite_engine import SQLiteEngine
+
+
+# ---------- SQLite ----------
+class SQLiteCongestionRollupRepository(ICongestionRollupRepository):
+    def __init__(self, engine: SQLiteEngine, create_schema: bool = True):
+        self.engine = engine
+        if create_schema:
+            self._create_table()
+
+    def _create_table(self):
+
+        self.engine.execute_script("""
+            CREATE TABLE IF NOT EXISTS congestion_rollups (
+                granularity TEXT NOT NULL,
+                origin TEXT NOT NULL,
+                destination TEXT NOT NULL,
+                route_type TEXT NOT NULL,
+                slot INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                total REAL NOT NULL,
+                total_sq REAL NOT NULL,
+                sketch BLOB NOT NULL,
+                PRIMARY KEY (granularity, origin, destination, route_type, slot)
+            ) WITHOUT ROWID;
+        """)
+
+    def merge_stats(self, granularity: str, stats: Dict[RollupKey, CongestionStats]) -> bool:
+        """ Add `stats` to the stored rollups on the writer thread, which serialises merges """
+
+        if not stats:
+            return True
+
+        def apply(conn):
+            conn.execute("BEGIN")
+            try:
+                for (origin, destination, route_type, slot), delta in stats.items():
+                    row = conn.execute("""
+                        SELECT count, total, total_sq, sketch FROM congestion_rollups
+                        WHERE granularity = ? AND origin = ? AND destination = ?
+                            AND route_type = ? AND slot = ?
+                    """, (granularity, origin, destination, route_type, slot)).fetchone()
+
+                    merged = CongestionStats()
+                    merged.merge(delta)
+                    if row is not None:
+                        merged.merge(CongestionStats(
+                            row[0], row[1], row[2], QuantileSketch.from_bytes(row[3])
+                        ))
+
+                    conn.execute("""
+                        INSERT OR REPLACE INTO congestion_rollups (
+                            granularity, origin, destination, route_type, slot,
+                            count, total, total_sq, sketch
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, (
+                        granularity, origin, destination, route_type, slot,
+                        merged.count, merged.total, merged.total_sq,
+                        merged.sketch.to_bytes()
+                    ))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        try:
+            self.engine.run(apply)
+            return True
+        except Exception as e:
+            print(f"Error saving congestion rollups: {e}")
+            return False
+
+    def get_stats(
+        self,
+        granularity: str,
+        origin: str,
+        destination: str,
+        route_type: str
+    ) -> Dict[int, CongestionStats]:
+
+        rows = self.engine.query("""
+            SELECT slot, count, total, total_sq, sketch FROM congestion_rollups
+            WHERE granularity = ? AND origin = ? AND destination = ? AND route_type = ?
+        """, (granularity, origin, destination, route_type))
+
+        return {
+            slot: CongestionStats(count, total, total_sq, QuantileSketch.from_bytes(sketch))
+            for slot, count, total, total_sq, sketch in rows
+        }
+
+    def clear(self):
+        self.engine.execute_script("DELETE FROM congestion_rollups;")
+
+
+# ---------- Postgres ----------
+class PostgresCongestionRollupRepository(ICongestionRollupRepository):
+    def __init__(self, pool: PostgresConnectionPool, create_schema: bool = True):
+        self.pool = pool
+        if create_schema:
+            self._create_table()
+
+    def _get_connection(self):
+        return self.pool.connection()
+
+    def _create_table(self):
+
+        with self._get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS congestion_rollups (
+                        granularity VARCHAR(32) NOT NULL,
+                        origin VARCHAR(255) NOT NULL,
+                        destination VARCHAR(255) NOT NULL,
+                        route_type VARCHAR(20) NOT NULL,
+                        slot SMALLINT NOT NULL,
+                        count BIGINT NOT NULL,
+                        total DOUBLE PRECISION NOT NULL,
+                        total_sq DOUBLE PRECISION NOT NULL,
+                        sketch INTEGER[] NOT NULL,
+                        PRIMARY KEY (granularity, origin, destination, route_type, slot)
+                    )
+                """)
+                conn.commit()
+
+    def merge_stats(self, granularity: str, stats: Dict[RollupKey, CongestionStats]) -> bool:
+        """ Additive upsert: counters and sketch buckets are summed inside Postgres,
+        so concurrent writers never overwrite each other
+        """
+
+        if not stats:
+            return True
+
+        rows = [
+            (
+                granularity, origin, destination, route_type, slot,
+                delta.count, delta.total, delta.total_sq,
+                delta.sketch.counts.tolist()
+            )
+            for (origin, destination, route_type, slot), delta in stats.items()
+        ]
+
+        with self._get_connection() as conn:
+            try:
+                with conn.cursor() as cursor:
+                    execute_values(cursor, """
+                        INSERT INTO congestion_rollups AS r (
+                            granularity, origin, destination, route_type, slot,
+                            count, total, total_sq, sketch
+                        ) VALUES %s
+                        ON CONFLICT (granularity, origin, destination, route_type, slot)
+                        DO UPDATE SET
+                            count = r.count + EXCLUDED.count,
+                            total = r.total + EXCLUDED.total,
+                            total_sq = r.total_sq + EXCLUDED.total_sq,
+                            sketch = ARRAY(
+                                SELECT a + b
+                                FROM unnest(r.sketch, EXCLUDED.sketch) WITH ORDINALITY AS t(a, b, i)
+                                ORDER BY i
+                            )
+                    """, rows, template="(%s, %s, %s, %s, %s, %s, %s, %s, %s::integer[])")
+                    conn.commit()
+                    return True
+            except Exception as e:
+                conn.rollback()
+                print(f"Error saving congestion rollups: {e}")
+                return False
+
+    def get_stats(
+        self,
+        granularity: str,
+        origin: str,
+        destination: str,
+        route_type: str
+    ) -> Dict[int, CongestionStats]:
+
+        with self._get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT slot, count, total, total_sq, sketch FROM congestion_rollups
+                    WHERE granularity = %s AND origin = %s AND destination = %s
+                        AND route_type = %s
+                """, (granularity, origin, destination, route_type))
+                rows = cursor.fetchall()
+
+        return {
+            slot: CongestionStats(
+                count, total, total_sq,
+                QuantileSketch(np.asarray(sketch, dtype=np.int64))
+            )
+            for slot, count, total, total_sq, sketch in rows
+        }
+
+    def clear(self):
+        with self._get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("TRUNCATE congestion_rollups")
+            conn.commit()
@@ -0,0 +1,238 @@
+import hashlib
+import json
+import uuid
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+from psycopg2.extras import Json
+
+from domains.entities import RouteMatrix
+from domains.repositories import IRouteMatrixRepository
+from infrastructure.database.pool import PostgresConnectionPool
+from infrastructure.database.sqlite_engine import SQLiteEngine
+from infrastructure.metrics import track_write
+
+
+# Snapshots store (duration, static duration, distance) x origins x destinations as
+# little-endian int32, with -1 where no route was returned
+_MISSING = -1
+
+
+def zone_set_hash(origins: List[str], destinations: List[str]) -> str:
+    """ Content hash identifying the ordered origin and destination lists """
+
+    payload = json.dumps([origins, destinations], separators=(",", ":")).encode("utf-8")
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def pack_matrix(matrix: RouteMatrix) -> bytes:
+    stacked = np.stack([
+        matrix.duration_seconds, matrix.static_duration_seconds, matrix.distance_meters
+    ])
+    packed = np.where(np.isnan(stacked), _MISSING, np.rint(stacked))
+    return packed.astype("<i4").tobytes()
+
+
+def unpack_matrix(
+    origins: List[str],
+    destinations: List[str],
+    blob: bytes,
+    timestamp: datetime
+) -> RouteMatrix:
+    values = np.frombuffer(blob, dtype="<i4").reshape(3, len(origins), len(destinations))
+    values = np.where(values == _MISSING, np.nan, values.astype(np.float64))
+
+    return RouteMatrix(
+        origins=origins,
+        destinations=destinations,
+        duration_seconds=values[0],
+        static_duration_seconds=values[1],
+        distance_meters=values[2],
+        timestamp=timestamp
+    )
+
+
+def _utc(value: datetime) -> datetime:
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+# ---------- SQLite ----------
+class SQLiteRouteMatrixRepository(IRouteMatrixRepository):
+    def __init__(self, engine: SQLiteEngine):
+        self.engine = engine
+        self._create_table()
+
+    def _create_table(self):
+
+        # Zone lists are stored once and referenced by hash from every snapshot
+        self.engine.execute_script("""
+            CREATE TABLE IF NOT EXISTS route_matrix_zones (
+                zone_set TEXT PRIMARY KEY,
+                origins TEXT NOT NULL,
+                destinations TEXT NOT NULL
+            ) WITHOUT ROWID;
+
+            CREATE TABLE IF NOT EXISTS route_matrix_snapshots (
+                zone_set TEXT NOT NULL,
+                snapshot_at TEXT NOT NULL,
+                elements BLOB NOT NULL,
+                PRIMARY KEY (zone_set, snapshot_at)
+            ) WITHOUT ROWID;
+
+            CREATE INDEX IF NOT EXISTS idx_route_matrix_snapshot_at
+                ON route_matrix_snapshots (snapshot_at);
+        """)
+
+    @track_write("sqlite", "route_matrix_snapshots", count=lambda matrix: 1)
+    def save_matrix(self, matrix: RouteMatrix) -> bool:
+        zone_set = zone_set_hash(matrix.origins, matrix.destinations)
+
+        try:
+            # One snapshot per cycle: wait for the writer to commit it rather than
+            # reporting success once queued
+            writes = [
+                self.engine.write(
+                    "INSERT OR IGNORE INTO route_matrix_zones (zone_set, origins, destinations) VALUES (?, ?, ?)",
+                    [(zone_set, json.dumps(matrix.origins), json.dumps(matrix.destinations))]
+                ),
+                self.engine.write(
+                    "INSERT OR IGNORE INTO route_matrix_snapshots (zone_set, snapshot_at, elements) VALUES (?, ?, ?)",
+                    [(zone_set, matrix.timestamp.isoformat(), pack_matrix(matrix))]
+                )
+            ]
+            for write in writes:
+                write.result()
+            return True
+        except Exception as e:
+            print(f"Error saving route matrix: {e}")
+            return False
+
+    def iter_matrices(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> Iterator[RouteMatrix]:
+
+        filters, params = [], []
+        if start is not None:
+            filters.append("s.snapshot_at >= ?")
+            params.append(_utc(start).isoformat())
+        if end is not None:
+            filters.append("s.snapshot_at < ?")
+            params.append(_utc(end).isoformat())
+
+        # Keyset pagination so only a page of snapshot blobs is held at a time
+        filters.append("(s.snapshot_at, s.zone_set) > (?, ?)")
+        where = " AND ".join(filters)
+        last: Tuple[str, str] = ("", "")
+
+        while True:
+            rows = self.engine.query(f"""
+                SELECT s.snapshot_at, s.zone_set, z.origins, z.destinations, s.elements
+                FROM route_matrix_snapshots s
+                JOIN route_matrix_zones z ON z.zone_set = s.zone_set
+                WHERE {where}
+                ORDER BY s.snapshot_at, s.zone_set
+                LIMIT 100
+            """, params + list(last))
+
+            for snapshot_at, _, origins, destinations, blob in rows:
+                yield unpack_matrix(
+                    json.loads(origins), json.loads(destinations), blob,
+                    datetime.fromisoformat(snapshot_at)
+                )
+
+            if len(rows) < 100:
+                return
+            last = (rows[-1][0], rows[-1][1])
+
+
+# ---------- Postgres ----------
+class PostgresRouteMatrixRepository(IRouteMatrixRepository):
+    def __init__(self, pool: PostgresConnectionPool):
+        self.pool = pool
+        self._create_table()
+
+    def _get_connection(self):
+        return self.pool.connection()
+
+    def _create_table(self):
+
+        with self._get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS route_matrix_zones (
+                        zone_set CHAR(32) PRIMARY KEY,
+                        origins JSONB NOT NULL,
+                        destinations JSONB NOT NULL
+                    )
+                """)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS route_matrix_snapshots (
+                        zone_set CHAR(32) NOT NULL REFERENCES route_matrix_zones (zone_set),
+                        snapshot_at TIMESTAMP WITH TIME ZONE NOT NULL,
+                        elements BYTEA NOT NULL,
+                        PRIMARY KEY (zone_set, snapshot_at)
+                    )
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_route_matrix_snapshot_at
+                        ON route_matrix_snapshots (snapshot_at)
+                """)
+                conn.commit()
+
+    @track_write("postgres", "route_matrix_snapshots", count=lambda matrix: 1)
+    def save_matrix(self, matrix: RouteMatrix) -> bool:
+        zone_set = zone_set_hash(matrix.origins, matrix.destinations)
+
+        with self._get_connection() as conn:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("""
+                        INSERT INTO route_matrix_zones (zone_set, origins, destinations)
+                        VALUES (%s, %s, %s)
+                        ON CONFLICT (zone_set) DO NOTHING
+                    """, (zone_set, Json(matrix.origins), Json(matrix.destinations)))
+                    cursor.execute("""
+                        INSERT INTO route_matrix_snapshots (zone_set, snapshot_at, elements)
+                        VALUES (%s, %s, %s)
+                        ON CONFLICT (zone_set, snapshot_at) DO NOTHING
+                    """, (zone_set, _utc(matrix.timestamp), pack_matrix(matrix)))
+                    conn.commit()
+                    return True
+            except Exception as e:
+                conn.rollback()
+                print(f"Error saving route matrix to PostgreSQL: {e}")
+                return False
+
+    def iter_matrices(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> Iterator[RouteMatrix]:
+
+        filters, params = [], []
+        if start is not None:
+            filters.append("s.snapshot_at >= %s")
+            params.append(_utc(start))
+        if end is not None:
+            filters.append("s.snapshot_at < %s")
+            params.append(_utc(end))
+        where = f"WHERE {' AND '.join(filters)}" if filters else ""
+
+        with self._get_connection() as conn:
+            # Named cursor streams snapshots instead of fetching every blob at once
+            with conn.cursor(name=f"iter_matrices_{uuid.uuid4().hex}") as cursor:
+                cursor.itersize = 100
+                cursor.execute(f"""
+                    SELECT s.snapshot_at, z.origins, z.destinations, s.elements
+                    FROM route_matrix_snapshots s
+                    JOIN route_matrix_zones z ON z.zone_set = s.zone_set
+                    {where}
+                    ORDER BY s.snapshot_at, s.zone_set
+                """, params)
+
+                for snapshot_at, origins, destinations, blob in cursor:
+                    yield unpack_matrix(origins, destinations, bytes(blob), snapshot_at)
+            conn.commit()
@@ -0,0 +1,160 @@
+from datetime import datetime, timezone
+from typing import List
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from domains.entities import RouteVariant
+from domains.repositories import IRouteVariantRepository
+from infrastructure.database.pool import PostgresConnectionPool
+from infrastructure.database.sqlite_engine import SQLiteEngine
+from infrastructure.geometry import pack_polyline, unpack_polyline
+from infrastructure.metrics import track_write
+
+
+def _to_variant(row: tuple) -> RouteVariant:
+    variant_id, origin, destination, coords, first_seen = row
+    if isinstance(first_seen, str):
+        first_seen = datetime.fromisoformat(first_seen)
+    return RouteVariant(
+        variant_id=variant_id.strip(),
+        origin=origin,
+        destination=destination,
+        encoded_polyline=unpack_polyline(bytes(coords)),
+        first_seen=first_seen
+    )
+
+
+def _first_seen(variant: RouteVariant) -> datetime:
+    return (variant.first_seen or datetime.now(timezone.utc)).astimezone(timezone.utc)
+
+
+# ---------- SQLite ----------
+class SQLiteRouteVariantRepository(IRouteVariantRepository):
+    def __init__(self, engine: SQLiteEngine, create_schema: bool = True):
+        self.engine = engine
+        if create_schema:
+            self._create_table()
+
+    def _create_table(self):
+
+        # Variant geometries are kept here, next to but apart from route_geometries,
+        # so the matching set of a route is one indexed read
+        self.engine.execute_script("""
+            CREATE TABLE IF NOT EXISTS route_variants (
+                variant_id TEXT PRIMARY KEY,
+                origin TEXT NOT NULL,
+                destination TEXT NOT NULL,
+                point_count INTEGER NOT NULL,
+                coords BLOB NOT NULL,
+                first_seen TEXT NOT NULL
+            ) WITHOUT ROWID;
+
+            CREATE INDEX IF NOT EXISTS idx_route_variants_od
+                ON route_variants (origin, destination, first_seen);
+        """)
+
+    def load_variants(self, origin: str, destination: str) -> List[RouteVariant]:
+        rows = self.engine.query("""
+            SELECT variant_id, origin, destination, coords, first_seen FROM route_variants
+            WHERE origin = ? AND destination = ?
+            ORDER BY first_seen, variant_id
+        """, (origin, destination))
+        return [_to_variant(row) for row in rows]
+
+    @track_write("sqlite", "route_variants")
+    def save_variants(self, variants: List[RouteVariant]) -> bool:
+        if not variants:
+            return True
+
+        rows = []
+        for variant in variants:
+            _, point_count, blob = pack_polyline(variant.encoded_polyline)
+            rows.append((
+                variant.variant_id, variant.origin, variant.destination,
+                point_count, blob, _first_seen(variant).isoformat()
+            ))
+
+        try:
+            self.engine.write("""
+                INSERT OR IGNORE INTO route_variants (
+                    variant_id, origin, destination, point_count, coords, first_seen
+                ) VALUES (?, ?, ?, ?, ?, ?)
+            """, rows)
+            return True
+        except Exception as e:
+            print(f"Error saving route variants: {e}")
+            return False
+
+
+# ---------- Postgres ----------
+class PostgresRouteVariantRepository(IRouteVariantRepository):
+    def __init__(self, pool: PostgresConnectionPool, create_schema: bool = True):
+        self.pool = pool
+        if create_schema:
+            self._create_table()
+
+    def _get_connection(self):
+        return self.pool.connection()
+
+    def _create_table(self):
+
+        with self._get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS route_variants (
+                        variant_id CHAR(32) PRIMARY KEY,
+                        origin VARCHAR(255) NOT NULL,
+                        destination VARCHAR(255) NOT NULL,
+                        point_count INTEGER NOT NULL,
+                        coords BYTEA NOT NULL,
+                        first_seen TIMESTAMP WITH TIME ZONE NOT NULL
+                    )
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_route_variants_od
+                        ON route_variants (origin, destination, first_seen)
+                """)
+                conn.commit()
+
+    def load_variants(self, origin: str, destination: str) -> List[RouteVariant]:
+        with self._get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT variant_id, origin, destination, coords, first_seen FROM route_variants
+                    WHERE origin = %s AND destination = %s
+                    ORDER BY first_seen, variant_id
+                """, (origin, destination))
+                rows = cursor.fetchall()
+            conn.commit()
+
+        return [_to_variant(row) for row in rows]
+
+    @track_write("postgres", "route_variants")
+    def save_variants(self, variants: List[RouteVariant]) -> bool:
+        if not variants:
+            return True
+
+        rows = []
+        for variant in variants:
+            _, point_count, blob = pack_polyline(variant.encoded_polyline)
+            rows.append((
+                variant.variant_id, variant.origin, variant.destination,
+                point_count, psycopg2.Binary(blob), _first_seen(variant)
+            ))
+
+        with self._get_connection() as conn:
+            try:
+                with conn.cursor() as cursor:
+                    execute_values(cursor, """
+                        INSERT INTO route_variants (
+                            variant_id, origin, destination, point_count, coords, first_seen
+                        ) VALUES %s
+                        ON CONFLICT (variant_id) DO NOTHING
+                    """, rows)
+                    conn.commit()
+                    return True
+            except Exception as e:
+                conn.rollback()
+                print(f"Error saving route variants to PostgreSQL: {e}")
+                return False
@@ -0,0 +1,67 @@
+import hashlib
+import json
+import os
+import time
+from typing import Dict
+
+
+# Bump whenever a repository's DDL changes, so databases recorded at an older
+# version get their tables created or migrated on the next run
+SCHEMA_VERSION = 1
+
+
+def database_key(db_config, schema_mode: str = "heap") -> str:
+    """ Stable, credential-free key of a database connection config and schema mode
+
+    The same database checked as plain tables still needs its DDL run when it is
+    switched to monthly partitions, so the mode is part of the key.
+    """
+
+    blob = json.dumps({"db_config": db_config, "schema_mode": schema_mode}, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:32]
+
+
+class SchemaCache:
+    """ Local file remembering databases whose tables are known to be current
+
+    Repositories run their `CREATE TABLE IF NOT EXISTS` and migrations on every
+    construction, one round trip (and lock) per statement. Short-lived processes
+    look the database up here first and skip that when its entry matches
+    SCHEMA_VERSION. Entries expire after `max_age` seconds, which bounds how long a
+    recreated database or a missing monthly partition goes unnoticed.
+    """
+
+    def __init__(self, path: str, max_age: float = 86400):
+        self.path = path
+        self.max_age = max_age
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def is_current(self, key: str) -> bool:
+        entry = self._load().get(key)
+        if not isinstance(entry, dict):
+            return False
+        return (
+            entry.get("version") == SCHEMA_VERSION
+            and time.time() - entry.get("checked_at", 0) < self.max_age
+        )
+
+    def mark_current(self, key: str):
+        entries = self._load()
+        entries[key] = {"version": SCHEMA_VERSION, "checked_at": time.time()}
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Concurrent runs may race here; the last complete write wins
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(temporary, self.path)
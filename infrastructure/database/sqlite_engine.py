@@ -0,0 +1,232 @@
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence
+
+from infrastructure.metrics import SQLITE_COMMIT_SECONDS
+
+
+class SQLiteWriteError(RuntimeError):
+    """ Queued writes of one owner that could not be committed, raised by its next `flush` """
+
+    def __init__(self, errors: List[Exception]):
+        self.errors = errors
+        super().__init__(f"{len(errors)} queued SQLite writes failed, first: {errors[0]}")
+
+
+class SQLiteEngine:
+    """ Long-lived WAL connection to one SQLite database with a write-behind writer thread
+
+    Every repository pointing at the same file should share one engine. Writes are
+    queued and applied by a single thread, grouped into one transaction per flush,
+    so the database fsyncs once per batch instead of once per row. A write that
+    cannot be committed fails its future and is reported by the next `flush` of
+    the same owner, so repositories sharing the engine only see their own errors.
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        db_path: str = "traffic_data.db",
+        flush_interval: float = 2.0,
+        max_batch_rows: int = 1000,
+        max_queue_size: int = 10000,
+        synchronous: str = "NORMAL",
+        cache_size_kib: int = 16384,
+        busy_timeout_ms: int = 5000
+    ):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.max_batch_rows = max_batch_rows
+        self.synchronous = synchronous
+        self.cache_size_kib = cache_size_kib
+        self.busy_timeout_ms = busy_timeout_ms
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue_size)
+        self._local = threading.local()
+        self._closed = False
+        # Only touched by the writer thread
+        self._failures: Dict[Hashable, List[Exception]] = {}
+
+        self._conn = self._connect()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+
+        self._writer = threading.Thread(
+            target=self._run_writer,
+            name=f"sqlite-writer:{db_path}",
+            daemon=True
+        )
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode: transactions are opened explicitly by the writer
+        conn = sqlite3.connect(
+            self.db_path,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kib)}")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    # ---------- Public API ----------
+    def write(self, statement: str, rows: Sequence[tuple], owner: Hashable = None) -> Future:
+        """ Queue rows for insertion; blocks only when the queue is full
+
+        A failure is raised by the next `flush(owner=owner)`. Writes without an
+        owner only fail the returned future, for callers that check it themselves.
+        """
+
+        if self._closed:
+            raise RuntimeError("SQLite engine is closed")
+
+        future = Future()
+        self._queue.put(("write", (statement, list(rows), owner), future))
+        return future
+
+    def run(self, fn: Callable[[sqlite3.Connection], Any], timeout: Optional[float] = None) -> Any:
+        """ Run `fn` on the writer connection after pending writes are committed """
+
+        if self._closed:
+            raise RuntimeError("SQLite engine is closed")
+
+        future = Future()
+        self._queue.put(("call", fn, future))
+        return future.result(timeout)
+
+    def execute_script(self, script: str):
+        self.run(lambda conn: conn.executescript(script))
+
+    def flush(self, timeout: Optional[float] = None, owner: Hashable = None):
+        """ Block until every write queued so far is committed
+
+        Raises SQLiteWriteError when any write of `owner` queued since its previous
+        flush failed.
+        """
+
+        failures = self.run(lambda conn: self._failures.pop(owner, []), timeout)
+        if failures:
+            raise SQLiteWriteError(failures)
+
+    def query(self, statement: str, params: Iterable = ()) -> List[tuple]:
+        """ Read through a per-thread connection; WAL lets readers run alongside the writer """
+
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn.execute(statement, tuple(params)).fetchall()
+
+    @property
+    def queue_depth(self) -> int:
+        """ Writes and calls waiting for the writer thread """
+        return self._queue.qsize()
+
+    def close(self, timeout: Optional[float] = None):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put((None, self._STOP, None))
+        self._writer.join(timeout)
+        self._conn.close()
+
+    # ---------- Writer thread ----------
+    def _fail(self, future: Future, error: Exception, owner: Hashable):
+        if owner is not None:
+            self._failures.setdefault(owner, []).append(error)
+        if not future.done():
+            future.set_exception(error)
+
+    def _run_writer(self):
+        pending = []
+        pending_rows = 0
+        deadline = None
+
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                kind, payload, future = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                kind, payload, future = None, None, None
+
+            # Nothing may escape this loop: callers block on their futures until it answers
+            try:
+                if payload is None:
+                    self._commit(pending)
+                    pending, pending_rows, deadline = [], 0, None
+                    continue
+
+                if payload is self._STOP:
+                    self._commit(pending)
+                    return
+
+                if kind == "write":
+                    pending.append((payload, future))
+                    pending_rows += len(payload[1])
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+                    if pending_rows >= self.max_batch_rows:
+                        self._commit(pending)
+                        pending, pending_rows, deadline = [], 0, None
+                    continue
+
+                # Calls act as barriers: everything queued before them is committed first
+                self._commit(pending)
+                pending, pending_rows, deadline = [], 0, None
+                try:
+                    future.set_result(payload(self._conn))
+                except Exception as e:
+                    future.set_exception(e)
+            except Exception as e:
+                print(f"❌ SQLite writer error, failing {len(pending)} queued writes: {e}")
+                for (_, _, owner), pending_future in pending:
+                    self._fail(pending_future, e, owner)
+                pending, pending_rows, deadline = [], 0, None
+                if future is not None and not future.done():
+                    future.set_exception(e)
+                if payload is self._STOP:
+                    return
+
+    def _commit(self, pending: list):
+        if not pending:
+            return
+
+        started = time.perf_counter()
+        try:
+            self._conn.execute("BEGIN")
+            for (statement, rows, _), _ in pending:
+                self._conn.executemany(statement, rows)
+            self._conn.execute("COMMIT")
+            SQLITE_COMMIT_SECONDS.observe(time.perf_counter() - started)
+        except Exception as e:
+            self._rollback()
+            print(f"Error flushing {len(pending)} SQLite writes, retrying one by one: {e}")
+            self._commit_individually(pending)
+            return
+
+        for _, future in pending:
+            future.set_result(True)
+
+    def _commit_individually(self, pending: list):
+        for (statement, rows, owner), future in pending:
+            try:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(statement, rows)
+                self._conn.execute("COMMIT")
+                future.set_result(True)
+            except Exception as e:
+                self._rollback()
+                print(f"Error saving SQLite rows: {e}")
+                self._fail(future, e, owner)
+
+    def _rollback(self):
+        try:
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+        except sqlite3.Error as e:
+            print(f"Error rolling back SQLite transaction: {e}")
@@ -0,0 +1,208 @@
+from typing import Dict, List
+
+from psycopg2.extras import Json, execute_values
+
+from domains.entities import CollectionTask
+from domains.repositories import ICollectionTaskQueue
+from infrastructure.database.pool import PostgresConnectionPool
+
+
+# ---------- Postgres ----------
+class PostgresTaskQueue(ICollectionTaskQueue):
+    """ Lease-based work queue shared by collectors on any number of hosts
+
+    Workers claim due rows with `FOR UPDATE SKIP LOCKED`, so concurrent claims never
+    block on or return the same task. A claim is a lease with an expiry that the
+    worker extends by heartbeating; a task whose lease expired is claimable again,
+    which is how work held by a crashed worker comes back. All times come from the
+    database clock so hosts do not need synchronised clocks.
+    """
+
+    _RETURNING = """
+        RETURNING t.id, t.kind, t.task_key, t.payload, t.interval_seconds,
+            t.next_due_at, t.attempts
+    """
+
+    def __init__(self, pool: PostgresConnectionPool):
+        self.pool = pool
+        self._create_table()
+
+    def _get_connection(self):
+        return self.pool.connection()
+
+    def _create_table(self):
+
+        with self._get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS collection_tasks (
+                        id BIGSERIAL PRIMARY KEY,
+                        kind VARCHAR(32) NOT NULL,
+                        task_key VARCHAR(512) NOT NULL UNIQUE,
+                        payload JSONB NOT NULL,
+                        interval_seconds INTEGER NOT NULL,
+                        next_due_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+                        lease_owner VARCHAR(255),
+                        lease_expires_at TIMESTAMP WITH TIME ZONE,
+                        attempts INTEGER NOT NULL DEFAULT 0,
+                        last_success_at TIMESTAMP WITH TIME ZONE,
+                        last_error TEXT
+                    )
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_collection_tasks_due
+                        ON collection_tasks (next_due_at)
+                """)
+                conn.commit()
+
+    def _to_task(self, row) -> CollectionTask:
+        task_id, kind, key, payload, interval_seconds, next_due_at, attempts = row
+        return CollectionTask(
+            kind=kind,
+            key=key,
+            payload=payload,
+            interval_seconds=interval_seconds,
+            task_id=task_id,
+            next_due_at=next_due_at,
+            attempts=attempts
+        )
+
+    def sync_tasks(self, tasks: List[CollectionTask], prune: bool = False) -> int:
+        """ Upsert tasks by key; schedules of existing tasks are kept """
+
+        with self._get_connection() as conn:
+            try:
+                with conn.cursor() as cursor:
+                    if tasks:
+                        execute_values(cursor, """
+                            INSERT INTO collection_tasks (kind, task_key, payload, interval_seconds)
+                            VALUES %s
+                            ON CONFLICT (task_key) DO UPDATE SET
+                                kind = EXCLUDED.kind,
+                                payload = EXCLUDED.payload,
+                                interval_seconds = EXCLUDED.interval_seconds
+                        """, [
+                            (task.kind, task.key, Json(task.payload), int(task.interval_seconds))
+                            for task in tasks
+                        ])
+
+                    if prune:
+                        cursor.execute(
+                            "DELETE FROM collection_tasks WHERE NOT (task_key = ANY(%s))",
+                            ([task.key for task in tasks],)
+                        )
+                conn.commit()
+                return len(tasks)
+            except Exception as e:
+                conn.rollback()
+                print(f"Error syncing collection tasks: {e}")
+                return 0
+
+    def claim(self, worker_id: str, limit: int, lease_seconds: float) -> List[CollectionTask]:
+        if limit <= 0:
+            return []
+
+        with self._get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    WITH due AS (
+                        SELECT id FROM collection_tasks
+                        WHERE next_due_at <= now()
+                            AND (lease_expires_at IS NULL OR lease_expires_at < now())
+                        ORDER BY next_due_at
+                        LIMIT %s
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    UPDATE collection_tasks t SET
+                        lease_owner = %s,
+                        lease_expires_at = now() + make_interval(secs => %s),
+                        attempts = t.attempts + 1
+                    FROM due
+                    WHERE t.id = due.id
+                """ + self._RETURNING, (limit, worker_id, lease_seconds))
+                rows = cursor.fetchall()
+            conn.commit()
+
+        return sorted((self._to_task(row) for row in rows), key=lambda task: task.next_due_at)
+
+    def heartbeat(self, worker_id: str, task_ids: List[int], lease_seconds: float) -> List[int]:
+        if not task_ids:
+            return []
+
+        with self._get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    UPDATE collection_tasks SET lease_expires_at = now() + make_interval(secs => %s)
+                    WHERE lease_owner = %s AND id = ANY(%s)
+                    RETURNING id
+                """, (lease_seconds, worker_id, list(task_ids)))
+                held = [row[0] for row in cursor.fetchall()]
+            conn.commit()
+
+        return held
+
+    def complete(self, task_id: int, worker_id: str) -> bool:
+        """ Next run one interval after the scheduled one, never in the past """
+
+        with self._get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    UPDATE collection_tasks SET
+                        next_due_at = GREATEST(
+                            next_due_at + make_interval(secs => interval_seconds), now()
+                        ),
+                        lease_owner = NULL,
+                        lease_expires_at = NULL,
+                        attempts = 0,
+                        last_success_at = now(),
+                        last_error = NULL
+                    WHERE id = %s AND lease_owner = %s
+                """, (task_id, worker_id))
+                released = cursor.rowcount == 1
+            conn.commit()
+
+        return released
+
+    def fail(self, task_id: int, worker_id: str, retry_in: float, error: str = "") -> bool:
+        with self._get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    UPDATE collection_tasks SET
+                        next_due_at = now() + make_interval(secs => %s),
+                        lease_owner = NULL,
+                        lease_expires_at = NULL,
+                        last_error = %s
+                    WHERE id = %s AND lease_owner = %s
+                """, (retry_in, error, task_id, worker_id))
+                released = cursor.rowcount == 1
+            conn.commit()
+
+        return released
+
+    def reclaim_expired(self) -> int:
+        with self._get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    UPDATE collection_tasks SET lease_owner = NULL, lease_expires_at = NULL
+                    WHERE lease_expires_at < now()
+                """)
+                reclaimed = cursor.rowcount
+            conn.commit()
+
+        return reclaimed
+
+    def stats(self) -> Dict[str, int]:
+        with self._get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT
+                        count(*),
+                        count(*) FILTER (WHERE lease_expires_at >= now()),
+                        count(*) FILTER (WHERE next_due_at <= now()
+                            AND (lease_expires_at IS NULL OR lease_expires_at < now())),
+                        count(*) FILTER (WHERE lease_expires_at < now())
+                    FROM collection_tasks
+                """)
+                total, leased, due, expired = cursor.fetchone()
+
+        return {"tasks": total, "leased": leased, "due": due, "expired_leases": expired}
@@ -0,0 +1,205 @@
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Iterator, List, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+
+# Field order matches ROUTE_RECORD_FIELDS / WEATHER_RECORD_FIELDS
+ROUTE_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("route_type", pa.string()),
+    ("origin", pa.string()),
+    ("destination", pa.string()),
+    ("distance_meters", pa.float64()),
+    ("duration_seconds", pa.float64()),
+    ("static_duration_seconds", pa.float64()),
+    ("polyline", pa.string()),
+    ("polyline_hash", pa.string()),
+    ("timestamp", pa.timestamp("us", tz="UTC")),
+    ("variant_id", pa.string())
+])
+
+WEATHER_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("weather_type", pa.string()),
+    ("weather_description", pa.string()),
+    ("temperature", pa.float64()),
+    ("feels_like", pa.float64()),
+    ("pressure", pa.float64()),
+    ("visibility", pa.int64()),
+    ("wind_speed", pa.float64()),
+    ("humidity", pa.float64()),
+    ("timestamp", pa.timestamp("us", tz="UTC")),
+    ("location", pa.string())
+])
+
+
+@dataclass
+class ExportResult:
+    rows: int = 0
+    last_id: int = 0
+    files: List[str] = field(default_factory=list)
+
+
+def _to_utc(value):
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value is not None and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _to_float(value):
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def records_to_table(rows: List[tuple], schema: pa.Schema) -> pa.Table:
+    """ Raw repository rows as an Arrow table; timestamps become UTC, decimals floats """
+
+    columns = list(zip(*rows)) if rows else [[] for _ in schema]
+    arrays = []
+
+    for values, schema_field in zip(columns, schema):
+        if pa.types.is_timestamp(schema_field.type):
+            values = [_to_utc(v) for v in values]
+        elif pa.types.is_floating(schema_field.type):
+            values = [_to_float(v) for v in values]
+        arrays.append(pa.array(values, type=schema_field.type))
+
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def watermark_key(table: str, filters: Optional[dict] = None) -> str:
+    """ Watermark entry of `table`, separate for every distinct set of row filters
+
+    A filtered run only sees its own rows, so its last id says nothing about rows
+    an unfiltered (or differently filtered) run has yet to export.
+    """
+
+    active = {name: value for name, value in (filters or {}).items() if value is not None}
+    if not active:
+        return table
+    return table + "?" + "&".join(f"{name}={active[name]}" for name in sorted(active))
+
+
+def dataset_name(table: str, filters: Optional[dict] = None) -> str:
+    """ Directory of the dataset exported with `filters`: the table name when unfiltered
+
+    Filtered runs get their own dataset next to the table's, so overlapping
+    selections never write into, or overwrite part files of, each other.
+    """
+
+    key = watermark_key(table, filters)
+    if key == table:
+        return table
+    return f"{table}--{hashlib.sha256(key.encode('utf-8')).hexdigest()[:12]}"
+
+
+class ColumnarExporter:
+    """ Write chunked database records as date-partitioned Parquet or Arrow IPC files
+
+    Only one chunk is held in memory at a time. Files are laid out as
+    `<output_dir>/<dataset>/date=YYYY-MM-DD/part-<first id>.<ext>`, where the dataset
+    is the table name, or `<table>--<hash>` for a filtered export (its filters are
+    recorded in `_filters.json` inside). The last exported id per table and filter
+    set is kept in `<output_dir>/_watermarks.json`. With the same batch size, a
+    chunk interrupted by a crash is re-exported to the same file names on resume, so
+    rows are not duplicated.
+    """
+
+    def __init__(self, output_dir: str, file_format: str = "parquet", compression: str = "zstd"):
+        if file_format not in ("parquet", "arrow"):
+            raise ValueError("file_format must be 'parquet' or 'arrow'")
+
+        self.output_dir = output_dir
+        self.file_format = file_format
+        self.compression = compression
+        self._watermark_path = os.path.join(output_dir, "_watermarks.json")
+
+    # ---------- Watermarks ----------
+    def _read_watermarks(self) -> dict:
+        if not os.path.exists(self._watermark_path):
+            return {}
+        with open(self._watermark_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def load_watermark(self, table: str, filters: Optional[dict] = None) -> int:
+        return int(self._read_watermarks().get(watermark_key(table, filters), 0))
+
+    def save_watermark(self, table: str, last_id: int, filters: Optional[dict] = None):
+        watermarks = self._read_watermarks()
+        watermarks[watermark_key(table, filters)] = last_id
+
+        tmp_path = self._watermark_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(watermarks, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._watermark_path)
+
+    def _describe(self, dataset: str, key: str):
+        directory = os.path.join(self.output_dir, dataset)
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, "_filters.json"), "w", encoding="utf-8") as f:
+            json.dump({"watermark_key": key}, f)
+
+    # ---------- Conversion ----------
+    def _to_table(self, rows: List[tuple], schema: pa.Schema) -> pa.Table:
+        return records_to_table(rows, schema)
+
+    def _write(self, table: pa.Table, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+
+        if self.file_format == "parquet":
+            pq.write_table(table, tmp_path, compression=self.compression)
+        else:
+            with pa.OSFile(tmp_path, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+
+        os.replace(tmp_path, path)
+
+    # ---------- Export ----------
+    def export(
+        self,
+        table_name: str,
+        records: Iterator[List[tuple]],
+        schema: pa.Schema,
+        filters: Optional[dict] = None
+    ) -> ExportResult:
+        """ Export `records` of `table_name`; `filters` is the selection they were read with """
+
+        result = ExportResult(last_id=self.load_watermark(table_name, filters))
+        extension = "parquet" if self.file_format == "parquet" else "arrow"
+
+        dataset = dataset_name(table_name, filters)
+        if dataset != table_name:
+            self._describe(dataset, watermark_key(table_name, filters))
+
+        for rows in records:
+            table = self._to_table(rows, schema)
+            dates = pc.strftime(table["timestamp"], format="%Y-%m-%d")
+
+            for day in pc.unique(dates).to_pylist():
+                part = table.filter(pc.equal(dates, day))
+                first_id = part["id"][0].as_py()
+                path = os.path.join(
+                    self.output_dir, dataset, f"date={day}",
+                    f"part-{first_id:012d}.{extension}"
+                )
+                self._write(part, path)
+                result.files.append(path)
+
+            result.rows += table.num_rows
+            result.last_id = rows[-1][0]
+            self.save_watermark(table_name, result.last_id, filters)
+
+        return result
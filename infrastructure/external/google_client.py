@@ -1,15 +1,76 @@
 from datetime import datetime, timedelta, timezone
+from typing import Iterator, List, Optional, Sequence, Tuple
+import math
 import requests
 import json
 
+from infrastructure.external.http_session import (
+    DEFAULT_TIMEOUT, build_http_session, decode_json, send_instrumented
+)
+from infrastructure.external.json_stream import iter_json_array
+from infrastructure.external.rate_limiter import RateLimitDeferred, RateLimiter
+from infrastructure.external.response_archive import GOOGLE_FORECASTS, GOOGLE_ROUTES, ResponseArchive
+from infrastructure.metrics import RATE_LIMIT_WAIT_SECONDS
+
+
+# computeRouteMatrix limits for TRAFFIC_AWARE requests with placeId waypoints
+MATRIX_MAX_ELEMENTS = 625
+MATRIX_MAX_WAYPOINTS = 50
+
+# Forecast sweeps only need travel times, so polylines are left out of the response
+FORECAST_FIELD_MASK = "routes.legs.distanceMeters,routes.legs.duration,routes.legs.staticDuration"
+
+
+def plan_matrix_chunks(
+    origins: int,
+    destinations: int,
+    max_elements: int = MATRIX_MAX_ELEMENTS,
+    max_waypoints: int = MATRIX_MAX_WAYPOINTS
+) -> List[Tuple[range, range]]:
+    """ Tile an origins x destinations matrix into the fewest requests within the API limits """
+
+    best = None
+    for block_o in range(1, min(origins, max_waypoints - 1) + 1):
+        block_d = min(destinations, max_waypoints - block_o, max_elements // block_o)
+        requests_needed = math.ceil(origins / block_o) * math.ceil(destinations / block_d)
+        if best is None or requests_needed < best[0]:
+            best = (requests_needed, block_o, block_d)
+
+    if best is None:
+        return []
+
+    _, block_o, block_d = best
+    return [
+        (range(o, min(o + block_o, origins)), range(d, min(d + block_d, destinations)))
+        for o in range(0, origins, block_o)
+        for d in range(0, destinations, block_d)
+    ]
 
 
 class GoogleMapsClient:
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: str,
+        session: Optional[requests.Session] = None,
+        timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+        rate_limiter: Optional[RateLimiter] = None,
+        archive: Optional[ResponseArchive] = None,
+        api_root: str = 'https://routes.googleapis.com'
+    ):
         self.api_key = api_key
-        self.base_url = 'https://routes.googleapis.com/directions/v2:computeRoutes'
+        self.base_url = f'{api_root}/directions/v2:computeRoutes'
+        self.matrix_url = f'{api_root}/distanceMatrix/v2:computeRouteMatrix'
+        self.session = session or build_http_session()
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.archive = archive
 
-    def get_directions(self, origin: str, destination: str) -> json:
+    def get_directions(
+        self,
+        origin: str,
+        destination: str,
+        observed_at: Optional[datetime] = None
+    ) -> json:
         try:
 
             headers = {
@@ -38,13 +99,164 @@ class GoogleMapsClient:
                 },
             }
 
-            response = requests.post(
+            # Wait for a token; raises RateLimitDeferred when the budget is spent
+            if self.rate_limiter is not None:
+                with RATE_LIMIT_WAIT_SECONDS.labels("google").time():
+                    self.rate_limiter.acquire(key=(origin, destination))
+
+            response = send_instrumented("google", "compute_routes", lambda: self.session.post(
                 self.base_url,
                 headers=headers,
-                data=json.dumps(data)
+                data=json.dumps(data),
+                timeout=self.timeout
+            ))
+
+            body = decode_json("google", "compute_routes", response)
+
+            # Keep the full response so new fields can be backfilled later
+            if self.archive is not None and response.status_code == 200:
+                self._archive(
+                    {"origin": origin, "destination": destination, "departure_time": _departure_time},
+                    body,
+                    observed_at=observed_at
+                )
+
+            return body
+
+        except RateLimitDeferred:
+            raise
+        except Exception as e:
+            print(f"Error while fetching Google API Data: {e}")
+
+    def get_departure_forecast(
+        self,
+        origin: str,
+        destination: str,
+        departure_time: datetime,
+        observed_at: Optional[datetime] = None
+    ) -> dict:
+        """ Routes predicted for a future departure; raises on failed requests """
+
+        headers = {
+            "Content-Type": "application/json",
+            "X-Goog-Api-Key": self.api_key,
+            "X-Goog-FieldMask": FORECAST_FIELD_MASK
+        }
+
+        _departure_time = departure_time.astimezone(timezone.utc).isoformat()
+
+        data = {
+            "origin": {
+                "placeId": origin
+            },
+            "destination": {
+                "placeId": destination
+            },
+            "travelMode": "DRIVE",
+            "routingPreference": "TRAFFIC_AWARE",
+            "departureTime": _departure_time,
+            "computeAlternativeRoutes": True
+        }
+
+        # Every horizon of a route shares its key, so sweeps interleave across routes
+        if self.rate_limiter is not None:
+            with RATE_LIMIT_WAIT_SECONDS.labels("google").time():
+                self.rate_limiter.acquire(key=(origin, destination))
+
+        response = send_instrumented("google", "forecast", lambda: self.session.post(
+            self.base_url,
+            headers=headers,
+            data=json.dumps(data),
+            timeout=self.timeout
+        ))
+
+        if response.status_code != 200:
+            raise RuntimeError(
+                f"Departure forecast request failed ({response.status_code}): {response.text[:500]}"
+            )
+
+        body = decode_json("google", "forecast", response)
+
+        # Archived apart from live routes so replays never store a forecast as an observation
+        if self.archive is not None:
+            self._archive(
+                {"origin": origin, "destination": destination, "departure_time": _departure_time},
+                body,
+                GOOGLE_FORECASTS,
+                observed_at
             )
 
-            return response.json()
+        return body
 
+    def compute_route_matrix(
+        self,
+        origins: Sequence[str],
+        destinations: Sequence[str]
+    ) -> Iterator[dict]:
+        """ Stream matrix elements for every origin/destination pair
+
+        The matrix is split into requests within the API element limits and each
+        response is parsed element by element as it arrives. Yielded elements carry
+        indexes into the full `origins` / `destinations` lists.
+        """
+
+        headers = {
+            "Content-Type": "application/json",
+            "X-Goog-Api-Key": self.api_key,
+            "X-Goog-FieldMask": "originIndex,destinationIndex,status,condition,distanceMeters,duration,staticDuration"
+        }
+
+        # Request information 2 minutes ahead of current time
+        _departure_time = (datetime.now(timezone.utc) + timedelta(minutes=2)).isoformat()
+
+        for origin_block, destination_block in plan_matrix_chunks(len(origins), len(destinations)):
+            data = {
+                "origins": [
+                    {"waypoint": {"placeId": origins[i]}} for i in origin_block
+                ],
+                "destinations": [
+                    {"waypoint": {"placeId": destinations[j]}} for j in destination_block
+                ],
+                "travelMode": "DRIVE",
+                "routingPreference": "TRAFFIC_AWARE",
+                "departureTime": _departure_time
+            }
+
+            # The Route Matrix API bills per element, not per request
+            if self.rate_limiter is not None:
+                with RATE_LIMIT_WAIT_SECONDS.labels("google").time():
+                    self.rate_limiter.acquire(
+                        key=("matrix", origin_block.start, destination_block.start),
+                        cost=len(origin_block) * len(destination_block)
+                    )
+
+            # Latency is time to the response headers; elements are parsed as they stream in
+            with send_instrumented("google", "route_matrix", lambda: self.session.post(
+                self.matrix_url,
+                headers=headers,
+                data=json.dumps(data),
+                timeout=self.timeout,
+                stream=True
+            )) as response:
+                if response.status_code != 200:
+                    raise RuntimeError(
+                        f"Route matrix request failed ({response.status_code}): {response.text[:500]}"
+                    )
+
+                for element in iter_json_array(response.iter_content(chunk_size=64 * 1024)):
+                    # Zero indexes are omitted from proto3 JSON
+                    element["originIndex"] = origin_block[element.get("originIndex", 0)]
+                    element["destinationIndex"] = destination_block[element.get("destinationIndex", 0)]
+                    yield element
+
+    def _archive(
+        self,
+        request: dict,
+        body: dict,
+        source: str = GOOGLE_ROUTES,
+        observed_at: Optional[datetime] = None
+    ):
+        try:
+            self.archive.append(source, request, body, observed_at)
         except Exception as e:
-            print("Error while fetching Google API Data")
\ No newline at end of file
+            print(f"Error archiving Google API response: {e}")
@@ -0,0 +1,83 @@
+from typing import Any, Callable, Iterable, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from infrastructure.metrics import (
+    API_DECODE_SECONDS, API_ERRORS, API_REQUEST_SECONDS, API_REQUESTS, API_RETRIES
+)
+
+
+DEFAULT_TIMEOUT: Tuple[float, float] = (3.05, 30.0)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def build_http_session(
+    pool_size: int = 10,
+    max_retries: int = 3,
+    backoff_factor: float = 0.5,
+    backoff_jitter: float = 0.5,
+    backoff_max: float = 30.0,
+    status_forcelist: Iterable[int] = RETRY_STATUSES
+) -> requests.Session:
+    """ Keep-alive session shared by the API clients
+
+    Connections are pooled per host, so repeated calls reuse the TLS session. Failed
+    connects and 429/5xx responses are retried with jittered exponential backoff,
+    honouring Retry-After. Once retries are exhausted the last response is returned
+    so clients keep handling status codes themselves.
+    """
+
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=max_retries,
+        status_forcelist=tuple(status_forcelist),
+        # computeRoutes is a read-only POST, safe to replay
+        allowed_methods=frozenset({"GET", "POST"}),
+        backoff_factor=backoff_factor,
+        backoff_jitter=backoff_jitter,
+        backoff_max=backoff_max,
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retry,
+        pool_block=True
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def send_instrumented(api: str, endpoint: str, send: Callable[[], requests.Response]) -> requests.Response:
+    """ Run `send` and record its latency, status and transport retries """
+
+    try:
+        with API_REQUEST_SECONDS.labels(api, endpoint).time():
+            response = send()
+    except Exception:
+        API_ERRORS.labels(api, endpoint).inc()
+        raise
+
+    API_REQUESTS.labels(api, endpoint, response.status_code).inc()
+    if response.status_code != 200:
+        API_ERRORS.labels(api, endpoint).inc()
+
+    retries = getattr(getattr(getattr(response, "raw", None), "retries", None), "history", ())
+    if retries:
+        API_RETRIES.labels(api, endpoint).inc(len(retries))
+
+    return response
+
+
+def decode_json(api: str, endpoint: str, response: requests.Response) -> Any:
+    with API_DECODE_SECONDS.labels(api, endpoint).time():
+        return response.json()
@@ -0,0 +1,81 @@
+import codecs
+import json
+from typing import Any, Iterable, Iterator
+
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+_DELIMITERS = ",]" + _WHITESPACE
+
+
+class _ArrayParser:
+    def __init__(self):
+        self.buffer = ""
+        self.position = 0
+        self.started = False
+        self.finished = False
+
+    def feed(self, text: str, final: bool = False) -> Iterator[Any]:
+        self.buffer = self.buffer[self.position:] + text
+        self.position = 0
+        buffer = self.buffer
+
+        while not self.finished:
+            while self.position < len(buffer) and buffer[self.position] in _WHITESPACE:
+                self.position += 1
+            if self.position >= len(buffer):
+                break
+
+            char = buffer[self.position]
+            if not self.started:
+                if char != "[":
+                    raise ValueError(f"Expected a JSON array, got {buffer[self.position:self.position + 80]!r}")
+                self.started = True
+                self.position += 1
+                continue
+            if char == ",":
+                self.position += 1
+                continue
+            if char == "]":
+                self.position += 1
+                self.finished = True
+                break
+
+            try:
+                element, end = _DECODER.raw_decode(buffer, self.position)
+            except json.JSONDecodeError:
+                if final:
+                    raise ValueError(f"Truncated JSON array: {buffer[self.position:self.position + 80]!r}")
+                # Element continues in the next chunk
+                break
+
+            # A scalar (number or literal) is only complete once a delimiter follows it:
+            # `1.` or `2e` at the chunk boundary decodes as a shorter number
+            if (
+                not final
+                and char not in '{["'
+                and (end == len(buffer) or buffer[end] not in _DELIMITERS)
+            ):
+                break
+
+            self.position = end
+            yield element
+
+        if final and not self.finished:
+            raise ValueError("Truncated JSON array: missing closing bracket")
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """ Yield the elements of a top-level JSON array as its bytes arrive
+
+    Only the unparsed tail of the stream is buffered, so a large response is
+    consumed element by element instead of being loaded whole.
+    """
+
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    parser = _ArrayParser()
+
+    for chunk in chunks:
+        yield from parser.feed(decoder.decode(chunk))
+
+    yield from parser.feed(decoder.decode(b"", final=True), final=True)
@@ -0,0 +1,169 @@
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone, tzinfo
+from threading import Condition
+from typing import Dict, Hashable, Optional
+
+from interfaces.gateways.traffic_gateway import RateLimitDeferred
+
+
+class QuotaExhaustedError(RateLimitDeferred):
+    pass
+
+
+class RateLimitTimeoutError(RateLimitDeferred):
+    pass
+
+
+class DailyQuota:
+    """ Calls allowed per calendar day, reset at midnight in `reset_tz` """
+
+    def __init__(self, limit: int, reset_tz: tzinfo = timezone.utc):
+        self.limit = limit
+        self.reset_tz = reset_tz
+        self.used = 0
+        self._day = self._today()
+
+    def _today(self):
+        return datetime.now(self.reset_tz).date()
+
+    def _roll(self):
+        today = self._today()
+        if today != self._day:
+            self._day = today
+            self.used = 0
+
+    @property
+    def remaining(self) -> int:
+        self._roll()
+        return max(0, self.limit - self.used)
+
+    def consume(self, amount: int = 1):
+        self._roll()
+        self.used += amount
+
+
+class RateLimiter:
+    """ Thread-safe token bucket with a daily quota and round-robin fairness across keys
+
+    `acquire` blocks until a token is available. Waiters are served one key at a time
+    in rotation, so a route issuing many requests cannot starve the others. When the
+    daily quota is spent, or `timeout` expires, a RateLimitDeferred subclass is raised
+    instead of calling the API.
+    """
+
+    def __init__(
+        self,
+        rate_per_second: float,
+        burst: int = 1,
+        daily_quota: Optional[int] = None,
+        quota_reset_tz: tzinfo = timezone.utc,
+        default_timeout: Optional[float] = None
+    ):
+        if rate_per_second <= 0 or burst < 1:
+            raise ValueError("rate_per_second must be positive and burst at least 1")
+
+        self.rate = rate_per_second
+        self.capacity = float(burst)
+        self.quota = DailyQuota(daily_quota, quota_reset_tz) if daily_quota else None
+        self.default_timeout = default_timeout
+
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._cond = Condition()
+        # key -> FIFO of waiting tickets; dict order is the round-robin order
+        self._waiting: "OrderedDict[Hashable, deque]" = OrderedDict()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _check_quota(self, cost: int = 1):
+        if self.quota is not None and self.quota.remaining < cost:
+            raise QuotaExhaustedError(
+                f"Daily quota of {self.quota.limit} calls exhausted"
+            )
+
+    def _is_turn(self, key: Hashable, ticket: object) -> bool:
+        first_key = next(iter(self._waiting))
+        return first_key == key and self._waiting[key][0] is ticket
+
+    def _leave(self, key: Hashable, ticket: object, served: bool):
+        queue = self._waiting.get(key)
+        if queue is None:
+            return
+        try:
+            queue.remove(ticket)
+        except ValueError:
+            pass
+
+        if not queue:
+            del self._waiting[key]
+        elif served:
+            # Move the key to the back so other keys go next
+            self._waiting.move_to_end(key)
+
+    def acquire(self, key: Hashable = None, timeout: Optional[float] = None, cost: int = 1):
+        """ Take `cost` tokens, for APIs billed per element rather than per request
+
+        A cost above the burst size is served once the bucket is full and leaves it
+        in debt, which later callers wait out, so the average rate still holds.
+        """
+
+        timeout = self.default_timeout if timeout is None else timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        ticket = object()
+        needed = min(float(cost), self.capacity)
+
+        with self._cond:
+            self._check_quota(cost)
+            self._waiting.setdefault(key, deque()).append(ticket)
+
+            served = False
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = None
+
+                    if self._is_turn(key, ticket):
+                        self._check_quota(cost)
+                        self._refill(now)
+                        if self._tokens >= needed:
+                            self._tokens -= cost
+                            if self.quota is not None:
+                                self.quota.consume(cost)
+                            served = True
+                            return
+                        wait = (needed - self._tokens) / self.rate
+
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            raise RateLimitTimeoutError(
+                                f"No rate limit token available within {timeout}s"
+                            )
+                        wait = remaining if wait is None else min(wait, remaining)
+
+                    self._cond.wait(wait)
+            finally:
+                self._leave(key, ticket, served)
+                self._cond.notify_all()
+
+    @property
+    def remaining_quota(self) -> Optional[int]:
+        with self._cond:
+            return self.quota.remaining if self.quota is not None else None
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        """ Current budget: tokens in the bucket, waiting callers and calls left today """
+
+        with self._cond:
+            self._refill(time.monotonic())
+            return {
+                "tokens": self._tokens,
+                "capacity": self.capacity,
+                "rate_per_second": self.rate,
+                "waiting": sum(len(q) for q in self._waiting.values()),
+                "daily_limit": self.quota.limit if self.quota is not None else None,
+                "daily_remaining": self.quota.remaining if self.quota is not None else None
+            }
@@ -0,0 +1,186 @@
+import json
+import mmap
+import os
+import threading
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+# Archive sources, one sub-directory each
+GOOGLE_ROUTES = "google_routes"
+GOOGLE_FORECASTS = "google_forecasts"
+OPENWEATHER = "openweather"
+
+# One fixed-width index entry per response: observed time (ms), offset and length in the segment
+INDEX_DTYPE = np.dtype([("observed_ms", "<i8"), ("offset", "<u8"), ("length", "<u4")])
+
+# (segment path, index path, first entry, end entry)
+ReplayChunk = Tuple[str, str, int, int]
+
+
+def _to_ms(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1000)
+
+
+def read_index(index_path: str) -> np.ndarray:
+    """ Memory-mapped view of a segment index; a torn trailing entry is ignored """
+
+    entries = os.path.getsize(index_path) // INDEX_DTYPE.itemsize
+    if entries == 0:
+        return np.empty(0, dtype=INDEX_DTYPE)
+    return np.memmap(index_path, dtype=INDEX_DTYPE, mode="r", shape=(entries,))
+
+
+def iter_entries(
+    segment_path: str,
+    index_path: str,
+    first: int = 0,
+    end: Optional[int] = None
+) -> Iterator[Tuple[datetime, dict, Any]]:
+    """ (observed_at, request, response) for index entries [first, end) of one segment """
+
+    index = read_index(index_path)[first:end]
+    if len(index) == 0:
+        return
+
+    with open(segment_path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for offset, length in zip(index["offset"].tolist(), index["length"].tolist()):
+                record = json.loads(zlib.decompress(data[offset:offset + length]))
+                yield (
+                    datetime.fromisoformat(record["observed_at"]),
+                    record["request"],
+                    record["response"]
+                )
+
+
+class _SegmentWriter:
+    """ Appends compressed records of one source; a new segment is opened on every start """
+
+    def __init__(self, directory: str, segment_max_bytes: int):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.last_ms = 0
+
+        os.makedirs(directory, exist_ok=True)
+        segments = ResponseArchive.segments_in(directory)
+        self._open(segments[-1] + 1 if segments else 1)
+
+    def _open(self, seq: int):
+        self.seq = seq
+        self._data = open(os.path.join(self.directory, f"{seq:08d}.seg"), "ab")
+        self._index = open(os.path.join(self.directory, f"{seq:08d}.idx"), "ab")
+
+    def append(self, observed_ms: int, blob: bytes):
+        # Responses are indexed in time order even if the clock steps back
+        observed_ms = max(observed_ms, self.last_ms)
+        offset = self._data.tell()
+
+        # Data reaches the file before the index entry that points at it
+        self._data.write(blob)
+        self._data.flush()
+        self._index.write(np.array([(observed_ms, offset, len(blob))], dtype=INDEX_DTYPE).tobytes())
+        self._index.flush()
+        self.last_ms = observed_ms
+
+        if self._data.tell() >= self.segment_max_bytes:
+            self.close()
+            self._open(self.seq + 1)
+
+    def close(self):
+        for f in (self._data, self._index):
+            os.fsync(f.fileno())
+            f.close()
+
+
+class ResponseArchive:
+    """ Time-ordered archive of raw API responses
+
+    Each source gets its own directory of zlib-compressed records in numbered
+    segment files. Next to every `.seg` file an `.idx` file holds fixed-width
+    (observed time, offset, length) entries that readers memory-map and binary
+    search, so a time range is located without decompressing anything else.
+    """
+
+    def __init__(
+        self,
+        directory: str = "archive",
+        segment_max_bytes: int = 64 * 1024 * 1024,
+        compression_level: int = 6
+    ):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.compression_level = compression_level
+
+        self._writers: Dict[str, _SegmentWriter] = {}
+        self._lock = threading.Lock()
+
+    # ---------- Writing ----------
+    def append(
+        self,
+        source: str,
+        request: dict,
+        response: Any,
+        observed_at: Optional[datetime] = None
+    ):
+        observed_at = observed_at or datetime.now(timezone.utc)
+        record = json.dumps(
+            {"observed_at": observed_at.isoformat(), "request": request, "response": response},
+            separators=(",", ":")
+        ).encode("utf-8")
+        blob = zlib.compress(record, self.compression_level)
+
+        with self._lock:
+            writer = self._writers.get(source)
+            if writer is None:
+                writer = _SegmentWriter(os.path.join(self.directory, source), self.segment_max_bytes)
+                self._writers[source] = writer
+            writer.append(_to_ms(observed_at), blob)
+
+    def close(self):
+        with self._lock:
+            for writer in self._writers.values():
+                writer.close()
+            self._writers.clear()
+
+    # ---------- Reading ----------
+    @staticmethod
+    def segments_in(directory: str) -> List[int]:
+        if not os.path.isdir(directory):
+            return []
+        return sorted(int(name[:-4]) for name in os.listdir(directory) if name.endswith(".seg"))
+
+    def plan(
+        self,
+        source: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        chunk_entries: int = 2000
+    ) -> List[ReplayChunk]:
+        """ Split the responses observed in [start, end) into chunks of at most `chunk_entries` """
+
+        directory = os.path.join(self.directory, source)
+        start_ms = _to_ms(start) if start else None
+        end_ms = _to_ms(end) if end else None
+        chunks: List[ReplayChunk] = []
+
+        for seq in self.segments_in(directory):
+            segment_path = os.path.join(directory, f"{seq:08d}.seg")
+            index_path = os.path.join(directory, f"{seq:08d}.idx")
+
+            observed = read_index(index_path)["observed_ms"]
+            if len(observed) == 0:
+                continue
+
+            first = 0 if start_ms is None else int(np.searchsorted(observed, start_ms, side="left"))
+            last = len(observed) if end_ms is None else int(np.searchsorted(observed, end_ms, side="left"))
+
+            for lo in range(first, last, chunk_entries):
+                chunks.append((segment_path, index_path, lo, min(lo + chunk_entries, last)))
+
+        return chunks
@@ -1,23 +1,60 @@
+from datetime import datetime
+from typing import Optional, Tuple
 import requests
 import json
 
+from infrastructure.external.http_session import (
+    DEFAULT_TIMEOUT, build_http_session, decode_json, send_instrumented
+)
+from infrastructure.external.rate_limiter import RateLimiter
+from infrastructure.external.response_archive import OPENWEATHER, ResponseArchive
+from infrastructure.metrics import RATE_LIMIT_WAIT_SECONDS
+
 
 class WeatherClient:
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: str,
+        session: Optional[requests.Session] = None,
+        timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+        rate_limiter: Optional[RateLimiter] = None,
+        archive: Optional[ResponseArchive] = None,
+        api_root: str = 'https://api.openweathermap.org'
+    ):
         self.api_key = api_key
-        self.base_url = 'https://api.openweathermap.org/data/2.5/weather'
+        self.base_url = f'{api_root}/data/2.5/weather'
+        self.session = session or build_http_session()
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.archive = archive
 
     def get_weather_conditions(
         self,
         latitude: str,
-        longitude: str
+        longitude: str,
+        observed_at: Optional[datetime] = None
     ) -> json:
         
         params = f"?lat={latitude}&lon={longitude}&appid={self.api_key}&units=metric"
 
-        response = requests.get(self.base_url + params)
+        if self.rate_limiter is not None:
+            with RATE_LIMIT_WAIT_SECONDS.labels("openweather").time():
+                self.rate_limiter.acquire(key=(latitude, longitude))
+
+        response = send_instrumented("openweather", "weather", lambda: self.session.get(
+            self.base_url + params, timeout=self.timeout
+        ))
 
         if response.status_code == 200:
-            return response.json()
+            body = decode_json("openweather", "weather", response)
+            if self.archive is not None:
+                self._archive({"latitude": latitude, "longitude": longitude}, body, observed_at)
+            return body
+
+        return None
 
-        return None
\ No newline at end of file
+    def _archive(self, request: dict, body: dict, observed_at: Optional[datetime] = None):
+        try:
+            self.archive.append(OPENWEATHER, request, body, observed_at)
+        except Exception as e:
+            print(f"Error archiving OpenWeather response: {e}")
@@ -0,0 +1,83 @@
+import hashlib
+import sys
+from array import array
+from typing import Tuple
+
+import numpy as np
+
+
+# Google encoded polylines carry 5 decimal digits of precision
+POLYLINE_PRECISION = 1e5
+
+
+def decode_polyline_deltas(encoded: str) -> array:
+    """ Decode a Google encoded polyline into its interleaved lat/lng deltas (int32, 1e-5 degrees)
+
+    The polyline format is already delta-encoded, so the raw values are kept as-is
+    instead of being accumulated into absolute coordinates.
+    """
+
+    deltas = array("i")
+    value, shift = 0, 0
+
+    for char in encoded:
+        b = ord(char) - 63
+        value |= (b & 0x1f) << shift
+        shift += 5
+        if b < 0x20:
+            deltas.append(~(value >> 1) if value & 1 else value >> 1)
+            value, shift = 0, 0
+
+    if len(deltas) % 2:
+        raise ValueError("Encoded polyline has an odd number of values")
+
+    return deltas
+
+
+def encode_polyline_deltas(deltas) -> str:
+    """ Inverse of decode_polyline_deltas """
+
+    chars = []
+    for delta in deltas:
+        v = int(delta) << 1
+        if delta < 0:
+            v = ~v
+        while v >= 0x20:
+            chars.append(chr((0x20 | (v & 0x1f)) + 63))
+            v >>= 5
+        chars.append(chr(v + 63))
+    return "".join(chars)
+
+
+def pack_polyline(encoded: str) -> Tuple[str, int, bytes]:
+    """ Return (content hash, point count, little-endian int32 delta blob) for a polyline """
+
+    deltas = decode_polyline_deltas(encoded)
+    if sys.byteorder != "little":
+        deltas.byteswap()
+    blob = deltas.tobytes()
+
+    return geometry_hash(blob), len(deltas) // 2, blob
+
+
+def geometry_hash(blob: bytes) -> str:
+    return hashlib.blake2b(blob, digest_size=16).hexdigest()
+
+
+def unpack_fixed(blob: bytes) -> np.ndarray:
+    """ Absolute coordinates as an (n, 2) int64 array of lat/lng in 1e-5 degrees """
+
+    deltas = np.frombuffer(blob, dtype="<i4").reshape(-1, 2)
+    return np.cumsum(deltas, axis=0, dtype=np.int64)
+
+
+def unpack_coordinates(blob: bytes) -> np.ndarray:
+    """ Absolute coordinates as an (n, 2) float64 array of lat/lng degrees """
+
+    return unpack_fixed(blob) / POLYLINE_PRECISION
+
+
+def unpack_polyline(blob: bytes) -> str:
+    """ Rebuild the Google encoded polyline stored in a geometry blob """
+
+    return encode_polyline_deltas(np.frombuffer(blob, dtype="<i4").tolist())
@@ -0,0 +1,483 @@
+import functools
+import math
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+# Seconds; covers sub-millisecond parsing up to multi-minute collection cycles
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Shards:
+    """ One value list per recording thread
+
+    Recording only ever touches the calling thread's own list, so it needs no lock;
+    the lock is taken once per thread, when its shard is created, and by scrapes.
+    Scrapes sum the shards and may miss an update that is in progress.
+    """
+
+    def __init__(self, width: int):
+        self.width = width
+        self._local = threading.local()
+        self._shards: List[List[float]] = []
+        self._lock = threading.Lock()
+
+    def get(self) -> List[float]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = [0.0] * self.width
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def totals(self) -> List[float]:
+        with self._lock:
+            shards = list(self._shards)
+        totals = [0.0] * self.width
+        for shard in shards:
+            for i, value in enumerate(shard):
+                totals[i] += value
+        return totals
+
+
+class _Timer:
+    """ Observes elapsed seconds into a histogram; a context manager and a decorator """
+
+    def __init__(self, histogram: "_HistogramChild"):
+        self.histogram = histogram
+        self._started = 0.0
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self._started)
+        return False
+
+    def __call__(self, func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Timer(self.histogram):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+# ---------- Children ----------
+class _CounterChild:
+    def __init__(self):
+        self._shards = _Shards(1)
+
+    def inc(self, amount: float = 1.0):
+        self._shards.get()[0] += amount
+
+    def samples(self, name: str, labels: str) -> Iterator[str]:
+        yield f"{name}{labels} {_format_value(self._shards.totals()[0])}"
+
+
+class _GaugeChild:
+    def __init__(self):
+        self._value = 0.0
+        self._fn: Optional[Callable[[], float]] = None
+
+    def set(self, value: float):
+        self._value = value
+
+    def set_function(self, fn: Callable[[], float]):
+        """ Evaluate `fn` at scrape time instead of storing a value """
+        self._fn = fn
+
+    def samples(self, name: str, labels: str) -> Iterator[str]:
+        value = self._value
+        if self._fn is not None:
+            try:
+                value = self._fn()
+            except Exception:
+                value = math.nan
+        yield f"{name}{labels} {_format_value(value)}"
+
+
+class _HistogramChild:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        # Bucket counts, then the +Inf count, then the sum of observations
+        self._shards = _Shards(len(buckets) + 2)
+
+    def observe(self, value: float):
+        shard = self._shards.get()
+        shard[bisect_left(self.buckets, value)] += 1
+        shard[-1] += value
+
+    def time(self) -> _Timer:
+        return _Timer(self)
+
+    def samples(self, name: str, labels: str, names=(), values=()) -> Iterator[str]:
+        totals = self._shards.totals()
+        cumulative = 0.0
+        for bound, count in zip(self.buckets + (math.inf,), totals[:-1]):
+            cumulative += count
+            le = _format_labels(names, values, f'le="{_format_value(bound)}"')
+            yield f"{name}_bucket{le} {_format_value(cumulative)}"
+        yield f"{name}_sum{labels} {_format_value(totals[-1])}"
+        yield f"{name}_count{labels} {_format_value(cumulative)}"
+
+
+# ---------- Metrics ----------
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """ Child for one combination of label values, created on first use """
+
+        child = self._children.get(values)
+        if child is not None:
+            return child
+
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        return self.labels()
+
+    def expose(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        with self._lock:
+            children = list(self._children.items())
+        for values, child in children:
+            labels = _format_labels(self.labelnames, values)
+            if isinstance(child, _HistogramChild):
+                yield from child.samples(self.name, labels, self.labelnames, values)
+            else:
+                yield from child.samples(self.name, labels)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._default().set(value)
+
+    def set_function(self, fn: Callable[[], float]):
+        self._default().set_function(fn)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+    def time(self) -> _Timer:
+        return self._default().time()
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def expose(self) -> str:
+        """ Every metric in the Prometheus text exposition format """
+
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = [line for metric in metrics for line in metric.expose()]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+# ---------- Collector metrics ----------
+API_REQUEST_SECONDS = REGISTRY.histogram(
+    "route_analyzer_api_request_seconds",
+    "HTTP round trip of external API calls, including transport retries",
+    ["api", "endpoint"]
+)
+API_REQUESTS = REGISTRY.counter(
+    "route_analyzer_api_requests_total",
+    "External API calls by response status",
+    ["api", "endpoint", "status"]
+)
+API_ERRORS = REGISTRY.counter(
+    "route_analyzer_api_errors_total",
+    "External API calls that raised or returned a non-200 status",
+    ["api", "endpoint"]
+)
+API_RETRIES = REGISTRY.counter(
+    "route_analyzer_api_retries_total",
+    "Transport-level retries made by the HTTP session",
+    ["api", "endpoint"]
+)
+API_DECODE_SECONDS = REGISTRY.histogram(
+    "route_analyzer_api_decode_seconds",
+    "JSON decoding of external API responses",
+    ["api", "endpoint"]
+)
+RATE_LIMIT_WAIT_SECONDS = REGISTRY.histogram(
+    "route_analyzer_rate_limit_wait_seconds",
+    "Time spent waiting for a rate limiter token",
+    ["api"]
+)
+ADAPTER_SECONDS = REGISTRY.histogram(
+    "route_analyzer_adapter_seconds",
+    "Mapping of API responses to domain entities",
+    ["adapter"]
+)
+USE_CASE_SECONDS = REGISTRY.histogram(
+    "route_analyzer_use_case_seconds",
+    "Duration of use case executions",
+    ["use_case"]
+)
+USE_CASE_RUNS = REGISTRY.counter(
+    "route_analyzer_use_case_runs_total",
+    "Use case executions by outcome (success, failure, error)",
+    ["use_case", "outcome"]
+)
+DB_WRITE_SECONDS = REGISTRY.histogram(
+    "route_analyzer_db_write_seconds",
+    "Repository batch writes; for SQLite this is the time to queue the batch",
+    ["backend", "table"]
+)
+DB_ROWS_WRITTEN = REGISTRY.counter(
+    "route_analyzer_db_rows_written_total",
+    "Rows handed to the database in successful batch writes",
+    ["backend", "table"]
+)
+DB_WRITE_ERRORS = REGISTRY.counter(
+    "route_analyzer_db_write_errors_total",
+    "Repository batch writes that failed",
+    ["backend", "table"]
+)
+SQLITE_COMMIT_SECONDS = REGISTRY.histogram(
+    "route_analyzer_sqlite_commit_seconds",
+    "Group commits of the SQLite writer thread"
+)
+SCHEDULER_LAG_SECONDS = REGISTRY.histogram(
+    "route_analyzer_scheduler_lag_seconds",
+    "Delay between a job's due time and its dispatch",
+    ["job"]
+)
+SCHEDULER_JOB_SECONDS = REGISTRY.histogram(
+    "route_analyzer_scheduler_job_seconds",
+    "Duration of scheduled job runs",
+    ["job"]
+)
+SCHEDULER_SKIPPED = REGISTRY.counter(
+    "route_analyzer_scheduler_skipped_total",
+    "Scheduled runs skipped because they were late or still running",
+    ["job"]
+)
+QUEUE_DEPTH = REGISTRY.gauge(
+    "route_analyzer_queue_depth",
+    "Items waiting in internal queues",
+    ["queue"]
+)
+DURATION_ANOMALIES = REGISTRY.counter(
+    "route_analyzer_duration_anomalies_total",
+    "Route durations flagged as outside their usual range",
+    ["route_type"]
+)
+POOL_CONNECTIONS = REGISTRY.gauge(
+    "route_analyzer_pool_connections",
+    "PostgreSQL pool connections by state",
+    ["state"]
+)
+
+
+def track_use_case(name: str) -> Callable:
+    """ Time a use case method and count its outcome from the returned success flag """
+
+    histogram = USE_CASE_SECONDS.labels(name)
+    outcomes = {outcome: USE_CASE_RUNS.labels(name, outcome) for outcome in ("success", "failure", "error")}
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                outcomes["error"].inc()
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - started)
+            outcomes["success" if result else "failure"].inc()
+            return result
+        return wrapper
+
+    return decorator
+
+
+def track_write(backend: str, table: str, count: Callable[[object], int] = len) -> Callable:
+    """ Time a repository batch save and count its rows from the success flag it returns """
+
+    histogram = DB_WRITE_SECONDS.labels(backend, table)
+    rows_written = DB_ROWS_WRITTEN.labels(backend, table)
+    errors = DB_WRITE_ERRORS.labels(backend, table)
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(self, batch, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                saved = func(self, batch, *args, **kwargs)
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - started)
+            if saved:
+                rows_written.inc(count(batch))
+            else:
+                errors.inc()
+            return saved
+        return wrapper
+
+    return decorator
+
+
+# ---------- HTTP endpoint ----------
+class MetricsServer:
+    """ Serves the registry on GET /metrics from a daemon thread """
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY, host: str = "127.0.0.1", port: int = 9464):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def _handler(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.expose().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        if self._server is not None:
+            return
+        self._server = ThreadingHTTPServer((self.host, self.port), self._handler())
+        self._server.daemon_threads = True
+        # Port 0 binds any free port; keep the real one
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="metrics-server", daemon=True
+        )
+        self._thread.start()
+        print(f"📊 Metrics available at http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        self._thread = None
@@ -0,0 +1,610 @@
+import json
+import os
+import sqlite3
+import struct
+import threading
+import time
+import uuid
+import zlib
+from collections import deque
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+import psycopg2
+
+from domains.entities import Route, RouteGeometry, RouteType, WeatherConditions
+from domains.repositories import ITrafficRepository, IWeatherRepository
+from infrastructure.database.sqlite_engine import SQLiteWriteError
+from infrastructure.metrics import track_write
+
+
+ROUTES = "routes"
+WEATHER = "weather"
+
+# Record framing: payload length, CRC32 of the payload
+_HEADER = struct.Struct("<II")
+
+# (segment sequence, byte offset) of the next unread record
+Position = Tuple[int, int]
+
+
+# ---------- Entity codec ----------
+# Entities are flat dataclasses: a shallow copy is enough and far cheaper than asdict()
+def _encode_route(route: Route) -> dict:
+    data = dict(vars(route))
+    data["route_type"] = route.route_type.name
+    data["timestamp"] = route.timestamp.isoformat()
+    return data
+
+
+def _decode_route(data: dict) -> Route:
+    data = dict(data)
+    data["route_type"] = RouteType[data["route_type"]]
+    data["timestamp"] = datetime.fromisoformat(data["timestamp"])
+    return Route(**data)
+
+
+def _encode_weather(weather: WeatherConditions) -> dict:
+    data = dict(vars(weather))
+    data["timestamp"] = weather.timestamp.isoformat()
+    return data
+
+
+def _decode_weather(data: dict) -> WeatherConditions:
+    data = dict(data)
+    data["timestamp"] = datetime.fromisoformat(data["timestamp"])
+    return WeatherConditions(**data)
+
+
+class DurableOutbox:
+    """ Append-only local spool of collected records, drained into the database later
+
+    Records are length + CRC32 framed JSON, appended to numbered segment files that
+    rotate once they reach `segment_max_bytes`. Appends only hit the page cache; a
+    background thread fsyncs at most every `sync_interval` seconds, so a crash can
+    lose at most that window. Every process start opens a fresh segment, which makes
+    any torn tail left by a crash belong to a closed segment the reader can skip.
+    """
+
+    _SEGMENT_SUFFIX = ".seg"
+
+    def __init__(
+        self,
+        directory: str = "outbox",
+        segment_max_bytes: int = 64 * 1024 * 1024,
+        sync_interval: float = 0.05,
+        rate_window: float = 60.0
+    ):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.sync_interval = sync_interval
+        self.rate_window = rate_window
+
+        os.makedirs(directory, exist_ok=True)
+        self._cursor_path = os.path.join(directory, "cursor.json")
+
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._closed = False
+        self._dirty = False
+
+        self.appended = 0
+        self.drained = 0
+        self._drain_log: "deque[Tuple[float, int]]" = deque()
+
+        self._cursor = self._load_cursor()
+        segments = self._segments()
+        self._active_seq = (segments[-1] if segments else self._cursor[0]) + 1
+        self._file = None
+        self._active_size = 0
+        self._open_segment(self._active_seq)
+
+        self._stop = threading.Event()
+        self._syncer = threading.Thread(target=self._run_syncer, name="outbox-sync", daemon=True)
+        self._syncer.start()
+
+    # ---------- Segments ----------
+    def _segment_path(self, seq: int) -> str:
+        return os.path.join(self.directory, f"{seq:016d}{self._SEGMENT_SUFFIX}")
+
+    def _segments(self) -> List[int]:
+        return sorted(
+            int(name[:-len(self._SEGMENT_SUFFIX)])
+            for name in os.listdir(self.directory)
+            if name.endswith(self._SEGMENT_SUFFIX)
+        )
+
+    def _sync_directory(self):
+        fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _open_segment(self, seq: int):
+        self._file = open(self._segment_path(seq), "ab")
+        self._active_seq = seq
+        self._active_size = self._file.tell()
+        self._sync_directory()
+
+    def _rotate(self):
+        # Called with self._lock held; the old segment is fully durable before it closes
+        with self._sync_lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+        self._dirty = False
+        self._open_segment(self._active_seq + 1)
+
+    # ---------- Writing ----------
+    def append(self, kind: str, items: List[dict]):
+        """ Spool one batch of encoded entities; returns once it is in the page cache """
+
+        payload = json.dumps({"kind": kind, "items": items}, separators=(",", ":")).encode("utf-8")
+        record = _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Outbox is closed")
+
+            self._file.write(record)
+            self._active_size += len(record)
+            self._dirty = True
+            self.appended += len(items)
+
+            if self._active_size >= self.segment_max_bytes:
+                self._rotate()
+
+    def sync(self):
+        """ Force every appended record to disk """
+
+        with self._lock:
+            if not self._dirty or self._file is None:
+                return
+            self._file.flush()
+            file = self._file
+            self._dirty = False
+
+        with self._sync_lock:
+            if not file.closed:
+                os.fsync(file.fileno())
+
+    def _run_syncer(self):
+        while not self._stop.wait(self.sync_interval):
+            try:
+                self.sync()
+            except Exception as e:
+                print(f"❌ Error syncing outbox: {e}")
+
+    # ---------- Reading ----------
+    @property
+    def cursor(self) -> Position:
+        return self._cursor
+
+    def _load_cursor(self) -> Position:
+        if not os.path.exists(self._cursor_path):
+            return (0, 0)
+        with open(self._cursor_path, encoding="utf-8") as f:
+            data = json.load(f)
+        return (int(data["segment"]), int(data["offset"]))
+
+    def read_batch(self, max_records: int = 500) -> Tuple[List[Tuple[str, list]], Position]:
+        """ Up to `max_records` spooled records after the cursor, and the position after them
+
+        Nothing is consumed until the returned position is passed to `commit`.
+        """
+
+        # Make recent appends visible to the reader
+        with self._lock:
+            if not self._closed:
+                self._file.flush()
+            active_seq = self._active_seq
+
+        records: List[Tuple[str, list]] = []
+        seq, offset = self._cursor
+
+        for segment in self._segments():
+            if segment < seq:
+                continue
+            if segment > seq:
+                seq, offset = segment, 0
+
+            with open(self._segment_path(segment), "rb") as f:
+                f.seek(offset)
+                while len(records) < max_records:
+                    header = f.read(_HEADER.size)
+                    if len(header) < _HEADER.size:
+                        break
+                    length, checksum = _HEADER.unpack(header)
+                    payload = f.read(length)
+                    if len(payload) < length or zlib.crc32(payload) != checksum:
+                        break
+
+                    data = json.loads(payload)
+                    records.append((data["kind"], data["items"]))
+                    offset = f.tell()
+                else:
+                    return records, (seq, offset)
+
+                remainder = os.fstat(f.fileno()).st_size - offset
+
+            if segment == active_seq:
+                break
+            if remainder:
+                print(f"⚠️ Skipping {remainder} unreadable bytes at the end of outbox segment {segment}")
+
+        return records, (seq, offset)
+
+    def commit(self, position: Position, records: int = 0):
+        """ Persist the cursor and delete fully drained segments """
+
+        data = json.dumps({"segment": position[0], "offset": position[1]})
+        tmp_path = self._cursor_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._cursor_path)
+        self._sync_directory()
+
+        self._cursor = position
+        for segment in self._segments():
+            if segment >= position[0]:
+                break
+            os.remove(self._segment_path(segment))
+
+        if records:
+            now = time.monotonic()
+            with self._lock:
+                self.drained += records
+                self._drain_log.append((now, records))
+
+    # ---------- Metrics ----------
+    def stats(self) -> dict:
+        now = time.monotonic()
+
+        with self._lock:
+            while self._drain_log and self._drain_log[0][0] < now - self.rate_window:
+                self._drain_log.popleft()
+            recent = sum(count for _, count in self._drain_log)
+            active_seq, active_size = self._active_seq, self._active_size
+            appended, drained = self.appended, self.drained
+
+        seq, offset = self._cursor
+        segments = [s for s in self._segments() if s >= seq]
+        backlog = sum(
+            active_size if s == active_seq else os.path.getsize(self._segment_path(s))
+            for s in segments
+        )
+        if segments and segments[0] == seq:
+            backlog -= offset
+
+        return {
+            "backlog_bytes": max(backlog, 0),
+            "backlog_segments": len(segments),
+            "appended_records": appended,
+            "drained_records": drained,
+            "drain_rate_per_second": recent / self.rate_window
+        }
+
+    def close(self):
+        self._stop.set()
+        self._syncer.join()
+
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            with self._sync_lock:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+
+
+# ---------- Repositories ----------
+class OutboxTrafficRepository(ITrafficRepository):
+    """ Spool routes to the outbox; reads go straight to the backing repository """
+
+    def __init__(self, outbox: DurableOutbox, repository: ITrafficRepository):
+        self.outbox = outbox
+        self.repository = repository
+
+    def save_route(self, route: Route) -> bool:
+        return self.save_routes([route])
+
+    @track_write("outbox", "routes")
+    def save_routes(self, routes: List[Route]) -> bool:
+        if not routes:
+            return True
+
+        # The id makes replays idempotent in the database
+        for route in routes:
+            route.record_id = route.record_id or str(uuid.uuid4())
+
+        try:
+            self.outbox.append(ROUTES, [_encode_route(route) for route in routes])
+            return True
+        except Exception as e:
+            print(f"❌ Error spooling routes, saving directly: {e}")
+            return self.repository.save_routes(routes)
+
+    def iter_route_records(self, *args, **kwargs) -> Iterator[List[tuple]]:
+        return self.repository.iter_route_records(*args, **kwargs)
+
+    def iter_routes(self, *args, **kwargs) -> Iterator[List[Route]]:
+        return self.repository.iter_routes(*args, **kwargs)
+
+    def iter_route_records_by_time(self, *args, **kwargs) -> Iterator[List[tuple]]:
+        return self.repository.iter_route_records_by_time(*args, **kwargs)
+
+    def iter_route_geometries(self, *args, **kwargs) -> Iterator[List[RouteGeometry]]:
+        return self.repository.iter_route_geometries(*args, **kwargs)
+
+
+class OutboxWeatherRepository(IWeatherRepository):
+    """ Spool weather observations to the outbox; reads go to the backing repository """
+
+    def __init__(self, outbox: DurableOutbox, repository: IWeatherRepository):
+        self.outbox = outbox
+        self.repository = repository
+
+    def save_weather(self, weather: WeatherConditions) -> bool:
+        return self.save_weather_batch([weather])
+
+    @track_write("outbox", "weather")
+    def save_weather_batch(self, weathers: List[WeatherConditions]) -> bool:
+        if not weathers:
+            return True
+
+        for weather in weathers:
+            weather.record_id = weather.record_id or str(uuid.uuid4())
+
+        try:
+            self.outbox.append(WEATHER, [_encode_weather(weather) for weather in weathers])
+            return True
+        except Exception as e:
+            print(f"❌ Error spooling weather data, saving directly: {e}")
+            return self.repository.save_weather_batch(weathers)
+
+    def iter_weather_records(self, *args, **kwargs) -> Iterator[List[tuple]]:
+        return self.repository.iter_weather_records(*args, **kwargs)
+
+    def iter_weather_records_by_time(self, *args, **kwargs) -> Iterator[List[tuple]]:
+        return self.repository.iter_weather_records_by_time(*args, **kwargs)
+
+
+# ---------- Drainer ----------
+class _UndecodableRecord(ValueError):
+    """ A spooled item that no longer decodes into its entity """
+
+
+# Errors caused by the records themselves: retrying them unchanged fails again
+_DATA_ERRORS = (
+    psycopg2.DataError, psycopg2.IntegrityError,
+    sqlite3.DataError, sqlite3.IntegrityError,
+    _UndecodableRecord
+)
+
+
+def _is_data_error(error: Exception) -> bool:
+    if isinstance(error, SQLiteWriteError):
+        return all(_is_data_error(e) for e in error.errors)
+    return isinstance(error, _DATA_ERRORS)
+
+
+class OutboxDrainer:
+    """ Background thread replaying the outbox into the database in bulk
+
+    The cursor only advances after the repositories accepted and flushed a batch,
+    so delivery is at-least-once; record ids turn duplicates into no-ops. Failed
+    batches are retried with exponential backoff, for as long as it takes, while
+    collection keeps spooling. Only a batch the database rejects for its data
+    (a constraint or a bad value) is bisected down to the records at fault; those
+    are moved to `<outbox>/quarantine/` as JSON lines of {"kind", "items", "error"}
+    and the rest is delivered. `replay_quarantine` feeds them back once fixed.
+    """
+
+    def __init__(
+        self,
+        outbox: DurableOutbox,
+        traffic_repo: ITrafficRepository,
+        weather_repo: IWeatherRepository,
+        batch_records: int = 500,
+        interval: float = 1.0,
+        max_backoff: float = 60.0
+    ):
+        self.outbox = outbox
+        self.traffic_repo = traffic_repo
+        self.weather_repo = weather_repo
+        self.batch_records = batch_records
+        self.interval = interval
+        self.max_backoff = max_backoff
+
+        self.failures = 0
+        self.quarantined = 0
+        self.last_error: Optional[str] = None
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def drain_once(self) -> int:
+        """ Replay one batch; returns the number of entities delivered """
+
+        records, position = self.outbox.read_batch(self.batch_records)
+        if not records:
+            # Step over skipped torn tails so they are not reported again
+            if position != self.outbox.cursor:
+                self.outbox.commit(position)
+            return 0
+
+        start = self.outbox.cursor
+        delivered, rejected = self._deliver_or_reject(records)
+
+        if rejected:
+            path = self._quarantine_path(start)
+            self._quarantine(path, rejected)
+            self.quarantined += len(rejected)
+            print(f"⚠️ Quarantined {len(rejected)} outbox records the database rejected to {path}: {rejected[0][2]}")
+
+        # Only reached once both repositories flushed without raising, or the
+        # rejected records were set aside
+        self.outbox.commit(position, delivered)
+        return delivered
+
+    def replay_quarantine(self) -> int:
+        """ Deliver the quarantined records again; returns the number of entities delivered
+
+        Records the database still rejects stay quarantined, a file is removed once
+        none are left. A connection or other operational error raises and leaves
+        the files in place.
+        """
+
+        directory = os.path.join(self.outbox.directory, "quarantine")
+        if not os.path.isdir(directory):
+            return 0
+
+        replayed = 0
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(".jsonl"):
+                continue
+            path = os.path.join(directory, name)
+
+            with open(path, encoding="utf-8") as f:
+                records = [(line["kind"], line["items"]) for line in map(json.loads, f)]
+
+            delivered, rejected = self._deliver_or_reject(records)
+            replayed += delivered
+            if rejected:
+                self._quarantine(path, rejected)
+            else:
+                os.remove(path)
+
+        return replayed
+
+    def _deliver_or_reject(
+        self,
+        records: List[Tuple[str, list]]
+    ) -> Tuple[int, List[Tuple[str, list, Exception]]]:
+        """ Deliver `records`, bisecting a batch rejected for its data down to the items at fault
+
+        Returns the entities delivered and the rejected (kind, [item], error). Any
+        other error raises, so the whole batch is retried.
+        """
+
+        try:
+            return self._deliver(records), []
+        except Exception as e:
+            if not _is_data_error(e):
+                raise
+            error = e
+
+        items = [(kind, [item]) for kind, batch in records for item in batch]
+        if len(items) <= 1:
+            return 0, [(kind, batch, error) for kind, batch in items]
+
+        middle = len(items) // 2
+        delivered, rejected = 0, []
+        for half in (items[:middle], items[middle:]):
+            half_delivered, half_rejected = self._deliver_or_reject(half)
+            delivered += half_delivered
+            rejected.extend(half_rejected)
+        return delivered, rejected
+
+    def _deliver(self, records: List[Tuple[str, list]]) -> int:
+        routes: List[Route] = []
+        weathers: List[WeatherConditions] = []
+        try:
+            for kind, items in records:
+                if kind == ROUTES:
+                    routes.extend(_decode_route(item) for item in items)
+                elif kind == WEATHER:
+                    weathers.extend(_decode_weather(item) for item in items)
+                else:
+                    print(f"⚠️ Dropping outbox record of unknown kind: {kind}")
+        except (KeyError, TypeError, ValueError) as e:
+            raise _UndecodableRecord(f"Undecodable outbox item: {e!r}") from e
+
+        saved = (
+            self.traffic_repo.save_routes(routes),
+            self.weather_repo.save_weather_batch(weathers)
+        )
+
+        # Both raise when a write was rejected, including one a save reported as
+        # False; flush both so neither keeps an error for the next batch
+        errors = []
+        for repository in (self.traffic_repo, self.weather_repo):
+            try:
+                repository.flush()
+            except Exception as e:
+                errors.append(e)
+        if errors:
+            raise errors[0]
+
+        if not saved[0]:
+            raise RuntimeError(f"Could not save {len(routes)} routes")
+        if not saved[1]:
+            raise RuntimeError(f"Could not save {len(weathers)} weather observations")
+
+        return len(routes) + len(weathers)
+
+    def _quarantine_path(self, start: Position) -> str:
+        directory = os.path.join(self.outbox.directory, "quarantine")
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f"{start[0]:016d}-{start[1]:012d}.jsonl")
+
+    @staticmethod
+    def _quarantine(path: str, rejected: List[Tuple[str, list, Exception]]):
+        # Written aside and renamed, so a crash never leaves a half-written file
+        temporary = path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            for kind, items, error in rejected:
+                f.write(json.dumps({"kind": kind, "items": items, "error": str(error)}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+
+    def _run(self):
+        backoff = self.interval
+
+        while not self._stop.is_set():
+            try:
+                delivered = self.drain_once()
+                backoff = self.interval
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                print(f"❌ Error draining outbox, retrying in {backoff:.0f}s: {e}")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+
+            # Keep going while there is a backlog, otherwise poll
+            if delivered == 0:
+                self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="outbox-drainer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """ Stop the thread and make one last attempt to deliver what is spooled """
+
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+        try:
+            while self.drain_once():
+                pass
+        except Exception as e:
+            print(f"⚠️ Outbox not fully drained, it will resume on next start: {e}")
+
+    def stats(self) -> dict:
+        stats = self.outbox.stats()
+        stats["drain_failures"] = self.failures
+        stats["quarantined_records"] = self.quarantined
+        stats["last_error"] = self.last_error
+        return stats
@@ -0,0 +1,53 @@
+import json
+from typing import List
+
+from domains.entities import RoutePair
+
+
+def load_route_catalog(path: str) -> List[RoutePair]:
+    """ Load monitored origin/destination placeId pairs from a JSON file
+
+    Expected format:
+        [{"origin": "<placeId>", "destination": "<placeId>", "round_trip": true}, ...]
+    """
+
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+
+    catalog = []
+    seen = set()
+
+    for i, entry in enumerate(entries):
+        try:
+            pair = RoutePair(
+                origin=entry["origin"],
+                destination=entry["destination"],
+                round_trip=bool(entry.get("round_trip", True))
+            )
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"Invalid route catalog entry #{i} in {path}: {entry!r}") from e
+
+        # Skip duplicated pairs so a route is never fetched twice per cycle
+        if pair in seen:
+            continue
+        seen.add(pair)
+        catalog.append(pair)
+
+    return catalog
+
+
+def load_zone_list(path: str) -> List[str]:
+    """ Load the placeIds of a zone-to-zone matrix from a JSON file
+
+    Expected format:
+        ["<placeId>", "<placeId>", ...]
+    """
+
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+
+    if not isinstance(entries, list) or not all(isinstance(e, str) for e in entries):
+        raise ValueError(f"Zone list in {path} must be a JSON list of placeIds")
+
+    # Keep the first occurrence so matrix rows keep a stable order
+    return list(dict.fromkeys(entries))
@@ -1,32 +1,229 @@
+import heapq
+import itertools
+import random
 import time
-import schedule
-from threading import Thread
-from typing import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from threading import Condition, Event, Thread
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from infrastructure.metrics import SCHEDULER_JOB_SECONDS, SCHEDULER_LAG_SECONDS, SCHEDULER_SKIPPED
+
+
+@dataclass
+class ScheduledJob:
+    name: str
+    func: Callable
+    args: tuple
+    kwargs: dict
+    interval: float
+    max_concurrency: int = 1
+    misfire_grace: Optional[float] = None
+    jitter: float = 0.0
+    next_slot: float = 0.0
+    running: int = 0
+    runs: int = 0
+    skipped: int = 0
+    last_lag: float = 0.0
+    interval_fn: Optional[Callable[[], float]] = None
+
 
 class BackgroundScheduler:
-    def __init__(self):
-        self.scheduled_jobs = []
-    
+    """ Heap-based scheduler that dispatches due jobs to a worker pool
+
+    The timer thread sleeps until the earliest due job instead of polling. Jobs run
+    at a fixed rate anchored to their first slot; each run may start up to `jitter`
+    seconds late so jobs sharing a period do not fire in the same second. Jobs with
+    an interval function are instead rescheduled when a run finishes, so the next
+    interval can depend on what that run observed.
+    """
+
+    def __init__(self, max_workers: int = 8):
+        self.max_workers = max_workers
+        self.scheduled_jobs: List[ScheduledJob] = []
+
+        self._heap: List[Tuple[float, int, ScheduledJob]] = []
+        self._counter = itertools.count()
+        self._cond = Condition()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="scheduler-worker"
+        )
+        self._timer: Optional[Thread] = None
+        self._stopped = Event()
+
+    def schedule_job(
+        self,
+        job_func: Callable,
+        interval: Union[float, Callable[[], float]],
+        args: tuple = (),
+        kwargs: Optional[Dict] = None,
+        name: Optional[str] = None,
+        max_concurrency: int = 1,
+        misfire_grace: Optional[float] = None,
+        jitter: float = 0.0,
+        first_run_delay: Optional[float] = None
+    ) -> ScheduledJob:
+        """ Run `job_func` every `interval` seconds
+
+        interval: seconds, or a callable returning them. A callable is re-evaluated
+            after every run and the next run starts that long after the previous
+            one started; runs of such a job never overlap.
+        max_concurrency: overlapping runs allowed; extra runs are skipped while the
+            limit is reached.
+        misfire_grace: seconds a run may start late before it is skipped (None = always run).
+        jitter: random delay in [0, jitter] seconds added to every run.
+        first_run_delay: seconds until the first slot (defaults to `interval`).
+        """
+
+        interval_fn = interval if callable(interval) else None
+        if interval_fn is not None:
+            interval = interval_fn()
+            max_concurrency = 1
+
+        if interval <= 0:
+            raise ValueError("Job interval must be positive")
+
+        delay = interval if first_run_delay is None else first_run_delay
+
+        job = ScheduledJob(
+            name=name or getattr(job_func, "__name__", repr(job_func)),
+            func=job_func,
+            args=tuple(args),
+            kwargs=dict(kwargs or {}),
+            interval=interval,
+            max_concurrency=max_concurrency,
+            misfire_grace=misfire_grace,
+            jitter=jitter,
+            next_slot=time.monotonic() + delay,
+            interval_fn=interval_fn
+        )
+
+        with self._cond:
+            self.scheduled_jobs.append(job)
+            self._push(job)
+            self._cond.notify()
+
+        return job
+
     def schedule_hourly_job(
-        self, 
-        job_func: Callable, 
-        *args, 
+        self,
+        job_func: Callable,
+        *args,
         **kwargs
-    ):
+    ) -> ScheduledJob:
         """ This function executes the program each hour """
 
-        job = schedule.every().minute.do(lambda: job_func(*args, **kwargs))
-        self.scheduled_jobs.append(job)
-        
-        if len(self.scheduled_jobs) == 1:
-            thread = Thread(target=self._run_scheduler, daemon=True)
-            thread.start()
-    
-    def _run_scheduler(self):
-        """ Execute scheduler on background """
-        
-        while True:
-            schedule.run_pending()
-            time.sleep(1)
+        return self.schedule_job(job_func, 3600, args=args, kwargs=kwargs)
+
+    def start(self):
+        """ Start the timer on a background thread """
+
+        if self._timer is not None:
+            return
+        self._timer = Thread(target=self._run_timer, name="scheduler-timer", daemon=True)
+        self._timer.start()
+
+    def run(self):
+        """ Start the scheduler and block until shutdown() is called """
+
+        self.start()
+        while not self._stopped.wait(1):
+            pass
+
+    def shutdown(self, wait: bool = True):
+        with self._cond:
+            self._stopped.set()
+            self._cond.notify_all()
+
+        if self._timer is not None and wait:
+            self._timer.join()
+        self._executor.shutdown(wait=wait)
+
+    # ---------- Internals ----------
+    @property
+    def running_jobs(self) -> int:
+        return sum(job.running for job in self.scheduled_jobs)
+
+    @property
+    def pending_jobs(self) -> int:
+        return len(self._heap)
+
+    def _push(self, job: ScheduledJob):
+        run_at = job.next_slot + (random.uniform(0, job.jitter) if job.jitter else 0.0)
+        heapq.heappush(self._heap, (run_at, next(self._counter), job))
+
+    def _advance(self, job: ScheduledJob, now: float):
+        # Fixed rate: skip slots that already passed instead of bursting to catch up
+        job.next_slot += job.interval
+        if job.next_slot <= now:
+            missed = int((now - job.next_slot) // job.interval) + 1
+            job.next_slot += missed * job.interval
+
+    def _run_timer(self):
+        with self._cond:
+            while not self._stopped.is_set():
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+
+                run_at = self._heap[0][0]
+                now = time.monotonic()
+                if run_at > now:
+                    self._cond.wait(run_at - now)
+                    continue
+
+                _, _, job = heapq.heappop(self._heap)
+                if job.interval_fn is None:
+                    self._advance(job, now)
+                    self._push(job)
+
+                if not self._dispatch(job, run_at, now) and job.interval_fn is not None:
+                    job.next_slot = now + job.interval
+                    self._push(job)
+
+    def _dispatch(self, job: ScheduledJob, run_at: float, now: float) -> bool:
+        job.last_lag = now - run_at
+        SCHEDULER_LAG_SECONDS.labels(job.name).observe(job.last_lag)
+
+        if job.misfire_grace is not None and job.last_lag > job.misfire_grace:
+            job.skipped += 1
+            SCHEDULER_SKIPPED.labels(job.name).inc()
+            print(f"⚠️ Skipping {job.name}: started {job.last_lag:.1f}s late")
+            return False
+
+        if job.running >= job.max_concurrency:
+            job.skipped += 1
+            SCHEDULER_SKIPPED.labels(job.name).inc()
+            print(f"⚠️ Skipping {job.name}: previous run still in progress")
+            return False
+
+        job.running += 1
+        job.runs += 1
+        self._executor.submit(self._execute, job, now)
+        return True
+
+    def _execute(self, job: ScheduledJob, started: float):
+        try:
+            with SCHEDULER_JOB_SECONDS.labels(job.name).time():
+                job.func(*job.args, **job.kwargs)
+        except Exception as e:
+            print(f"❌ Scheduled job {job.name} failed: {e}")
+        finally:
+            with self._cond:
+                job.running -= 1
+            if job.interval_fn is not None:
+                self._reschedule(job, started)
 
+    def _reschedule(self, job: ScheduledJob, started: float):
+        try:
+            interval = job.interval_fn()
+            if interval > 0:
+                job.interval = interval
+        except Exception as e:
+            print(f"❌ Interval of {job.name} failed, keeping {job.interval:.0f}s: {e}")
 
+        with self._cond:
+            job.next_slot = max(started + job.interval, time.monotonic())
+            self._push(job)
+            self._cond.notify()
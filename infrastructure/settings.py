@@ -0,0 +1,55 @@
+from typing import Any
+
+
+# Settings introduced after the first release, with the value used when a
+# deployment's `config.settings.Settings` does not define them. Only the API keys,
+# `db_config`, COORD1/COORD2 and LATITUDE/LONGITUDE are required.
+SETTING_DEFAULTS = {
+    # HTTP session shared by the API clients; timeouts are (connect, read) seconds
+    "HTTP_POOL_SIZE": 10,
+    "HTTP_MAX_RETRIES": 3,
+    "HTTP_BACKOFF_FACTOR": 0.5,
+    "HTTP_CONNECT_TIMEOUT": 3.05,
+    "HTTP_READ_TIMEOUT": 30.0,
+    # Token buckets per API; a daily quota of None means unlimited
+    "GOOGLE_RATE_PER_SECOND": 10.0,
+    "GOOGLE_RATE_BURST": 10,
+    "GOOGLE_DAILY_QUOTA": None,
+    "OPENWEATHER_RATE_PER_SECOND": 1.0,
+    "OPENWEATHER_RATE_BURST": 1,
+    "OPENWEATHER_DAILY_QUOTA": None,
+    # Weather cache: seconds an observation is reused, and grid cell size
+    "WEATHER_CACHE_TTL": 600,
+    "WEATHER_CELL_SIZE_KM": 2.0,
+    # Postgres schema: "heap" (plain tables) or "partitioned" (monthly partitions)
+    "DB_SCHEMA_MODE": "heap",
+    # Local directories and files
+    "OUTBOX_DIR": "outbox",
+    "RESPONSE_ARCHIVE_DIR": "archive",
+    "ANOMALY_CHECKPOINT_PATH": "anomalies.npz",
+    # One-shot runs: cache of databases known to be at the current schema
+    # (default: schema_cache.json inside OUTBOX_DIR)
+    "SCHEMA_CACHE_PATH": None,
+    # Scheduling: route catalog, matrix zones, forecast sweeps, collector mode
+    "ROUTE_CATALOG_PATH": None,
+    "MATRIX_ZONES_PATH": None,
+    "FORECAST_OFFSETS_MINUTES": None,
+    "COLLECTOR_MODE": "local",
+    "WORKER_CONCURRENCY": 4,
+    # Adaptive sampling; a budget of None means no cap on API calls per hour
+    "ADAPTIVE_SAMPLING": False,
+    "SAMPLING_HOURLY_BUDGET": None,
+    "SAMPLING_MIN_INTERVAL": 300,
+    "SAMPLING_MAX_INTERVAL": 3600,
+    # Prometheus endpoint, off unless a port is set
+    "METRICS_PORT": None,
+    "METRICS_HOST": "127.0.0.1",
+    # Base URL for both APIs instead of the public endpoints (stand-ins, proxies)
+    "API_ROOT": None
+}
+
+
+def setting(settings, name: str) -> Any:
+    """ Value of an optional setting, falling back to SETTING_DEFAULTS """
+
+    return getattr(settings, name, SETTING_DEFAULTS[name])
@@ -0,0 +1,95 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Sequence, Tuple
+
+from infrastructure.cache import TTLCache
+
+from interfaces.gateways.weather_gateway import IWeatherDataGateway
+
+from domains.entities import WeatherConditions
+
+
+KM_PER_DEGREE_LAT = 111.32
+
+
+class CachedWeatherGateway(IWeatherDataGateway):
+    """ Weather gateway that serves every point in a grid cell from one upstream call
+
+    Coordinates are snapped to cells of roughly `cell_size_km` per side and the
+    weather at the cell centre is cached for `ttl` seconds. Every point of a cell
+    gets that one observation as is, located at the centre and under the centre's
+    record id, which is also what replaying the archived centre request produces.
+    """
+
+    def __init__(
+        self,
+        weather_gateway: IWeatherDataGateway,
+        ttl: float = 600,
+        cell_size_km: float = 2.0,
+        max_entries: int = 4096,
+        max_workers: int = 4
+    ):
+        self.gateway = weather_gateway
+        self.cell_size_km = cell_size_km
+        self.cache = TTLCache(ttl, max_entries)
+        self.max_workers = max_workers
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        lat_step = self.cell_size_km / KM_PER_DEGREE_LAT
+        row = math.floor(latitude / lat_step)
+
+        # Longitude cells widen towards the poles; size them at the row's centre latitude
+        center_lat = (row + 0.5) * lat_step
+        lon_step = lat_step / max(math.cos(math.radians(center_lat)), 1e-6)
+        col = math.floor(longitude / lon_step)
+
+        return row, col
+
+    def _center(self, cell: Tuple[int, int]) -> Tuple[float, float]:
+        row, col = cell
+        lat_step = self.cell_size_km / KM_PER_DEGREE_LAT
+        center_lat = (row + 0.5) * lat_step
+        lon_step = lat_step / max(math.cos(math.radians(center_lat)), 1e-6)
+        return round(center_lat, 6), round((col + 0.5) * lon_step, 6)
+
+    def _fetch(self, latitude: float, longitude: float) -> WeatherConditions:
+        # A failed cell comes back as None (and is not cached) instead of aborting
+        # every other cell of a batch
+        try:
+            return self.gateway.get_weather_data(latitude, longitude)
+        except Exception as e:
+            print(f"❌ Weather lookup failed at {latitude},{longitude}: {e}")
+            return None
+
+    def _load(self, cell: Tuple[int, int]) -> WeatherConditions:
+        center_lat, center_lon = self._center(cell)
+        return self.cache.get_or_load(
+            cell,
+            lambda: self._fetch(center_lat, center_lon)
+        )
+
+    def get_weather_data(
+        self,
+        latitude: str,
+        longitude: str
+    ) -> WeatherConditions:
+
+        latitude, longitude = float(latitude), float(longitude)
+        return self._load(self._cell(latitude, longitude))
+
+    def get_weather_data_many(
+        self,
+        points: Sequence[Tuple[float, float]]
+    ) -> List[WeatherConditions]:
+
+        cells = [self._cell(float(lat), float(lon)) for lat, lon in points]
+
+        # One upstream request per distinct cell
+        distinct = list(dict.fromkeys(cells))
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(distinct)) or 1) as executor:
+            by_cell: Dict[Tuple[int, int], WeatherConditions] = dict(
+                zip(distinct, executor.map(self._load, distinct))
+            )
+
+        return [by_cell[cell] for cell in cells]
+
@@ -1,18 +1,98 @@
 from datetime import datetime, timezone
-from typing import List
+from typing import List, Sequence
+import uuid
+import numpy as np
 import pytz
 
 from infrastructure.external.google_client import GoogleMapsClient
+from infrastructure.metrics import ADAPTER_SECONDS
 
 from interfaces.gateways.traffic_gateway import ITrafficDataGateway
 
-from domains.entities import Route, RouteType
+from domains.entities import Route, RouteForecast, RouteMatrix, RouteType
+
+
+CDMX_TZ = pytz.timezone('America/Mexico_City')
+
+
+def parse_routes(
+    origin: str,
+    destination: str,
+    response: dict,
+    observed_at: datetime,
+    local_tz=CDMX_TZ
+) -> List[Route]:
+    """ Routes in a computeRoutes response received at `observed_at`
+
+    Shared by live collection and archive replay. The record id is derived from
+    the observation, so a replayed response maps onto the row it produced live.
+    """
+
+    # Observation time truncated to the local minute
+    local_time = observed_at.astimezone(local_tz).replace(second=0, microsecond=0)
+    utc_time = local_time.astimezone(timezone.utc)
+
+    routes = []
+
+    for i, route in enumerate(response.get('routes', [])):
+        leg = route['legs'][0]
+
+        route_type = RouteType.PRIMARY if i == 0 else RouteType.ALTERNATIVE
+
+        routes.append(
+            Route(
+                route_type = route_type,
+                origin = origin,
+                destination = destination,
+                distance_meters = leg['distanceMeters'],
+                duration_seconds = float(leg['duration'].replace('s', '')),
+                static_duration_seconds = float(leg['staticDuration'].replace('s', '')),
+                encoded_polyline = leg["polyline"]["encodedPolyline"],
+                timestamp = utc_time,
+                record_id = str(uuid.uuid5(
+                    uuid.NAMESPACE_URL,
+                    f"route:{origin}:{destination}:{i}:{utc_time.isoformat()}"
+                ))
+            )
+        )
+
+    return routes
+
+
+def parse_forecasts(
+    origin: str,
+    destination: str,
+    response: dict,
+    observed_at: datetime,
+    departure_at: datetime
+) -> List[RouteForecast]:
+    """ Routes in a computeRoutes response for a departure at `departure_at` """
+
+    forecasts = []
+
+    for i, route in enumerate(response.get('routes', [])):
+        leg = route['legs'][0]
+
+        forecasts.append(
+            RouteForecast(
+                origin = origin,
+                destination = destination,
+                route_index = i,
+                observed_at = observed_at,
+                departure_at = departure_at,
+                distance_meters = leg.get('distanceMeters', 0),
+                duration_seconds = float(leg['duration'].replace('s', '')),
+                static_duration_seconds = float(leg['staticDuration'].replace('s', ''))
+            )
+        )
+
+    return forecasts
 
 
 class GoogleMapsTrafficAdapter(ITrafficDataGateway):
     def __init__(self, google_client: GoogleMapsClient):
         self.client = google_client
-        self.cdmx_tz = pytz.timezone('America/Mexico_City')
+        self.cdmx_tz = CDMX_TZ
     
     def get_route_data(
         self, 
@@ -20,31 +100,55 @@ class GoogleMapsTrafficAdapter(ITrafficDataGateway):
         destination: str
     ) -> List[Route]:
 
-        response = self.client.get_directions(origin, destination)
+        # The archive records the same time, so a replay derives the same record ids
+        observed_at = datetime.now(timezone.utc)
+        response = self.client.get_directions(origin, destination, observed_at)
+
+        with ADAPTER_SECONDS.labels("google_routes").time():
+            return parse_routes(origin, destination, response, observed_at, self.cdmx_tz)
+
+    def get_departure_forecast(
+        self,
+        origin: str,
+        destination: str,
+        departure_at: datetime,
+        observed_at: datetime
+    ) -> List[RouteForecast]:
 
-        # Obtain current cdmx time
+        response = self.client.get_departure_forecast(origin, destination, departure_at, observed_at)
+
+        with ADAPTER_SECONDS.labels("google_forecasts").time():
+            return parse_forecasts(origin, destination, response, observed_at, departure_at)
+
+    def get_matrix(
+        self,
+        origins: Sequence[str],
+        destinations: Sequence[str]
+    ) -> RouteMatrix:
+
+        shape = (len(origins), len(destinations))
+        durations = np.full(shape, np.nan)
+        static_durations = np.full(shape, np.nan)
+        distances = np.full(shape, np.nan)
+
+        # Observation time truncated to the local minute, like single routes
         cdmx_time = datetime.now(self.cdmx_tz).replace(second=0, microsecond=0)
-        utc_time = cdmx_time.astimezone(timezone.utc)
-
-        routes = []
-
-        for i, route in enumerate(response.get('routes', [])):
-            leg = route['legs'][0]
-
-            route_type = RouteType.PRIMARY if i == 0 else RouteType.ALTERNATIVE
-
-            routes.append(
-                Route(
-                    route_type = route_type,
-                    origin = origin,
-                    destination = destination,
-                    distance_meters = leg['distanceMeters'],
-                    duration_seconds = float(leg['duration'].replace('s', '')),
-                    static_duration_seconds = float(leg['staticDuration'].replace('s', '')),
-                    encoded_polyline = leg["polyline"]["encodedPolyline"],
-                    timestamp = utc_time
-                )
-            )
 
-        return routes
+        # Elements are written into the arrays as they stream in
+        for element in self.client.compute_route_matrix(origins, destinations):
+            if element.get("status", {}).get("code") or element.get("condition") != "ROUTE_EXISTS":
+                continue
+
+            i, j = element["originIndex"], element["destinationIndex"]
+            durations[i, j] = float(element['duration'].replace('s', ''))
+            static_durations[i, j] = float(element['staticDuration'].replace('s', ''))
+            distances[i, j] = element.get('distanceMeters', 0)
 
+        return RouteMatrix(
+            origins=list(origins),
+            destinations=list(destinations),
+            duration_seconds=durations,
+            static_duration_seconds=static_durations,
+            distance_meters=distances,
+            timestamp=cdmx_time.astimezone(timezone.utc)
+        )
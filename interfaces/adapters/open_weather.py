@@ -1,18 +1,63 @@
 from datetime import datetime, timezone
-from typing import List
+import uuid
 import pytz
 
 from infrastructure.external.weather_client import WeatherClient
+from infrastructure.metrics import ADAPTER_SECONDS
 
 from interfaces.gateways.weather_gateway import IWeatherDataGateway
 
 from domains.entities import WeatherConditions
 
 
+CDMX_TZ = pytz.timezone('America/Mexico_City')
+
+
+def weather_record_id(location: str, timestamp: datetime) -> str:
+    """ Deterministic id of the observation at `location` and `timestamp` """
+
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"weather:{location}:{timestamp.isoformat()}"))
+
+
+def parse_weather(
+    latitude: str,
+    longitude: str,
+    response: dict,
+    observed_at: datetime,
+    local_tz=CDMX_TZ
+) -> WeatherConditions:
+    """ Weather in a current-weather response received at `observed_at`
+
+    Shared by live collection and archive replay, with a record id derived from
+    the observation like `parse_routes`.
+    """
+
+    # Observation time truncated to the local minute
+    local_time = observed_at.astimezone(local_tz).replace(second=0, microsecond=0)
+    utc_time = local_time.astimezone(timezone.utc)
+    location = f"{latitude},{longitude}"
+
+    weather = WeatherConditions(
+        weather_type = response['weather'][0]['main'],
+        weather_description= response['weather'][0]['description'],
+        temperature = response['main']['temp'],
+        feels_like = response['main']['feels_like'],
+        pressure = response['main']['pressure'],
+        visibility = response['visibility'],
+        wind_speed = response['wind']['speed'],
+        humidity = response['main']['humidity'],
+        timestamp = utc_time,
+        location = location,
+        record_id = weather_record_id(location, utc_time)
+    )
+
+    return weather
+
+
 class WeatherAdapter(IWeatherDataGateway):
     def __init__(self, weather_client: WeatherClient):
         self.client = weather_client
-        self.cdmx_tz = pytz.timezone('America/Mexico_City')
+        self.cdmx_tz = CDMX_TZ
 
     def get_weather_data(
         self, 
@@ -20,28 +65,9 @@ class WeatherAdapter(IWeatherDataGateway):
         longitude: str
     ):
 
-        response = self.client.get_weather_conditions(latitude, longitude)
-
-        # Obtain current cdmx time
-        cdmx_time = datetime.now(self.cdmx_tz).replace(second=0, microsecond=0)
-        utc_time = cdmx_time.astimezone(timezone.utc)
-
-        import pdb;pdb.set_trace()
-
-        weather = WeatherConditions(
-            weather_type = response['weather'][0]['main'],
-            weather_description= response['weather'][0]['description'],
-            temperature = response['main']['temp'],
-            feels_like = response['main']['feels_like'],
-            pressure = response['main']['pressure'],
-            visibility = response['visibility'],
-            wind_speed = response['wind']['speed'],
-            humidity = response['main']['humidity'],
-            timestamp = utc_time
-        )
-
-        return weather
-
-
-
+        # The archive records the same time, so a replay derives the same record id
+        observed_at = datetime.now(timezone.utc)
+        response = self.client.get_weather_conditions(latitude, longitude, observed_at)
 
+        with ADAPTER_SECONDS.labels("open_weather").time():
+            return parse_weather(latitude, longitude, response, observed_at, self.cdmx_tz)
@@ -0,0 +1,132 @@
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from infrastructure.geometry import pack_polyline, unpack_coordinates
+
+from interfaces.gateways.traffic_gateway import ITrafficDataGateway
+
+from domains.entities import Route, RouteForecast, RouteMatrix, RouteVariant
+from domains.repositories import IRouteVariantRepository
+from domains.route_variants import VariantIndex
+
+
+def _coordinates(encoded_polyline: str) -> np.ndarray:
+    return unpack_coordinates(pack_polyline(encoded_polyline)[2])
+
+
+class RouteVariantGateway(ITrafficDataGateway):
+    """ Traffic gateway that labels every route with a stable `variant_id`
+
+    Google orders alternatives by current travel time, so the route index says
+    nothing about which road was taken. Each polyline is matched against the
+    known variants of its origin/destination; a path within `tolerance_m` of a
+    variant reuses its id, anything else becomes a new variant identified by
+    its geometry hash. Variants are loaded per origin/destination on first use
+    and kept in memory afterwards.
+    """
+
+    def __init__(
+        self,
+        traffic_gateway: ITrafficDataGateway,
+        variant_repo: IRouteVariantRepository,
+        samples: int = 96,
+        tolerance_m: float = 150.0,
+        length_tolerance: float = 0.15
+    ):
+        self.gateway = traffic_gateway
+        self.variant_repo = variant_repo
+        self.samples = samples
+        self.tolerance_m = tolerance_m
+        self.length_tolerance = length_tolerance
+
+        self._indexes: Dict[Tuple[str, str], VariantIndex] = {}
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    def _lock(self, key: Tuple[str, str]) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _index(self, key: Tuple[str, str], ref_lat: float) -> VariantIndex:
+        """ Index of the known variants of `key`, loaded on first use; call under its lock """
+
+        index = self._indexes.get(key)
+        if index is not None:
+            return index
+
+        variants = self.variant_repo.load_variants(*key)
+        if variants:
+            ref_lat = float(_coordinates(variants[0].encoded_polyline)[0, 0])
+
+        index = VariantIndex(ref_lat, self.samples, self.tolerance_m, self.length_tolerance)
+        for variant in variants:
+            index.add(variant.variant_id, index.signature(_coordinates(variant.encoded_polyline)))
+
+        self._indexes[key] = index
+        return index
+
+    def label(self, routes: List[Route]) -> List[Route]:
+        """ Set `variant_id` on routes of one origin/destination, registering new variants """
+
+        drawn = [route for route in routes if route.encoded_polyline]
+        if not drawn:
+            return routes
+
+        key = (drawn[0].origin, drawn[0].destination)
+        packed = [pack_polyline(route.encoded_polyline) for route in drawn]
+        coordinates = [unpack_coordinates(blob) for _, _, blob in packed]
+
+        with self._lock(key):
+            index = self._index(key, float(coordinates[0][0, 0]))
+            signatures = [index.signature(coords) for coords in coordinates]
+
+            new_variants = []
+            matches = index.match(signatures)
+            for route, (geometry_hash, _, _), signature, match in zip(drawn, packed, signatures, matches):
+                if match is not None:
+                    route.variant_id = index.variant_ids[match]
+                    continue
+
+                route.variant_id = geometry_hash
+                index.add(route.variant_id, signature)
+                new_variants.append(RouteVariant(
+                    variant_id=route.variant_id,
+                    origin=route.origin,
+                    destination=route.destination,
+                    encoded_polyline=route.encoded_polyline,
+                    first_seen=route.timestamp or datetime.now(timezone.utc)
+                ))
+
+            if new_variants:
+                self.variant_repo.save_variants(new_variants)
+
+        return routes
+
+    def get_route_data(
+        self,
+        origin: str,
+        destination: str
+    ) -> List[Route]:
+
+        return self.label(self.gateway.get_route_data(origin, destination))
+
+    def get_departure_forecast(
+        self,
+        origin: str,
+        destination: str,
+        departure_at: datetime,
+        observed_at: datetime
+    ) -> List[RouteForecast]:
+
+        return self.gateway.get_departure_forecast(origin, destination, departure_at, observed_at)
+
+    def get_matrix(
+        self,
+        origins: Sequence[str],
+        destinations: Sequence[str]
+    ) -> RouteMatrix:
+
+        return self.gateway.get_matrix(origins, destinations)
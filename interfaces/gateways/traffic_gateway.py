@@ -1,7 +1,14 @@
 from abc import ABC, abstractmethod
-from domains.entities import Route
-from datetime import datetime
-from typing import List
+from domains.entities import Route, RouteForecast, RouteMatrix, RouteType
+from datetime import datetime, timezone
+from typing import List, Sequence
+
+import numpy as np
+
+
+class RateLimitDeferred(Exception):
+    """ The call was not attempted; callers should retry it in a later cycle """
+
 
 class ITrafficDataGateway(ABC):
     @abstractmethod
@@ -10,4 +17,47 @@ class ITrafficDataGateway(ABC):
         origin: str, 
         destination: str
     ) -> List[Route]:
-        pass
\ No newline at end of file
+        pass
+
+    def get_departure_forecast(
+        self,
+        origin: str,
+        destination: str,
+        departure_at: datetime,
+        observed_at: datetime
+    ) -> List[RouteForecast]:
+        """ Routes predicted at `observed_at` for a future departure """
+
+        raise NotImplementedError(f"{type(self).__name__} does not support departure-time forecasts")
+
+    def get_matrix(
+        self,
+        origins: Sequence[str],
+        destinations: Sequence[str]
+    ) -> RouteMatrix:
+        """ Primary route metrics for every origin/destination pair
+
+        Falls back to one route request per pair; gateways with a batch API override it.
+        """
+
+        shape = (len(origins), len(destinations))
+        matrix = RouteMatrix(
+            origins=list(origins),
+            destinations=list(destinations),
+            duration_seconds=np.full(shape, np.nan),
+            static_duration_seconds=np.full(shape, np.nan),
+            distance_meters=np.full(shape, np.nan),
+            timestamp=datetime.now(timezone.utc)
+        )
+
+        for i, origin in enumerate(origins):
+            for j, destination in enumerate(destinations):
+                if origin == destination:
+                    continue
+                for route in self.get_route_data(origin, destination):
+                    if route.route_type == RouteType.PRIMARY:
+                        matrix.duration_seconds[i, j] = route.duration_seconds
+                        matrix.static_duration_seconds[i, j] = route.static_duration_seconds
+                        matrix.distance_meters[i, j] = route.distance_meters
+
+        return matrix
@@ -1,7 +1,7 @@
 from abc import ABC, abstractmethod
 from domains.entities import WeatherConditions
 from datetime import datetime
-from typing import List
+from typing import List, Sequence, Tuple
 
 class IWeatherDataGateway(ABC):
     @abstractmethod
@@ -10,4 +10,12 @@ class IWeatherDataGateway(ABC):
         latitude: str,
         longitude: str
     ) -> List[WeatherConditions]:
-        pass
\ No newline at end of file
+        pass
+
+    def get_weather_data_many(
+        self,
+        points: Sequence[Tuple[float, float]]
+    ) -> List[WeatherConditions]:
+        """ Weather for each (latitude, longitude) point, in order """
+
+        return [self.get_weather_data(lat, lon) for lat, lon in points]
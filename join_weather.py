@@ -0,0 +1,61 @@
+import argparse
+import time
+from datetime import datetime, timedelta
+
+import pyarrow.parquet as pq
+
+from main import Container
+
+
+def _parse_datetime(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Join every route observation with the latest weather before it, into Parquet"
+    )
+    parser.add_argument("output", help="Parquet file to write")
+    parser.add_argument("--start", type=_parse_datetime, help="ISO timestamp, inclusive")
+    parser.add_argument("--end", type=_parse_datetime, help="ISO timestamp, exclusive")
+    parser.add_argument(
+        "--tolerance-minutes", type=float, default=60,
+        help="Oldest weather observation a route may take"
+    )
+    parser.add_argument(
+        "--by-location", action="store_true",
+        help="Only use weather from the location nearest to each route's start"
+    )
+    parser.add_argument("--max-cell-distance-km", type=float)
+    parser.add_argument("--batch-size", type=int, default=50000)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    container = Container()
+    join = container.route_weather_join(
+        tolerance=timedelta(minutes=args.tolerance_minutes),
+        batch_size=args.batch_size,
+        max_cell_distance_km=args.max_cell_distance_km
+    )
+
+    print(f"🔍 Joining routes with weather into {args.output}")
+    started = time.perf_counter()
+    rows = matched = 0
+
+    with pq.ParquetWriter(args.output, join.empty_table().schema, compression="zstd") as writer:
+        for chunk in join.iter_joined(args.start, args.end, args.by_location):
+            writer.write_table(chunk)
+            rows += chunk.num_rows
+            matched += chunk.num_rows - chunk["weather_id"].null_count
+
+    print(
+        f"✅ Joined {rows} routes ({matched} with weather) "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+    container.db_pool().close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,53 @@
 from datetime import datetime
-import time
+from functools import partial
+from typing import Dict, List
 from dependency_injector import containers, providers
 
 from config.settings import Settings
 
+from infrastructure.database.forecasts import (
+    PostgresRouteForecastRepository, SQLiteRouteForecastRepository
+)
+from infrastructure.database.pool import PostgresConnectionPool
+from infrastructure.database.route_matrix import (
+    PostgresRouteMatrixRepository, SQLiteRouteMatrixRepository, zone_set_hash
+)
+from infrastructure.database.route_variants import (
+    PostgresRouteVariantRepository, SQLiteRouteVariantRepository
+)
+from infrastructure.database.sqlite_engine import SQLiteEngine
+from infrastructure.database.task_queue import PostgresTaskQueue
+from infrastructure.database.rollups import (
+    PostgresCongestionRollupRepository, SQLiteCongestionRollupRepository
+)
 from infrastructure.database.repositories import (
     PostgresTrafficRepository, PostgresWeatherRepository,
     SQLiteTrafficRepository, SQLiteWeatherRepository
 )
 
-from infrastructure.external.google_client import GoogleMapsClient
-from infrastructure.external.weather_client import WeatherClient
+from infrastructure.metrics import POOL_CONNECTIONS, QUEUE_DEPTH, MetricsServer
+from infrastructure.outbox import (
+    DurableOutbox, OutboxDrainer, OutboxTrafficRepository, OutboxWeatherRepository
+)
+from infrastructure.route_catalog import load_route_catalog, load_zone_list
 from infrastructure.scheduler import BackgroundScheduler
+from infrastructure.settings import setting
 
-from interfaces.adapters.google_maps import GoogleMapsTrafficAdapter
-from interfaces.adapters.open_weather import WeatherAdapter
+from domains.entities import CollectionTask, RoutePair
 
+from use_cases.analytics.congestion_rollups import CongestionRollupUseCase
+from use_cases.analytics.route_spatial_index import RouteSpatialIndexUseCase
+from use_cases.analytics.weather_join import RouteWeatherJoinUseCase
+from use_cases.data_collection.collect_departure_forecasts import CollectDepartureForecastsUseCase
+from use_cases.data_collection.collect_route_catalog import CollectRouteCatalogUseCase
+from use_cases.data_collection.collect_route_matrix import CollectRouteMatrixUseCase
 from use_cases.data_collection.collect_traffic_data import CollectTrafficDataUseCase
+from use_cases.data_collection.adaptive_sampling import AdaptiveSamplingUseCase
 from use_cases.data_collection.collect_weather_data import CollectWeatherDataUseCase
+from use_cases.data_collection.collection_worker import CollectionWorkerUseCase, TaskHandler
+from use_cases.data_collection.replay_archive import ReplayArchiveUseCase
+
+import wiring
 
 
 class Container(containers.DeclarativeContainer):
@@ -27,60 +57,239 @@ class Container(containers.DeclarativeContainer):
     settings = providers.Singleton(Settings)
     scheduler = providers.Singleton(BackgroundScheduler)
 
+    # HTTP
+    http_session = providers.Singleton(wiring.build_session, settings)
+
+    # Rate limits - one budget per API, shared by every collector
+    google_rate_limiter = providers.Singleton(wiring.build_rate_limiter, settings, "GOOGLE")
+    weather_rate_limiter = providers.Singleton(wiring.build_rate_limiter, settings, "OPENWEATHER")
+
+    # Raw responses, kept for replaying into new or rebuilt tables
+    response_archive = providers.Singleton(wiring.build_response_archive, settings)
+
     # Clients
     google_client = providers.Factory(
-        GoogleMapsClient,
-        api_key=settings.provided.GOOGLE_MAPS_API_KEY
+        wiring.build_google_client,
+        settings=settings,
+        session=http_session,
+        rate_limiter=google_rate_limiter,
+        archive=response_archive
     )
 
     weather_client = providers.Factory(
-        WeatherClient,
-        api_key=settings.provided.OPENWEATHER_API_KEY
+        wiring.build_weather_client,
+        settings=settings,
+        session=http_session,
+        rate_limiter=weather_rate_limiter,
+        archive=response_archive
     )
 
     # Gateways
-    traffic_gateway = providers.Factory(
-        GoogleMapsTrafficAdapter,
-        google_client=google_client
+    weather_gateway = providers.Singleton(
+        wiring.build_weather_gateway,
+        settings=settings,
+        weather_client=weather_client
     )
 
-    weather_gateway = providers.Factory(
-        WeatherAdapter,
-        weather_client=weather_client
+    # Database - Production
+    db_pool = providers.Singleton(
+        PostgresConnectionPool,
+        db_config=settings.provided.db_config
     )
 
+    # Schema mode: "heap" (plain tables) or "partitioned" (monthly partitions)
+    partition_manager = providers.Singleton(wiring.build_partition_manager, settings, db_pool)
+
     # Repositories - Production
     traffic_repository = providers.Singleton(
         PostgresTrafficRepository,
-        db_config=settings.provided.db_config
+        pool=db_pool,
+        partitions=partition_manager
     )
 
     weather_repository = providers.Singleton(
         PostgresWeatherRepository,
-        db_config=settings.provided.db_config
+        pool=db_pool,
+        partitions=partition_manager
+    )
+
+    rollup_repository = providers.Singleton(
+        PostgresCongestionRollupRepository,
+        pool=db_pool
+    )
+
+    matrix_repository = providers.Singleton(
+        PostgresRouteMatrixRepository,
+        pool=db_pool
     )
 
+    forecast_repository = providers.Singleton(
+        PostgresRouteForecastRepository,
+        pool=db_pool
+    )
+
+    variant_repository = providers.Singleton(
+        PostgresRouteVariantRepository,
+        pool=db_pool
+    )
+
+    # Work queue shared by every collector process in distributed mode
+    task_queue = providers.Singleton(
+        PostgresTaskQueue,
+        pool=db_pool
+    )
+
+    # # Database - Development
+    # sqlite_engine = providers.Singleton(
+    #     SQLiteEngine,
+    #     db_path="traffic_data.db"
+    # )
+
     # # Repositories - Development
     # traffic_repository = providers.Singleton(
     #     SQLiteTrafficRepository,
-    #     db_path="traffic_data.db"
+    #     engine=sqlite_engine
     # )
 
     # weather_repository = providers.Singleton(
     #     SQLiteWeatherRepository,
-    #     db_path="traffic_data.db"
+    #     engine=sqlite_engine
+    # )
+
+    # rollup_repository = providers.Singleton(
+    #     SQLiteCongestionRollupRepository,
+    #     engine=sqlite_engine
+    # )
+
+    # matrix_repository = providers.Singleton(
+    #     SQLiteRouteMatrixRepository,
+    #     engine=sqlite_engine
+    # )
+
+    # forecast_repository = providers.Singleton(
+    #     SQLiteRouteForecastRepository,
+    #     engine=sqlite_engine
+    # )
+
+    # variant_repository = providers.Singleton(
+    #     SQLiteRouteVariantRepository,
+    #     engine=sqlite_engine
     # )
 
+    # Traffic gateway - labels route variants, so it is wired after the repositories
+    traffic_gateway = providers.Singleton(
+        wiring.build_traffic_gateway,
+        google_client=google_client,
+        variant_repo=variant_repository
+    )
+
+    # Outbox - collectors spool locally, the drainer replays into the repositories
+    outbox = providers.Singleton(
+        DurableOutbox,
+        directory=providers.Callable(setting, settings, "OUTBOX_DIR")
+    )
+
+    outbox_traffic_repository = providers.Singleton(
+        OutboxTrafficRepository,
+        outbox=outbox,
+        repository=traffic_repository
+    )
+
+    outbox_weather_repository = providers.Singleton(
+        OutboxWeatherRepository,
+        outbox=outbox,
+        repository=weather_repository
+    )
+
+    outbox_drainer = providers.Singleton(
+        OutboxDrainer,
+        outbox=outbox,
+        traffic_repo=traffic_repository,
+        weather_repo=weather_repository
+    )
+
     # Use Cases
+    congestion_rollups = providers.Singleton(
+        CongestionRollupUseCase,
+        rollup_repo=rollup_repository,
+        traffic_repo=traffic_repository
+    )
+
+    # Loaded from the database on the first query, then fed by the collectors
+    route_spatial_index = providers.Singleton(
+        RouteSpatialIndexUseCase,
+        traffic_repo=traffic_repository
+    )
+
+    # Restored from its checkpoint file, then fed by the collectors
+    duration_anomalies = providers.Singleton(
+        wiring.build_duration_anomalies,
+        settings=settings,
+        traffic_repo=traffic_repository
+    )
+
+    route_weather_join = providers.Factory(
+        RouteWeatherJoinUseCase,
+        traffic_repo=traffic_repository,
+        weather_repo=weather_repository
+    )
+
+    adaptive_sampling = providers.Singleton(
+        AdaptiveSamplingUseCase,
+        traffic_repo=traffic_repository,
+        rollup_repo=rollup_repository,
+        hourly_budget=providers.Callable(setting, settings, "SAMPLING_HOURLY_BUDGET"),
+        min_interval=providers.Callable(setting, settings, "SAMPLING_MIN_INTERVAL"),
+        max_interval=providers.Callable(setting, settings, "SAMPLING_MAX_INTERVAL")
+    )
+
     collect_traffic_use_case = providers.Factory(
         CollectTrafficDataUseCase,
         traffic_gateway=traffic_gateway,
-        traffic_repo=traffic_repository
+        traffic_repo=outbox_traffic_repository,
+        rollups=congestion_rollups,
+        spatial_index=route_spatial_index,
+        anomalies=duration_anomalies
+    )
+
+    collect_route_catalog_use_case = providers.Factory(
+        wiring.build_route_catalog_use_case,
+        traffic_gateway=traffic_gateway,
+        traffic_repo=outbox_traffic_repository,
+        rollups=congestion_rollups,
+        spatial_index=route_spatial_index,
+        anomalies=duration_anomalies
+    )
+
+    collect_route_matrix_use_case = providers.Factory(
+        CollectRouteMatrixUseCase,
+        traffic_gateway=traffic_gateway,
+        matrix_repo=matrix_repository
+    )
+
+    collect_departure_forecasts_use_case = providers.Factory(
+        CollectDepartureForecastsUseCase,
+        traffic_gateway=traffic_gateway,
+        forecast_repo=forecast_repository,
+        max_workers=16
     )
 
     collect_weather_use_case = providers.Factory(
         CollectWeatherDataUseCase,
         weather_gateway=weather_gateway,
+        weather_repo=outbox_weather_repository
+    )
+
+    collection_worker = providers.Singleton(
+        CollectionWorkerUseCase,
+        task_queue=task_queue,
+        max_concurrency=providers.Callable(setting, settings, "WORKER_CONCURRENCY")
+    )
+
+    replay_archive_use_case = providers.Factory(
+        ReplayArchiveUseCase,
+        archive=response_archive,
+        traffic_repo=traffic_repository,
         weather_repo=weather_repository
     )
 
@@ -88,13 +297,14 @@ class Container(containers.DeclarativeContainer):
 def collect_and_store_route_data(
     use_case: CollectTrafficDataUseCase, 
     origin: str, 
-    destination: str
+    destination: str,
+    round_trip: bool = True
 ) -> bool:
 
     print(f"🔍 Collecting Route Data: {origin} → {destination}")
     
     try:
-        success = use_case.execute(origin, destination, round_trip=True)
+        success = use_case.execute(origin, destination, round_trip=round_trip)
         
         if success:
             print("✅ Traffic Data saved succesfully")
@@ -105,6 +315,63 @@ def collect_and_store_route_data(
         print(f"❌ Error while traffic collecting data: {str(e)}")
         return False
     
+def collect_and_store_route_catalog_data(
+    use_case: CollectRouteCatalogUseCase,
+    pairs: List[RoutePair]
+) -> bool:
+
+    print(f"🔍 Collecting Route Data for {len(pairs)} routes")
+
+    try:
+        success = use_case.execute(pairs)
+
+        if success:
+            print("✅ Traffic Data saved succesfully")
+        else:
+            print("⚠️ Traffic Data Collecting finished with errors")
+        return success
+    except Exception as e:
+        print(f"❌ Error while traffic collecting data: {str(e)}")
+        return False
+
+def collect_and_store_route_matrix(
+    use_case: CollectRouteMatrixUseCase,
+    zones: List[str]
+) -> bool:
+
+    print(f"🔍 Collecting Route Matrix for {len(zones)} zones")
+
+    try:
+        success = use_case.execute(zones)
+
+        if success:
+            print("✅ Route Matrix saved succesfully")
+        else:
+            print("⚠️ Route Matrix Collecting successfull! Error on saving data")
+        return success
+    except Exception as e:
+        print(f"❌ Error while collecting route matrix: {str(e)}")
+        return False
+
+def collect_and_store_departure_forecasts(
+    use_case: CollectDepartureForecastsUseCase,
+    pairs: List[RoutePair]
+) -> bool:
+
+    print(f"🔍 Sweeping {len(use_case.offsets)} departure times for {len(pairs)} routes")
+
+    try:
+        success = use_case.execute(pairs)
+
+        if success:
+            print("✅ Departure forecasts saved succesfully")
+        else:
+            print("⚠️ Departure forecast sweep finished with errors")
+        return success
+    except Exception as e:
+        print(f"❌ Error while sweeping departure forecasts: {str(e)}")
+        return False
+
 def collect_and_store_weather_data(
     use_case: CollectWeatherDataUseCase,
     longitude: float,
@@ -122,6 +389,165 @@ def collect_and_store_weather_data(
         print(f"❌ Error while weather collecting data: {str(e)}")
         return False
 
+def report_outbox(drainer: OutboxDrainer):
+    stats = drainer.stats()
+    print(
+        f"📦 Outbox backlog: {stats['backlog_bytes']} bytes in {stats['backlog_segments']} segments, "
+        f"draining {stats['drain_rate_per_second']:.1f} records/s"
+    )
+
+def report_sampling(policy: AdaptiveSamplingUseCase):
+    for rate in policy.report():
+        print(
+            f"📈 {rate.origin} → {rate.destination}: every {rate.interval / 60:.0f} min "
+            f"(target {rate.target_per_hour:.1f}/h, effective {rate.effective_per_hour:.1f}/h, "
+            f"urgency {rate.urgency:.2f})"
+        )
+
+
+def register_runtime_gauges(
+    container: Container,
+    scheduler: BackgroundScheduler,
+    worker: CollectionWorkerUseCase = None
+):
+    """ Queue depths and pool usage, read from the live components at scrape time """
+
+    pool = container.db_pool()
+    POOL_CONNECTIONS.labels("in_use").set_function(lambda: pool.in_use)
+    POOL_CONNECTIONS.labels("open").set_function(lambda: pool.size)
+
+    outbox_drainer = container.outbox_drainer()
+    QUEUE_DEPTH.labels("outbox_bytes").set_function(lambda: outbox_drainer.stats()["backlog_bytes"])
+    QUEUE_DEPTH.labels("scheduler_pending").set_function(lambda: scheduler.pending_jobs)
+    QUEUE_DEPTH.labels("scheduler_running").set_function(lambda: scheduler.running_jobs)
+
+    if hasattr(container, "sqlite_engine"):
+        engine = container.sqlite_engine()
+        QUEUE_DEPTH.labels("sqlite_writes").set_function(lambda: engine.queue_depth)
+
+    if worker is not None:
+        QUEUE_DEPTH.labels("worker_in_flight").set_function(lambda: worker.stats()["in_flight"])
+
+
+def schedule_adaptive_collection(
+    container: Container,
+    scheduler: BackgroundScheduler,
+    pairs: List[RoutePair]
+):
+    """ One job per route pair, each re-timed by the sampling policy after every run """
+
+    policy = container.adaptive_sampling()
+    policy.register(pairs)
+    print(f"🔍 Sampling policy warmed up with {policy.warm_up()} stored routes")
+
+    use_case = container.collect_traffic_use_case(sampling=policy)
+
+    # Spread first runs so the pairs do not all hit the API at once
+    spread = policy.min_interval / max(len(pairs), 1)
+
+    for i, pair in enumerate(pairs):
+        scheduler.schedule_job(
+            collect_and_store_route_data,
+            partial(policy.interval_for, pair),
+            kwargs=dict(
+                use_case=use_case,
+                origin=pair.origin,
+                destination=pair.destination,
+                round_trip=pair.round_trip
+            ),
+            name=f"route {pair.origin} → {pair.destination}",
+            first_run_delay=i * spread
+        )
+
+    scheduler.schedule_job(report_sampling, 900, args=(policy,), name="sampling-report")
+
+def build_collection_tasks(
+    settings,
+    pairs: List[RoutePair],
+    zones: List[str] = None,
+    forecast_offsets: List[int] = None
+) -> List[CollectionTask]:
+    """ Route catalog, zone matrix, forecast sweeps and the weather point as hourly queue tasks """
+
+    tasks = [
+        CollectionTask(
+            kind="route",
+            key=f"route:{pair.origin}:{pair.destination}",
+            payload={
+                "origin": pair.origin,
+                "destination": pair.destination,
+                "round_trip": pair.round_trip
+            },
+            interval_seconds=3600
+        )
+        for pair in pairs
+    ]
+    if forecast_offsets:
+        tasks.extend(
+            CollectionTask(
+                kind="forecast",
+                key=f"forecast:{pair.origin}:{pair.destination}",
+                payload={
+                    "origin": pair.origin,
+                    "destination": pair.destination,
+                    "round_trip": pair.round_trip,
+                    "offsets_minutes": list(forecast_offsets)
+                },
+                interval_seconds=3600
+            )
+            for pair in pairs
+        )
+    if zones:
+        tasks.append(CollectionTask(
+            kind="matrix",
+            key=f"matrix:{zone_set_hash(zones, zones)}",
+            payload={"zones": zones},
+            interval_seconds=3600
+        ))
+    tasks.append(CollectionTask(
+        kind="weather",
+        key=f"weather:{settings.LATITUDE},{settings.LONGITUDE}",
+        payload={"latitude": settings.LATITUDE, "longitude": settings.LONGITUDE},
+        interval_seconds=3600
+    ))
+    return tasks
+
+
+def build_task_handlers(container: Container) -> Dict[str, TaskHandler]:
+    traffic_use_case = container.collect_traffic_use_case()
+    weather_use_case = container.collect_weather_use_case()
+    matrix_use_case = container.collect_route_matrix_use_case()
+    forecast_use_cases: Dict[tuple, CollectDepartureForecastsUseCase] = {}
+
+    def forecast(payload: dict) -> bool:
+        # One sweep use case (and thread pool) per distinct offset set
+        offsets = tuple(payload["offsets_minutes"])
+        if offsets not in forecast_use_cases:
+            forecast_use_cases[offsets] = container.collect_departure_forecasts_use_case(
+                offsets_minutes=offsets
+            )
+        pair = RoutePair(payload["origin"], payload["destination"], payload.get("round_trip", True))
+        return collect_and_store_departure_forecasts(forecast_use_cases[offsets], [pair])
+
+    return {
+        "route": lambda payload: collect_and_store_route_data(
+            traffic_use_case,
+            payload["origin"],
+            payload["destination"],
+            payload.get("round_trip", True)
+        ),
+        "forecast": forecast,
+        "matrix": lambda payload: collect_and_store_route_matrix(
+            matrix_use_case,
+            payload["zones"]
+        ),
+        "weather": lambda payload: collect_and_store_weather_data(
+            weather_use_case,
+            payload["longitude"],
+            payload["latitude"]
+        )
+    }
+
 
 def main():
     # Initialize Container
@@ -132,31 +558,115 @@ def main():
     scheduler = container.scheduler()
 
     # Resolve use cases
-    traffic_use_case = container.collect_traffic_use_case()
     weather_use_case = container.collect_weather_use_case()
 
+    # Anomaly statistics come from the last checkpoint, or once from stored history
+    anomalies = container.duration_anomalies()
+    if not anomalies.restored:
+        print(f"🔍 Anomaly statistics warmed up with {anomalies.warm_up()} stored routes")
+
     # Schedule - Traffic Data Collection
-    scheduler.schedule_hourly_job(
-        collect_and_store_route_data,
-        use_case=traffic_use_case,
-        origin=settings.COORD1,
-        destination=settings.COORD2
-    )
+    catalog_path = setting(settings, "ROUTE_CATALOG_PATH")
+    zones_path = setting(settings, "MATRIX_ZONES_PATH")
+    zones = load_zone_list(zones_path) if zones_path else []
+    forecast_offsets = setting(settings, "FORECAST_OFFSETS_MINUTES")
+    distributed = setting(settings, "COLLECTOR_MODE") == "distributed"
+    worker = None
 
-    # Schedule - Weather Data Collection
-    scheduler.schedule_hourly_job(
-        collect_and_store_weather_data,
-        use_case=weather_use_case,
-        longitude=settings.LONGITUDE,
-        latitude=settings.LATITUDE
-    )
+    if distributed or forecast_offsets or setting(settings, "ADAPTIVE_SAMPLING"):
+        pairs = (
+            load_route_catalog(catalog_path) if catalog_path
+            else [RoutePair(settings.COORD1, settings.COORD2)]
+        )
+
+    if distributed:
+        # Every instance upserts the same catalog; the queue hands each task to one worker
+        synced = container.task_queue().sync_tasks(
+            build_collection_tasks(settings, pairs, zones, forecast_offsets)
+        )
+        print(f"🔍 {synced} collection tasks synced to the shared queue")
+
+        worker = container.collection_worker(handlers=build_task_handlers(container))
+        worker.start()
+    elif setting(settings, "ADAPTIVE_SAMPLING"):
+        schedule_adaptive_collection(container, scheduler, pairs)
+    elif catalog_path:
+        scheduler.schedule_hourly_job(
+            collect_and_store_route_catalog_data,
+            use_case=container.collect_route_catalog_use_case(),
+            pairs=load_route_catalog(catalog_path)
+        )
+    else:
+        scheduler.schedule_hourly_job(
+            collect_and_store_route_data,
+            use_case=container.collect_traffic_use_case(),
+            origin=settings.COORD1,
+            destination=settings.COORD2
+        )
+
+    # Schedule - Zone-to-zone matrix (a queue task in distributed mode)
+    if zones and not distributed:
+        scheduler.schedule_hourly_job(
+            collect_and_store_route_matrix,
+            use_case=container.collect_route_matrix_use_case(),
+            zones=zones
+        )
+
+    # Schedule - Departure-time forecast sweeps (queue tasks in distributed mode)
+    if forecast_offsets and not distributed:
+        scheduler.schedule_hourly_job(
+            collect_and_store_departure_forecasts,
+            use_case=container.collect_departure_forecasts_use_case(offsets_minutes=forecast_offsets),
+            pairs=pairs
+        )
+
+    # Schedule - Weather Data Collection (a queue task in distributed mode)
+    if not distributed:
+        scheduler.schedule_hourly_job(
+            collect_and_store_weather_data,
+            use_case=weather_use_case,
+            longitude=settings.LONGITUDE,
+            latitude=settings.LATITUDE
+        )
+
+    # Schedule - Create upcoming monthly partitions
+    partition_manager = container.partition_manager()
+    if partition_manager is not None:
+        scheduler.schedule_job(partition_manager.maintain, 86400, name="partition-maintenance")
+
+    # Replay spooled observations into the database in the background
+    outbox_drainer = container.outbox_drainer()
+    outbox_drainer.start()
+    scheduler.schedule_job(report_outbox, 300, args=(outbox_drainer,), name="outbox-report")
+
+    # Metrics - Prometheus text format on a local port
+    metrics_server = None
+    metrics_port = setting(settings, "METRICS_PORT")
+    if metrics_port:
+        register_runtime_gauges(container, scheduler, worker)
+        metrics_server = MetricsServer(
+            host=setting(settings, "METRICS_HOST"),
+            port=int(metrics_port)
+        )
+        metrics_server.start()
 
     # Run script indefinitely 
     try:
-        while True:
-            time.sleep(1)
+        scheduler.run()
     except KeyboardInterrupt:
         print("\nStoping Program...")
+    finally:
+        scheduler.shutdown()
+        anomalies.checkpoint()
+        if metrics_server is not None:
+            metrics_server.stop()
+        if worker is not None:
+            worker.stop()
+        outbox_drainer.stop()
+        container.outbox().close()
+        container.response_archive().close()
+        container.db_pool().close()
+        container.http_session().close()
 
 
 if __name__ == "__main__":
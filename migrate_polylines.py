@@ -0,0 +1,14 @@
+from main import Container
+
+
+def main():
+    container = Container()
+    traffic_repo = container.traffic_repository()
+
+    print("🔍 Moving inline polylines into route_geometries")
+    migrated = traffic_repo.migrate_polylines()
+    print(f"✅ Migrated {migrated} routes")
+
+
+if __name__ == "__main__":
+    main()
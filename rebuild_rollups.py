@@ -0,0 +1,14 @@
+from main import Container
+
+
+def main():
+    container = Container()
+    rollups = container.congestion_rollups()
+
+    print("🔍 Rebuilding congestion rollups from stored routes")
+    processed = rollups.rebuild()
+    print(f"✅ Rebuilt rollups from {processed} routes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import argparse
+from datetime import datetime
+
+from main import Container
+
+from infrastructure.external.response_archive import GOOGLE_ROUTES, OPENWEATHER
+
+
+def _parse_datetime(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Re-ingest archived raw API responses without calling the APIs"
+    )
+    parser.add_argument(
+        "--source", choices=[GOOGLE_ROUTES, OPENWEATHER], action="append",
+        help="Archive source to replay, repeatable (default: all)"
+    )
+    parser.add_argument("--start", type=_parse_datetime, help="ISO timestamp, inclusive")
+    parser.add_argument("--end", type=_parse_datetime, help="ISO timestamp, exclusive")
+    parser.add_argument("--processes", type=int, help="Parser processes (default: CPU count)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    container = Container()
+    use_case = container.replay_archive_use_case(processes=args.processes)
+
+    sources = args.source or [GOOGLE_ROUTES, OPENWEATHER]
+    print(f"🔍 Replaying archived responses from {', '.join(sources)}")
+    replayed = use_case.execute(start=args.start, end=args.end, sources=sources)
+
+    for source, count in replayed.items():
+        print(f"✅ {source}: {count} records replayed")
+
+    container.db_pool().close()
+
+
+if __name__ == "__main__":
+    main()
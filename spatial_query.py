@@ -0,0 +1,72 @@
+import argparse
+import json
+import time
+
+from main import Container
+
+
+def _load_polygon(path: str):
+    """ Outer ring of a GeoJSON Polygon (geometry, Feature or first Feature of a collection) as (lat, lng) """
+
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    if data.get("type") == "FeatureCollection":
+        data = data["features"][0]
+    if data.get("type") == "Feature":
+        data = data["geometry"]
+    if data.get("type") != "Polygon":
+        raise ValueError(f"{path}: expected a GeoJSON Polygon, got {data.get('type')}")
+
+    # GeoJSON positions are [lng, lat]
+    return [(lat, lng) for lng, lat, *_ in data["coordinates"][0]]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Find collected routes by location, from the in-memory spatial index"
+    )
+    queries = parser.add_subparsers(dest="query", required=True)
+
+    bbox = queries.add_parser("bbox", help="Routes crossing a lat/lng box")
+    for name in ("min_lat", "min_lng", "max_lat", "max_lng"):
+        bbox.add_argument(name, type=float)
+
+    polygon = queries.add_parser("polygon", help="Routes inside or crossing a GeoJSON polygon")
+    polygon.add_argument("geojson")
+
+    nearest = queries.add_parser("nearest", help="Routes passing closest to a point")
+    nearest.add_argument("lat", type=float)
+    nearest.add_argument("lng", type=float)
+    nearest.add_argument("-k", type=int, default=5)
+    nearest.add_argument("--max-distance", type=float, default=float("inf"), help="Meters")
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    container = Container()
+    index = container.route_spatial_index()
+    index.load()
+
+    started = time.perf_counter()
+    if args.query == "bbox":
+        hits = index.routes_in_bbox(args.min_lat, args.min_lng, args.max_lat, args.max_lng)
+    elif args.query == "polygon":
+        hits = index.routes_in_polygon(_load_polygon(args.geojson))
+    else:
+        hits = index.nearest_routes(args.lat, args.lng, args.k, args.max_distance)
+    elapsed = (time.perf_counter() - started) * 1000
+
+    for hit in hits:
+        distance = f" at {hit.distance_m:.0f} m" if hit.distance_m is not None else ""
+        pairs = ", ".join(f"{origin} → {destination}" for origin, destination in hit.pairs)
+        print(f"📍 {hit.polyline_hash}{distance}: {len(hit.segments)} segments; {pairs}")
+
+    print(f"✅ {len(hits)} geometries in {elapsed:.1f} ms")
+    container.db_pool().close()
+
+
+if __name__ == "__main__":
+    main()
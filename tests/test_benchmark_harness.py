@@ -0,0 +1,40 @@
+import sys
+import types
+
+import pytest
+
+from benchmarks.fake_apis import FakeApiProfile, FakeApiServer
+from benchmarks.harness import Scenario, run_scenario
+
+
+@pytest.fixture
+def deployment_settings(monkeypatch):
+    # main.py imports the deployment's `config.settings`; the harness overrides it
+    if "config.settings" not in sys.modules:
+        try:
+            import config.settings  # noqa: F401
+        except ImportError:
+            module = types.ModuleType("config.settings")
+            module.Settings = object
+            package = types.ModuleType("config")
+            package.settings = module
+            monkeypatch.setitem(sys.modules, "config", package)
+            monkeypatch.setitem(sys.modules, "config.settings", module)
+
+
+@pytest.fixture
+def fake_api():
+    server = FakeApiServer(FakeApiProfile(latency_ms=1.0, alternatives=2, polyline_points=20))
+    server.start()
+    yield server.url
+    server.stop()
+
+
+def test_tiny_sqlite_scenario_runs_through_the_container(deployment_settings, fake_api, tmp_path):
+    scenario = Scenario(backend="sqlite", routes=3, concurrency=2, cycles=1)
+
+    result = run_scenario(scenario, fake_api, str(tmp_path))
+
+    assert "error" not in result
+    assert result["db_rows"] > 0
+    assert result["routes_per_second"] > 0
@@ -0,0 +1,36 @@
+import pytest
+
+from benchmarks.fake_apis import FakeApiProfile, FakeApiServer
+from infrastructure.external.response_archive import OPENWEATHER, ResponseArchive
+from infrastructure.external.weather_client import WeatherClient
+from interfaces.adapters.cached_weather import CachedWeatherGateway
+from interfaces.adapters.open_weather import WeatherAdapter
+from use_cases.data_collection.replay_archive import _parse_chunk
+
+
+@pytest.fixture
+def fake_api():
+    server = FakeApiServer(FakeApiProfile(latency_ms=0.0))
+    server.start()
+    yield server.url
+    server.stop()
+
+
+def test_replayed_cell_weather_matches_the_live_rows(fake_api, tmp_path):
+    archive = ResponseArchive(str(tmp_path / "archive"))
+    client = WeatherClient("key", archive=archive, api_root=fake_api)
+    gateway = CachedWeatherGateway(WeatherAdapter(client), cell_size_km=2.0)
+
+    # Two points in one cell and one in another
+    live = gateway.get_weather_data_many([(19.4301, -99.1301), (19.4302, -99.1302), (19.6, -99.3)])
+    archive.close()
+
+    assert live[0] is live[1]
+    assert len({weather.record_id for weather in live}) == 2
+
+    replayed = [
+        weather
+        for chunk in archive.plan(OPENWEATHER)
+        for weather in _parse_chunk(OPENWEATHER, chunk)
+    ]
+    assert {(w.record_id, w.location) for w in replayed} == {(w.record_id, w.location) for w in live}
@@ -0,0 +1,28 @@
+import os
+from datetime import datetime, timezone
+
+import pyarrow.parquet as pq
+
+from infrastructure.export import ROUTE_SCHEMA, ColumnarExporter
+
+
+def _records(ids):
+    timestamp = datetime(2024, 5, 1, 8, tzinfo=timezone.utc)
+    return [[
+        (i, "PRIMARY", "A" if i % 2 else "B", "C", 1000.0, 300.0, 240.0, "", None, timestamp, None)
+        for i in ids
+    ]]
+
+
+def test_filtered_export_does_not_share_the_tables_dataset(tmp_path):
+    exporter = ColumnarExporter(str(tmp_path))
+
+    everything = exporter.export("routes", iter(_records(range(1, 5))), ROUTE_SCHEMA)
+    only_a = exporter.export("routes", iter(_records([1, 3])), ROUTE_SCHEMA, {"origin": "A"})
+
+    assert pq.read_table(tmp_path / "routes").num_rows == 4
+    assert all(os.path.dirname(os.path.dirname(path)) != str(tmp_path / "routes") for path in only_a.files)
+    assert sum(pq.read_table(path).num_rows for path in only_a.files) == 2
+
+    assert exporter.load_watermark("routes") == everything.last_id == 4
+    assert exporter.load_watermark("routes", {"origin": "A"}) == 3
@@ -0,0 +1,34 @@
+import json
+
+import pytest
+
+from infrastructure.external.json_stream import iter_json_array
+
+
+DOCUMENT = (
+    '[1.5, 2e3, -0.25E-2, 17, true, false, null, "café \\"quoted\\"", [], {},'
+    ' {"originIndex": 3, "duration": "812s", "distanceMeters": 10452.5,'
+    ' "condition": "ROUTE_EXISTS", "nested": [1, [2.0, {"a": null}]]}, 123456789]'
+).encode("utf-8")
+
+
+def test_split_at_every_byte_offset():
+    expected = json.loads(DOCUMENT)
+
+    for split in range(len(DOCUMENT) + 1):
+        chunks = [DOCUMENT[:split], DOCUMENT[split:]]
+        assert list(iter_json_array(chunks)) == expected, f"split at byte {split}"
+
+
+def test_one_byte_chunks():
+    chunks = [DOCUMENT[i:i + 1] for i in range(len(DOCUMENT))]
+    assert list(iter_json_array(chunks)) == json.loads(DOCUMENT)
+
+
+def test_numbers_split_inside_fraction_and_exponent():
+    assert list(iter_json_array([b"[1.", b"5, 2e", b"3]"])) == [1.5, 2000.0]
+
+
+def test_truncated_array_raises():
+    with pytest.raises(ValueError):
+        list(iter_json_array([b'[1, {"a": ', b"2"]))
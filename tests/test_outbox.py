@@ -0,0 +1,145 @@
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+import pytest
+
+from domains.entities import WeatherConditions
+from infrastructure.database.repositories import SQLiteTrafficRepository, SQLiteWeatherRepository
+from infrastructure.database.sqlite_engine import SQLiteEngine
+from infrastructure.outbox import DurableOutbox, OutboxDrainer, OutboxWeatherRepository
+
+
+def _weather(temperature) -> WeatherConditions:
+    return WeatherConditions(
+        weather_type="Rain",
+        weather_description="light rain",
+        temperature=temperature,
+        feels_like=1.0,
+        pressure=1013.0,
+        visibility=10000,
+        wind_speed=3.0,
+        humidity=80.0,
+        timestamp=datetime.now(timezone.utc),
+        location="48.85,2.35"
+    )
+
+
+class UnreachableWeatherRepository(SQLiteWeatherRepository):
+    """ Fails every save like a database that is down, until `reachable` """
+
+    reachable = True
+
+    def save_weather_batch(self, weathers):
+        if not self.reachable:
+            raise sqlite3.OperationalError("unable to open database file")
+        return super().save_weather_batch(weathers)
+
+
+@pytest.fixture
+def store(tmp_path):
+    engine = SQLiteEngine(str(tmp_path / "traffic.db"))
+    outbox = DurableOutbox(directory=str(tmp_path / "outbox"))
+    traffic_repo = SQLiteTrafficRepository(engine)
+    weather_repo = UnreachableWeatherRepository(engine)
+    drainer = OutboxDrainer(outbox, traffic_repo, weather_repo)
+
+    yield outbox, OutboxWeatherRepository(outbox, weather_repo), drainer, engine
+
+    outbox.close()
+    engine.close()
+
+
+def _stored(engine) -> int:
+    return engine.query("SELECT COUNT(*) FROM weather_conditions")[0][0]
+
+
+def test_drain_delivers_and_commits(store):
+    outbox, spool, drainer, engine = store
+    spool.save_weather_batch([_weather(12.0), _weather(13.0)])
+
+    assert drainer.drain_once() == 2
+    assert _stored(engine) == 2
+    assert drainer.drain_once() == 0
+
+
+def _quarantined(outbox) -> list:
+    quarantine = os.path.join(outbox.directory, "quarantine")
+    if not os.path.isdir(quarantine):
+        return []
+    lines = []
+    for name in sorted(os.listdir(quarantine)):
+        with open(os.path.join(quarantine, name), encoding="utf-8") as f:
+            lines.extend(json.loads(line) for line in f)
+    return lines
+
+
+def test_outage_keeps_cursor_and_is_never_quarantined(store):
+    outbox, spool, drainer, engine = store
+    spool.save_weather_batch([_weather(12.0)])
+    cursor = outbox.cursor
+
+    drainer.weather_repo.reachable = False
+    for _ in range(50):
+        with pytest.raises(sqlite3.OperationalError):
+            drainer.drain_once()
+
+    assert outbox.cursor == cursor
+    assert drainer.quarantined == 0
+    assert _quarantined(outbox) == []
+
+    drainer.weather_repo.reachable = True
+    assert drainer.drain_once() == 1
+    assert _stored(engine) == 1
+
+
+def test_rejected_records_are_bisected_out_and_quarantined(store):
+    outbox, spool, drainer, engine = store
+    # temperature is NOT NULL, so the engine writer rejects those rows
+    spool.save_weather_batch([_weather(11.0), _weather(None), _weather(13.0)])
+    spool.save_weather_batch([_weather(14.0), _weather(15.0), _weather(None)])
+
+    assert drainer.drain_once() == 4
+    assert drainer.quarantined == 2
+    assert _stored(engine) == 4
+
+    lines = _quarantined(outbox)
+    assert [line["kind"] for line in lines] == ["weather", "weather"]
+    assert all(line["items"][0]["temperature"] is None for line in lines)
+
+    # Records spooled behind them are not blocked
+    spool.save_weather_batch([_weather(16.0)])
+    assert drainer.drain_once() == 1
+    assert _stored(engine) == 5
+
+
+def test_replay_quarantine_delivers_fixed_records(store):
+    outbox, spool, drainer, engine = store
+    spool.save_weather_batch([_weather(None), _weather(None)])
+    assert drainer.drain_once() == 0
+
+    # Still rejected: both stay quarantined
+    assert drainer.replay_quarantine() == 0
+    assert len(_quarantined(outbox)) == 2
+
+    # Fix one of them by hand
+    quarantine = os.path.join(outbox.directory, "quarantine")
+    [name] = os.listdir(quarantine)
+    path = os.path.join(quarantine, name)
+    lines = _quarantined(outbox)
+    lines[0]["items"][0]["temperature"] = 9.0
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(line) + "\n" for line in lines)
+
+    assert drainer.replay_quarantine() == 1
+    assert len(_quarantined(outbox)) == 1
+
+    lines = _quarantined(outbox)
+    lines[0]["items"][0]["temperature"] = 10.0
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(line) + "\n" for line in lines)
+
+    assert drainer.replay_quarantine() == 1
+    assert os.listdir(quarantine) == []
+    assert _stored(engine) == 2
@@ -0,0 +1,69 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from domains.entities import Route, RouteType, WeatherConditions
+from infrastructure.database.repositories import SQLiteTrafficRepository, SQLiteWeatherRepository
+from infrastructure.database.sqlite_engine import SQLiteEngine, SQLiteWriteError
+
+
+def _route() -> Route:
+    return Route(
+        route_type=RouteType.PRIMARY,
+        origin="origin",
+        destination="destination",
+        distance_meters=1200.0,
+        duration_seconds=300.0,
+        static_duration_seconds=240.0,
+        encoded_polyline="_p~iF~ps|U_ulLnnqC_mqNvxq`@",
+        timestamp=datetime.now(timezone.utc)
+    )
+
+
+def _weather(temperature) -> WeatherConditions:
+    return WeatherConditions(
+        weather_type="Clear",
+        weather_description="clear sky",
+        temperature=temperature,
+        feels_like=20.0,
+        pressure=1013.0,
+        visibility=10000,
+        wind_speed=2.0,
+        humidity=40.0,
+        timestamp=datetime.now(timezone.utc),
+        location="19.4,-99.1"
+    )
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = SQLiteEngine(str(tmp_path / "traffic.db"))
+    yield engine
+    engine.close()
+
+
+def test_flush_reports_only_the_repositorys_own_failures(engine):
+    traffic_repo = SQLiteTrafficRepository(engine)
+    weather_repo = SQLiteWeatherRepository(engine)
+
+    # temperature is NOT NULL, so the weather write is rejected
+    assert weather_repo.save_weather_batch([_weather(None)])
+    assert traffic_repo.save_routes([_route()])
+
+    traffic_repo.flush()
+    with pytest.raises(SQLiteWriteError):
+        weather_repo.flush()
+    weather_repo.flush()
+
+    assert engine.query("SELECT COUNT(*) FROM routes")[0][0] == 1
+    assert engine.query("SELECT COUNT(*) FROM weather_conditions")[0][0] == 0
+
+
+def test_writes_without_owner_fail_only_their_future(engine):
+    SQLiteWeatherRepository(engine)
+
+    future = engine.write("INSERT INTO missing_table VALUES (?)", [(1,)])
+    engine.flush()
+
+    with pytest.raises(Exception):
+        future.result()
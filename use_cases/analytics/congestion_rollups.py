@@ -0,0 +1,122 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+import pytz
+
+from domains.congestion import (
+    GRANULARITIES, HOUR_OF_WEEK, CongestionStats, SlotProfile,
+    congestion_index, week_slot
+)
+from domains.entities import Route, RouteType
+from domains.repositories import ICongestionRollupRepository, ITrafficRepository, RollupKey
+
+
+class CongestionRollupUseCase:
+    """ Maintain and query per-route congestion profiles by slot of the week
+
+    Slots are computed in local time, where the weekly traffic pattern lives.
+    """
+
+    def __init__(
+        self,
+        rollup_repo: ICongestionRollupRepository,
+        traffic_repo: ITrafficRepository,
+        timezone_name: str = 'America/Mexico_City'
+    ):
+        self.rollup_repo = rollup_repo
+        self.traffic_repo = traffic_repo
+        self.local_tz = pytz.timezone(timezone_name)
+
+    def _aggregate(
+        self,
+        routes: Iterable[Route],
+        into: Dict[str, Dict[RollupKey, CongestionStats]]
+    ):
+        values: Dict[str, Dict[RollupKey, List[float]]] = {
+            granularity: defaultdict(list) for granularity in GRANULARITIES
+        }
+
+        for route in routes:
+            index = congestion_index(route)
+            if index is None:
+                continue
+
+            local_time = route.timestamp.astimezone(self.local_tz)
+            for granularity in GRANULARITIES:
+                key = (
+                    route.origin, route.destination, route.route_type.name,
+                    week_slot(local_time, granularity)
+                )
+                values[granularity][key].append(index)
+
+        for granularity, by_key in values.items():
+            for key, samples in by_key.items():
+                into[granularity].setdefault(key, CongestionStats()).add_many(samples)
+
+    def _flush(self, stats: Dict[str, Dict[RollupKey, CongestionStats]]) -> bool:
+        results = [
+            self.rollup_repo.merge_stats(granularity, by_key)
+            for granularity, by_key in stats.items()
+        ]
+        return all(results)
+
+    def record(self, routes: List[Route]) -> bool:
+        """ Fold a freshly stored batch of routes into the rollups """
+
+        stats = {granularity: {} for granularity in GRANULARITIES}
+        self._aggregate(routes, stats)
+        return self._flush(stats)
+
+    def profile(
+        self,
+        origin: str,
+        destination: str,
+        route_type: RouteType = RouteType.PRIMARY,
+        granularity: str = HOUR_OF_WEEK
+    ) -> List[SlotProfile]:
+        """ Congestion index distribution for every observed slot of the week """
+
+        stats = self.rollup_repo.get_stats(granularity, origin, destination, route_type.name)
+
+        return [
+            SlotProfile(
+                slot=slot,
+                count=s.count,
+                mean=s.mean,
+                stddev=s.stddev,
+                p50=s.sketch.quantile(0.5),
+                p90=s.sketch.quantile(0.9),
+                p95=s.sketch.quantile(0.95)
+            )
+            for slot, s in sorted(stats.items())
+            if s.count
+        ]
+
+    def rebuild(
+        self,
+        until: Optional[datetime] = None,
+        batch_size: int = 20000,
+        max_pending_keys: int = 50000
+    ) -> int:
+        """ Recompute all rollups from the raw routes table
+
+        Run it while collectors are stopped: routes saved during the rebuild but
+        stamped before `until` would be counted twice.
+        """
+
+        until = until or datetime.now(timezone.utc)
+        self.rollup_repo.clear()
+
+        stats = {granularity: {} for granularity in GRANULARITIES}
+        processed = 0
+
+        for chunk in self.traffic_repo.iter_routes(end=until, batch_size=batch_size):
+            self._aggregate(chunk, stats)
+            processed += len(chunk)
+
+            if sum(len(by_key) for by_key in stats.values()) >= max_pending_keys:
+                self._flush(stats)
+                stats = {granularity: {} for granularity in GRANULARITIES}
+
+        self._flush(stats)
+        return processed
@@ -0,0 +1,186 @@
+import os
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+from typing import Deque, Dict, List, Optional, Tuple
+import pytz
+
+from domains.anomaly import DurationAnomaly, SeriesKey, SlotStatistics, judge
+from domains.congestion import HOUR_OF_WEEK, week_slot
+from domains.entities import Route
+from domains.repositories import ITrafficRepository
+from infrastructure.metrics import DURATION_ANOMALIES
+
+
+class DurationAnomalyUseCase:
+    """ Flag route durations far outside their usual range, as they are collected
+
+    Statistics are kept per route variant and hour of the week in memory and
+    updated with every observation, so judging a new duration never touches the database. The
+    state is checkpointed to `checkpoint_path` and restored on start; without a
+    checkpoint, `warm_up` rebuilds it from recent history once.
+    """
+
+    def __init__(
+        self,
+        traffic_repo: ITrafficRepository,
+        checkpoint_path: Optional[str] = None,
+        zscore_threshold: float = 3.0,
+        min_excess: float = 0.2,
+        min_samples: int = 8,
+        min_relative_stddev: float = 0.05,
+        window: int = 16,
+        alpha: float = 0.2,
+        checkpoint_interval: float = 300,
+        timezone_name: str = 'America/Mexico_City'
+    ):
+        self.traffic_repo = traffic_repo
+        self.checkpoint_path = checkpoint_path
+        self.zscore_threshold = zscore_threshold
+        self.min_excess = min_excess
+        self.min_samples = min_samples
+        self.min_relative_stddev = min_relative_stddev
+        self.checkpoint_interval = checkpoint_interval
+        self.local_tz = pytz.timezone(timezone_name)
+
+        self.stats = SlotStatistics(window=window, alpha=alpha)
+        self.recent: Deque[DurationAnomaly] = deque(maxlen=100)
+        self.restored = False
+        self._dirty = False
+        self._checkpointed_at = time.monotonic()
+        self._lock = Lock()
+
+        self.restore()
+
+    # ---------- Observations ----------
+    @staticmethod
+    def _series(routes: List[Route]) -> List[Tuple[SeriesKey, Route]]:
+        """ Series key of every route; alternatives take different roads, so each
+        variant is its own series, falling back to the route's position in its response
+        """
+
+        positions: Dict[Tuple[str, str, datetime], int] = {}
+        keyed = []
+        for route in routes:
+            response = (route.origin, route.destination, route.timestamp)
+            index = positions.get(response, 0)
+            positions[response] = index + 1
+            keyed.append(((route.origin, route.destination, route.variant_id or f"#{index}"), route))
+        return keyed
+
+    def observe(self, routes: List[Route], live: bool = True) -> List[DurationAnomaly]:
+        """ Judge each route against its slot, then fold it into the statistics """
+
+        anomalies = []
+
+        with self._lock:
+            # Staleness is decided once per series and response, before any of the
+            # response is folded in; a variant repeated in one response counts once
+            fresh: Dict[Tuple[int, int], bool] = {}
+            keyed = []
+            for key, route in self._series(routes):
+                if route.duration_seconds is None:
+                    continue
+                row = self.stats.series(key)
+                timestamp_us = int(route.timestamp.timestamp() * 1_000_000)
+                if (row, timestamp_us) not in fresh:
+                    fresh[row, timestamp_us] = self.stats.is_new(row, timestamp_us)
+                    keyed.append((row, timestamp_us, route))
+
+            for row, timestamp_us, route in keyed:
+                if not fresh[row, timestamp_us]:
+                    continue
+
+                slot = week_slot(route.timestamp.astimezone(self.local_tz), HOUR_OF_WEEK)
+                value = float(route.duration_seconds)
+                baseline = self.stats.baseline(row, slot, self.min_samples)
+
+                zscore = judge(
+                    value, baseline, self.zscore_threshold, self.min_excess, self.min_relative_stddev
+                ) if live else None
+
+                if zscore is not None:
+                    anomalies.append(DurationAnomaly(
+                        origin=route.origin,
+                        destination=route.destination,
+                        route_type=route.route_type.name,
+                        timestamp=route.timestamp,
+                        slot=slot,
+                        duration_seconds=value,
+                        expected_seconds=baseline.mean,
+                        stddev_seconds=baseline.stddev,
+                        zscore=zscore,
+                        ewma_seconds=baseline.ewma,
+                        recent_median_seconds=baseline.recent_median
+                    ))
+
+                self.stats.add(row, slot, value, timestamp_us)
+                self._dirty = True
+
+            self.recent.extend(anomalies)
+            due = time.monotonic() - self._checkpointed_at >= self.checkpoint_interval
+
+        for anomaly in anomalies:
+            DURATION_ANOMALIES.labels(anomaly.route_type).inc()
+            print(
+                f"🚨 {anomaly.origin} → {anomaly.destination} ({anomaly.route_type}) took "
+                f"{anomaly.duration_seconds / 60:.0f} min, usually {anomaly.expected_seconds / 60:.0f} "
+                f"± {anomaly.stddev_seconds / 60:.0f} min at this hour (z = {anomaly.zscore:.1f})"
+            )
+
+        if live and due:
+            self.checkpoint()
+
+        return anomalies
+
+    def warm_up(self, lookback: timedelta = timedelta(days=28)) -> int:
+        """ Seed the statistics from stored routes without alerting; returns routes read """
+
+        read = 0
+        start = datetime.now(timezone.utc) - lookback
+        for chunk in self.traffic_repo.iter_routes(start=start):
+            self.observe(chunk, live=False)
+            read += len(chunk)
+        return read
+
+    # ---------- Checkpoints ----------
+    def restore(self) -> bool:
+        """ Load the last checkpoint, if there is a usable one """
+
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return False
+
+        try:
+            stats = SlotStatistics.load(self.checkpoint_path)
+        except Exception as e:
+            print(f"⚠️ Ignoring anomaly checkpoint {self.checkpoint_path}: {e}")
+            return False
+
+        if stats.window != self.stats.window or stats.slots != self.stats.slots:
+            print(f"⚠️ Ignoring anomaly checkpoint {self.checkpoint_path}: saved with another layout")
+            return False
+
+        stats.alpha = self.stats.alpha
+        with self._lock:
+            self.stats = stats
+            self.restored = True
+        return True
+
+    def checkpoint(self) -> bool:
+        """ Save the statistics if they changed since the last checkpoint """
+
+        if not self.checkpoint_path:
+            return False
+
+        with self._lock:
+            if not self._dirty:
+                return True
+            try:
+                self.stats.save(self.checkpoint_path)
+            except OSError as e:
+                print(f"⚠️ Could not checkpoint anomaly statistics: {e}")
+                return False
+            self._dirty = False
+            self._checkpointed_at = time.monotonic()
+        return True
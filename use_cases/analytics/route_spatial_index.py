@@ -0,0 +1,195 @@
+import hashlib
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from domains.entities import Route
+from domains.repositories import ITrafficRepository
+from domains.spatial_index import GeometryHit, SegmentGrid
+from infrastructure.geometry import pack_polyline, unpack_coordinates
+
+
+class RouteSpatialIndexUseCase:
+    """ Spatial queries over every collected route geometry, from an in-memory grid
+
+    Stored geometries are read once, on the first query. Collection use cases
+    pass each stored batch to `record`, so routes collected since (including
+    those still waiting in the outbox) are indexed without another read.
+    """
+
+    def __init__(
+        self,
+        traffic_repo: ITrafficRepository,
+        cell_size_m: float = 250.0,
+        batch_size: int = 1000
+    ):
+        self.traffic_repo = traffic_repo
+        self.cell_size_m = cell_size_m
+        self.batch_size = batch_size
+
+        self._grid: Optional[SegmentGrid] = None
+        self._hashes: List[str] = []
+        self._pairs: List[Set[Tuple[str, str]]] = []
+        self._by_hash: Dict[str, int] = {}
+
+        # Digest of the encoded text, so known polylines are not decoded again
+        self._by_text: Dict[bytes, int] = {}
+
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def _add(self, polyline_hash: str, coordinates: np.ndarray) -> int:
+        """ Geometry number of a polyline, indexing it if new; call under the lock """
+
+        number = self._by_hash.get(polyline_hash)
+        if number is not None:
+            return number
+
+        if self._grid is None:
+            self._grid = SegmentGrid(coordinates[0, 0], coordinates[0, 1], self.cell_size_m)
+
+        number = self._grid.add(coordinates)
+        self._hashes.append(polyline_hash)
+        self._pairs.append(set())
+        self._by_hash[polyline_hash] = number
+        return number
+
+    def record(self, routes: List[Route]) -> int:
+        """ Index the geometries of a freshly stored batch; returns how many were new """
+
+        added = 0
+
+        with self._lock:
+            for route in routes:
+                if not route.encoded_polyline:
+                    continue
+
+                digest = hashlib.blake2b(route.encoded_polyline.encode("ascii"), digest_size=16).digest()
+                number = self._by_text.get(digest)
+                if number is None:
+                    polyline_hash, point_count, blob = pack_polyline(route.encoded_polyline)
+                    if point_count == 0:
+                        continue
+                    known = len(self._hashes)
+                    number = self._add(polyline_hash, unpack_coordinates(blob))
+                    added += number == known
+                    self._by_text[digest] = number
+
+                self._pairs[number].add((route.origin, route.destination))
+
+        return added
+
+    def load(self) -> int:
+        """ Index every stored geometry; only the first call reads the repository """
+
+        with self._load_lock:
+            if self._loaded:
+                return 0
+
+            started = time.perf_counter()
+
+            # Read outside the index lock so collection threads keep recording meanwhile
+            geometries = [
+                geometry
+                for batch in self.traffic_repo.iter_route_geometries(self.batch_size)
+                for geometry in batch
+                if len(geometry.coordinates)
+            ]
+
+            with self._lock:
+                for geometry in geometries:
+                    number = self._add(geometry.polyline_hash, geometry.coordinates)
+                    self._pairs[number].update(geometry.pairs)
+                if self._grid is not None:
+                    self._grid.merge()
+                self._loaded = True
+                segments = self._grid.segments if self._grid is not None else 0
+
+            print(
+                f"🗺️ Spatial index loaded {len(geometries)} geometries "
+                f"({segments} segments) in {time.perf_counter() - started:.1f}s"
+            )
+            return len(geometries)
+
+    def _ready(self) -> Optional[SegmentGrid]:
+        """ The grid with every recorded geometry merged; call under the lock """
+
+        if self._grid is not None and self._grid.pending:
+            self._grid.merge()
+        return self._grid
+
+    def _hits(self, grid: SegmentGrid, segments: np.ndarray) -> List[GeometryHit]:
+        if not len(segments):
+            return []
+
+        geometries = grid.geometry_of(segments)
+        order = np.argsort(geometries, kind="stable")
+        segments, geometries = segments[order], geometries[order]
+        numbers, first = np.unique(geometries, return_index=True)
+
+        hits = []
+        for number, group in zip(numbers, np.split(segments, first[1:])):
+            hits.append(GeometryHit(
+                polyline_hash=self._hashes[number],
+                pairs=sorted(self._pairs[number]),
+                segments=np.sort(grid.segment_index(group))
+            ))
+        return hits
+
+    # ---------- Queries ----------
+    def routes_in_bbox(
+        self,
+        min_lat: float,
+        min_lng: float,
+        max_lat: float,
+        max_lng: float
+    ) -> List[GeometryHit]:
+        """ Geometries with at least one segment crossing the box """
+
+        self.load()
+        with self._lock:
+            grid = self._ready()
+            if grid is None:
+                return []
+            return self._hits(grid, grid.query_bbox(min_lat, min_lng, max_lat, max_lng))
+
+    def routes_in_polygon(self, polygon: Sequence[Tuple[float, float]]) -> List[GeometryHit]:
+        """ Geometries with segments inside or crossing a (lat, lng) ring """
+
+        self.load()
+        with self._lock:
+            grid = self._ready()
+            if grid is None:
+                return []
+            return self._hits(grid, grid.query_polygon(np.asarray(polygon, dtype=np.float64)))
+
+    def nearest_routes(
+        self,
+        lat: float,
+        lng: float,
+        k: int = 1,
+        max_distance_m: float = math.inf
+    ) -> List[GeometryHit]:
+        """ The k geometries passing closest to a point, with their closest segment """
+
+        self.load()
+        with self._lock:
+            grid = self._ready()
+            if grid is None:
+                return []
+            segments, distances = grid.nearest(lat, lng, k, max_distance_m, per_geometry=True)
+
+            hits = []
+            for segment, distance in zip(segments, distances):
+                number = int(grid.geometry_of(segment))
+                hits.append(GeometryHit(
+                    polyline_hash=self._hashes[number],
+                    pairs=sorted(self._pairs[number]),
+                    segments=np.array([grid.segment_index(segment)]),
+                    distance_m=float(distance)
+                ))
+            return hits
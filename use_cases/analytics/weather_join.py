@@ -0,0 +1,220 @@
+import math
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from domains.asof import asof_indices
+from domains.repositories import ITrafficRepository, IWeatherRepository
+from infrastructure.export import ROUTE_SCHEMA, WEATHER_SCHEMA, records_to_table
+from infrastructure.geometry import pack_polyline, unpack_coordinates
+
+
+KM_PER_DEGREE_LAT = 111.32
+
+# Route columns carried into the joined dataset; inline polylines are legacy and bulky
+JOINED_ROUTE_FIELDS = [name for name in ROUTE_SCHEMA.names if name != "polyline"]
+
+
+def _weather_column(name: str) -> str:
+    return name if name.startswith("weather_") else f"weather_{name}"
+
+
+def _micros(table: pa.Table) -> np.ndarray:
+    return pc.cast(table["timestamp"], pa.int64()).to_numpy()
+
+
+class _CellLocator:
+    """ Numbers weather locations ("lat,lon") and maps routes to the nearest one
+
+    Routes are placed by the first vertex of their geometry. Codes of unplaced
+    routes (-1) and unreadable weather locations (-2) never match each other.
+    """
+
+    def __init__(self, route_starts: Dict[str, Tuple[float, float]], max_distance_km: float):
+        self.route_starts = route_starts
+        self.max_distance_km = max_distance_km
+        self.cells: Dict[Optional[str], int] = {}
+        self.points: List[Tuple[float, float]] = []
+        self._legacy_starts: Dict[str, Optional[Tuple[float, float]]] = {}
+
+    def weather_cells(self, locations: List[Optional[str]]) -> np.ndarray:
+        codes = []
+        for location in locations:
+            if location not in self.cells:
+                try:
+                    lat, lon = (float(value) for value in location.split(","))
+                    self.cells[location] = len(self.points)
+                    self.points.append((lat, lon))
+                except (AttributeError, ValueError):
+                    self.cells[location] = -2
+            codes.append(self.cells[location])
+        return np.array(codes, dtype=np.int64)
+
+    def _start(self, polyline_hash: Optional[str], polyline: Optional[str]) -> Optional[Tuple[float, float]]:
+        if polyline_hash is not None:
+            return self.route_starts.get(polyline_hash)
+        if not polyline:
+            return None
+        if polyline not in self._legacy_starts:
+            coords = unpack_coordinates(pack_polyline(polyline)[2])
+            self._legacy_starts[polyline] = tuple(coords[0]) if len(coords) else None
+        return self._legacy_starts[polyline]
+
+    def route_cells(self, routes: pa.Table) -> np.ndarray:
+        """ Nearest known weather location of each route, or -1 """
+
+        keys = list(zip(routes["polyline_hash"].to_pylist(), routes["polyline"].to_pylist()))
+        if not self.points:
+            return np.full(len(keys), -1, dtype=np.int64)
+
+        # One distance row per distinct geometry; a chunk holds few of them
+        starts = {key: self._start(*key) for key in set(keys)}
+        located = [key for key, point in starts.items() if point is not None]
+        if not located:
+            return np.full(len(keys), -1, dtype=np.int64)
+
+        points = np.array([starts[key] for key in located])
+        cells = np.array(self.points)
+        dlat = (points[:, 0:1] - cells[:, 0]) * KM_PER_DEGREE_LAT
+        dlng = (points[:, 1:2] - cells[:, 1]) * KM_PER_DEGREE_LAT * np.cos(np.radians(points[:, 0:1]))
+        distances = np.hypot(dlat, dlng)
+        nearest = distances.argmin(axis=1)
+        within = distances[np.arange(len(located)), nearest] <= self.max_distance_km
+
+        cell_by_key = dict(zip(located, np.where(within, nearest, -1).tolist()))
+        return np.array([cell_by_key.get(key, -1) for key in keys], dtype=np.int64)
+
+
+class RouteWeatherJoinUseCase:
+    """ As-of join of every route observation with the latest weather before it
+
+    Both tables are read in timestamp order, in chunks. Weather is buffered only
+    as far back as the tolerance reaches from the current route chunk, and each
+    chunk is joined with one `searchsorted` per weather location, so a full
+    history is a single linear pass over both tables.
+
+    With `by_location`, a route only takes weather from the location nearest to
+    its start point (at most `max_cell_distance_km` away); otherwise from any.
+    """
+
+    def __init__(
+        self,
+        traffic_repo: ITrafficRepository,
+        weather_repo: IWeatherRepository,
+        tolerance: timedelta = timedelta(hours=1),
+        batch_size: int = 50000,
+        max_cell_distance_km: Optional[float] = None
+    ):
+        self.traffic_repo = traffic_repo
+        self.weather_repo = weather_repo
+        self.tolerance = tolerance
+        self.batch_size = batch_size
+        self.max_cell_distance_km = max_cell_distance_km
+
+    def _locator(self) -> _CellLocator:
+        route_starts = {
+            geometry.polyline_hash: tuple(geometry.coordinates[0])
+            for batch in self.traffic_repo.iter_route_geometries()
+            for geometry in batch
+            if len(geometry.coordinates)
+        }
+        limit = self.max_cell_distance_km if self.max_cell_distance_km is not None else math.inf
+        return _CellLocator(route_starts, limit)
+
+    def iter_joined(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        by_location: bool = False
+    ) -> Iterator[pa.Table]:
+        """ Joined chunks: route columns, `weather_*` columns and the weather lag """
+
+        tolerance = int(self.tolerance.total_seconds() * 1_000_000)
+        weather_rows = self.weather_repo.iter_weather_records_by_time(
+            start - self.tolerance if start is not None else None, end, self.batch_size
+        )
+        locator = self._locator() if by_location else None
+
+        buffer = WEATHER_SCHEMA.empty_table()
+        buffer_times = np.empty(0, dtype=np.int64)
+        buffer_cells = np.empty(0, dtype=np.int64)
+        exhausted = False
+
+        for route_rows in self.traffic_repo.iter_route_records_by_time(start, end, self.batch_size):
+            routes = records_to_table(route_rows, ROUTE_SCHEMA)
+            times = _micros(routes)
+
+            # Buffer weather until it reaches past the last route of the chunk
+            while not exhausted and (not len(buffer_times) or buffer_times[-1] <= times[-1]):
+                rows = next(weather_rows, None)
+                if rows is None:
+                    exhausted = True
+                    break
+                chunk = records_to_table(rows, WEATHER_SCHEMA)
+                buffer = pa.concat_tables([buffer, chunk])
+                buffer_times = np.concatenate((buffer_times, _micros(chunk)))
+                if locator is not None:
+                    buffer_cells = np.concatenate((
+                        buffer_cells, locator.weather_cells(chunk["location"].to_pylist())
+                    ))
+
+            # Weather older than the tolerance before this chunk cannot match any later route
+            keep = int(np.searchsorted(buffer_times, times[0] - tolerance, side="left"))
+            if keep:
+                buffer = buffer.slice(keep)
+                buffer_times = buffer_times[keep:]
+                buffer_cells = buffer_cells[keep:] if locator is not None else buffer_cells
+
+            if locator is not None:
+                matched = asof_indices(
+                    times, buffer_times, tolerance, locator.route_cells(routes), buffer_cells
+                )
+            else:
+                matched = asof_indices(times, buffer_times, tolerance)
+
+            yield self._assemble(routes, times, buffer, buffer_times, matched)
+
+    @staticmethod
+    def _assemble(
+        routes: pa.Table,
+        times: np.ndarray,
+        weather: pa.Table,
+        weather_times: np.ndarray,
+        matched: np.ndarray
+    ) -> pa.Table:
+
+        found = matched >= 0
+        safe = np.where(found, matched, 0)
+        joined = weather.take(pa.array(safe, mask=~found))
+
+        columns = {name: routes[name] for name in JOINED_ROUTE_FIELDS}
+        for name in WEATHER_SCHEMA.names:
+            columns[_weather_column(name)] = joined[name]
+
+        lags = (times - weather_times[safe]) / 1e6 if len(weather_times) else np.zeros(len(times))
+        columns["weather_lag_seconds"] = pa.array(lags, mask=~found)
+
+        return pa.table(columns)
+
+    def execute(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        by_location: bool = False
+    ) -> pa.Table:
+        """ The whole joined range as one table """
+
+        chunks = list(self.iter_joined(start, end, by_location))
+        if not chunks:
+            return self.empty_table()
+        return pa.concat_tables(chunks)
+
+    @staticmethod
+    def empty_table() -> pa.Table:
+        fields = [ROUTE_SCHEMA.field(name) for name in JOINED_ROUTE_FIELDS]
+        fields += [schema_field.with_name(_weather_column(schema_field.name)) for schema_field in WEATHER_SCHEMA]
+        fields.append(pa.field("weather_lag_seconds", pa.float64()))
+        return pa.schema(fields).empty_table()
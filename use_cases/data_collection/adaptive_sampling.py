@@ -0,0 +1,212 @@
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+import pytz
+
+from domains.congestion import HOUR_OF_WEEK, CongestionStats, congestion_index, week_slot
+from domains.entities import Route, RoutePair, RouteType
+from domains.repositories import ICongestionRollupRepository, ITrafficRepository
+from domains.sampling import (
+    SamplingRate, allocate_budget, band_deviation, change_rate,
+    effective_rate, interval_for_urgency
+)
+
+
+Leg = Tuple[str, str]
+
+
+class AdaptiveSamplingUseCase:
+    """ Per-route collection intervals driven by how fast traffic is changing
+
+    A route is sampled more often when its recent durations move quickly, when the
+    latest observation falls outside its hour-of-week band from the congestion
+    rollups, or when history says the next hour differs from the current one (rush
+    hour transitions). Flat traffic backs off to `max_interval`. The resulting rates
+    are scaled to fit `hourly_budget` API calls across all routes.
+    """
+
+    def __init__(
+        self,
+        traffic_repo: ITrafficRepository,
+        rollup_repo: Optional[ICongestionRollupRepository] = None,
+        hourly_budget: Optional[float] = None,
+        min_interval: float = 300,
+        max_interval: float = 3600,
+        change_threshold: float = 0.15,
+        band_width: float = 2.0,
+        history: int = 6,
+        band_refresh: float = 3600,
+        allocation_refresh: float = 30,
+        timezone_name: str = 'America/Mexico_City'
+    ):
+        self.traffic_repo = traffic_repo
+        self.rollup_repo = rollup_repo
+        self.hourly_budget = hourly_budget
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.change_threshold = change_threshold
+        self.band_width = band_width
+        self.history = history
+        self.band_refresh = band_refresh
+        self.allocation_refresh = allocation_refresh
+        self.local_tz = pytz.timezone(timezone_name)
+
+        self.pairs: List[RoutePair] = []
+        self._observations: Dict[Leg, Deque[Tuple[datetime, float, float]]] = {}
+        self._bands: Dict[Leg, Tuple[float, Dict[int, CongestionStats]]] = {}
+        self._samples: Dict[RoutePair, Deque[float]] = {}
+        self._urgency: Dict[RoutePair, float] = {}
+        self._rates: Dict[RoutePair, float] = {}
+        self._allocated_at = 0.0
+        self._lock = Lock()
+
+    # ---------- Setup ----------
+    def _legs(self, pair: RoutePair) -> List[Leg]:
+        legs = [(pair.origin, pair.destination)]
+        if pair.round_trip:
+            legs.append((pair.destination, pair.origin))
+        return legs
+
+    def register(self, pairs: Iterable[RoutePair]):
+        with self._lock:
+            for pair in pairs:
+                if pair in self._samples:
+                    continue
+                self.pairs.append(pair)
+                self._samples[pair] = deque()
+                for leg in self._legs(pair):
+                    self._observations.setdefault(leg, deque(maxlen=self.history))
+            self._allocated_at = 0.0
+
+    def warm_up(self, lookback: timedelta = timedelta(hours=6)) -> int:
+        """ Seed recent observations from the routes table; returns routes read """
+
+        read = 0
+        start = datetime.now(timezone.utc) - lookback
+        for chunk in self.traffic_repo.iter_routes(start=start):
+            self.observe(chunk, live=False)
+            read += len(chunk)
+        return read
+
+    # ---------- Observations ----------
+    def observe(self, routes: List[Route], live: bool = True):
+        """ Feed freshly collected routes; only primary routes drive the policy """
+
+        now = time.monotonic()
+
+        with self._lock:
+            for route in routes:
+                if route.route_type != RouteType.PRIMARY:
+                    continue
+                observations = self._observations.get((route.origin, route.destination))
+                index = congestion_index(route)
+                if observations is None or index is None:
+                    continue
+                if observations and observations[-1][0] >= route.timestamp:
+                    continue
+                observations.append((route.timestamp, route.duration_seconds, index))
+
+            if live:
+                legs = {(route.origin, route.destination) for route in routes}
+                for pair in self.pairs:
+                    if legs.intersection(self._legs(pair)):
+                        self._samples[pair].append(now)
+                self._allocated_at = 0.0
+
+    def _band(self, leg: Leg) -> Dict[int, CongestionStats]:
+        if self.rollup_repo is None:
+            return {}
+
+        cached = self._bands.get(leg)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+
+        try:
+            stats = self.rollup_repo.get_stats(HOUR_OF_WEEK, leg[0], leg[1], RouteType.PRIMARY.name)
+        except Exception as e:
+            print(f"⚠️ Could not load congestion band for {leg[0]} → {leg[1]}: {e}")
+            stats = cached[1] if cached else {}
+
+        self._bands[leg] = (time.monotonic() + self.band_refresh, stats)
+        return stats
+
+    def _leg_urgency(self, leg: Leg, now: datetime) -> float:
+        observations = list(self._observations.get(leg, ()))
+        band = self._band(leg)
+        scores = []
+
+        # Recent durations moving quickly
+        rate = change_rate([(t, duration) for t, duration, _ in observations])
+        if rate is not None:
+            scores.append(rate / self.change_threshold)
+
+        # Latest observation outside its historical band
+        if observations:
+            observed_at, _, index = observations[-1]
+            slot = week_slot(observed_at.astimezone(self.local_tz), HOUR_OF_WEEK)
+            deviation = band_deviation(index, band.get(slot))
+            if deviation is not None:
+                scores.append(deviation / self.band_width)
+
+        # Historical transition between this hour and the next
+        local_now = now.astimezone(self.local_tz)
+        current = band.get(week_slot(local_now, HOUR_OF_WEEK))
+        upcoming = band.get(week_slot(local_now + timedelta(hours=1), HOUR_OF_WEEK))
+        if current is not None and upcoming is not None and current.count and upcoming.count:
+            scores.append(abs(upcoming.mean - current.mean) / current.mean / self.change_threshold)
+
+        # Without history, sample fast until some builds up
+        return max(scores) if scores else 1.0
+
+    # ---------- Policy ----------
+    def _allocate(self):
+        now = datetime.now(timezone.utc)
+        demands = {}
+
+        for pair in self.pairs:
+            urgency = max(self._leg_urgency(leg, now) for leg in self._legs(pair))
+            interval = interval_for_urgency(urgency, self.min_interval, self.max_interval)
+            self._urgency[pair] = urgency
+            demands[pair] = (3600 / interval, 3600 / self.max_interval, len(self._legs(pair)))
+
+        self._rates = allocate_budget(demands, self.hourly_budget)
+        self._allocated_at = time.monotonic()
+
+    def interval_for(self, pair: RoutePair) -> float:
+        """ Seconds until `pair` should be sampled again """
+
+        with self._lock:
+            if time.monotonic() - self._allocated_at > self.allocation_refresh:
+                self._allocate()
+            rate = self._rates.get(pair)
+
+        return 3600 / rate if rate else self.max_interval
+
+    def report(self) -> List[SamplingRate]:
+        """ Target and effective samples per hour for every registered route """
+
+        now = time.monotonic()
+
+        with self._lock:
+            if now - self._allocated_at > self.allocation_refresh:
+                self._allocate()
+
+            report = []
+            for pair in self.pairs:
+                samples = self._samples[pair]
+                while samples and samples[0] < now - 3600:
+                    samples.popleft()
+
+                rate = self._rates.get(pair, 0.0)
+                report.append(SamplingRate(
+                    origin=pair.origin,
+                    destination=pair.destination,
+                    urgency=self._urgency.get(pair, 0.0),
+                    interval=3600 / rate if rate else self.max_interval,
+                    target_per_hour=rate,
+                    effective_per_hour=effective_rate(list(samples), now)
+                ))
+
+        return report
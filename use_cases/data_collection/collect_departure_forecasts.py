@@ -0,0 +1,116 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from threading import BoundedSemaphore, Lock
+from typing import Iterable, List, Sequence, Tuple
+
+from interfaces.gateways.traffic_gateway import ITrafficDataGateway, RateLimitDeferred
+from domains.repositories import IRouteForecastRepository
+from domains.entities import RouteForecast, RoutePair
+from infrastructure.metrics import track_use_case
+
+
+DEFAULT_OFFSETS_MINUTES = tuple(range(0, 181, 15))
+
+
+class CollectDepartureForecastsUseCase:
+    """ Sweep each route over a set of future departure times and store the forecast curve
+
+    Every (leg, offset) request runs concurrently; pacing is left to the client's
+    rate limiter. All forecasts of one sweep share the sweep's `observed_at`, and
+    the whole sweep is saved as one bulk insert.
+    """
+
+    def __init__(
+        self,
+        traffic_gateway: ITrafficDataGateway,
+        forecast_repo: IRouteForecastRepository,
+        offsets_minutes: Sequence[int] = DEFAULT_OFFSETS_MINUTES,
+        lead_minutes: float = 2,
+        max_workers: int = 16,
+        max_in_flight: int = None
+    ):
+        self.traffic_gateway = traffic_gateway
+        self.forecast_repo = forecast_repo
+        self.offsets = sorted(set(int(offset) for offset in offsets_minutes))
+        self.lead = timedelta(minutes=lead_minutes)
+        self.max_in_flight = max_in_flight or max_workers * 2
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="forecast-sweep"
+        )
+
+    def _legs(self, pairs: Iterable[RoutePair]) -> List[Tuple[str, str]]:
+        legs = []
+        for pair in pairs:
+            legs.append((pair.origin, pair.destination))
+            if pair.round_trip:
+                legs.append((pair.destination, pair.origin))
+        return legs
+
+    def _earliest_departure(self) -> datetime:
+        # Whole minutes keep the departures of one sweep aligned across routes
+        earliest = datetime.now(timezone.utc) + self.lead
+        return earliest.replace(second=0, microsecond=0) + timedelta(
+            minutes=bool(earliest.second or earliest.microsecond)
+        )
+
+    def _departure_at(self, planned: datetime) -> datetime:
+        # The API rejects past departures, so a request that waited too long on the
+        # rate limiter is moved to the earliest departure it can still ask for
+        return max(planned, self._earliest_departure())
+
+    @track_use_case("collect_departure_forecasts")
+    def execute(self, pairs: Iterable[RoutePair]) -> bool:
+
+        legs = self._legs(pairs)
+
+        # Sweep time truncated to the minute, like observed routes
+        observed_at = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+        first_departure = self._earliest_departure()
+
+        in_flight = BoundedSemaphore(self.max_in_flight)
+        lock = Lock()
+        collected: List[RouteForecast] = []
+        failed: List[Tuple[str, str, int]] = []
+        deferred: List[Tuple[str, str, int]] = []
+
+        def fetch(start: str, end: str, offset: int):
+            try:
+                departure_at = self._departure_at(first_departure + timedelta(minutes=offset))
+                forecasts = self.traffic_gateway.get_departure_forecast(
+                    start, end, departure_at, observed_at
+                )
+                with lock:
+                    collected.extend(forecasts)
+            except RateLimitDeferred:
+                with lock:
+                    deferred.append((start, end, offset))
+            except Exception as e:
+                print(f"❌ Error while forecasting {start} → {end} at +{offset} min: {e}")
+                with lock:
+                    failed.append((start, end, offset))
+            finally:
+                in_flight.release()
+
+        # Nearest horizons first: they are the ones that go stale while queued
+        futures = []
+        for offset in self.offsets:
+            for start, end in legs:
+                in_flight.acquire()
+                futures.append(self._executor.submit(fetch, start, end, offset))
+
+        for future in futures:
+            future.result()
+
+        requested = len(futures)
+        if failed:
+            print(f"⚠️ {len(failed)} of {requested} departure forecasts failed this sweep")
+        if deferred:
+            print(f"⏳ {len(deferred)} of {requested} departure forecasts deferred by the API budget")
+
+        saved = self.forecast_repo.save_forecasts(collected)
+
+        return saved and not failed
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,100 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore, Lock
+from typing import Iterable, List, Tuple
+from interfaces.gateways.traffic_gateway import ITrafficDataGateway, RateLimitDeferred
+from domains.repositories import ITrafficRepository
+from domains.entities import Route, RoutePair
+from use_cases.analytics.congestion_rollups import CongestionRollupUseCase
+from use_cases.analytics.duration_anomalies import DurationAnomalyUseCase
+from use_cases.analytics.route_spatial_index import RouteSpatialIndexUseCase
+from infrastructure.metrics import track_use_case
+
+
+class CollectRouteCatalogUseCase:
+    """ Collect every route of a catalog concurrently and store the cycle as one batch """
+
+    def __init__(
+        self,
+        traffic_gateway: ITrafficDataGateway,
+        traffic_repo: ITrafficRepository,
+        max_workers: int = 16,
+        max_in_flight: int = None,
+        rollups: CongestionRollupUseCase = None,
+        spatial_index: RouteSpatialIndexUseCase = None,
+        anomalies: DurationAnomalyUseCase = None
+    ):
+        self.traffic_gateway = traffic_gateway
+        self.traffic_repo = traffic_repo
+        self.rollups = rollups
+        self.spatial_index = spatial_index
+        self.anomalies = anomalies
+        self.max_in_flight = max_in_flight or max_workers * 2
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="route-collector"
+        )
+
+    def _legs(self, pairs: Iterable[RoutePair]) -> List[Tuple[str, str]]:
+        legs = []
+        for pair in pairs:
+            legs.append((pair.origin, pair.destination))
+            if pair.round_trip:
+                legs.append((pair.destination, pair.origin))
+        return legs
+
+    @track_use_case("collect_route_catalog")
+    def execute(self, pairs: Iterable[RoutePair]) -> bool:
+
+        legs = self._legs(pairs)
+
+        in_flight = BoundedSemaphore(self.max_in_flight)
+        lock = Lock()
+        collected: List[Route] = []
+        failed: List[Tuple[str, str]] = []
+        deferred: List[Tuple[str, str]] = []
+
+        def fetch(start: str, end: str):
+            try:
+                routes = self.traffic_gateway.get_route_data(start, end)
+                with lock:
+                    collected.extend(routes)
+            except RateLimitDeferred:
+                with lock:
+                    deferred.append((start, end))
+            except Exception as e:
+                print(f"❌ Error while collecting route {start} → {end}: {e}")
+                with lock:
+                    failed.append((start, end))
+            finally:
+                in_flight.release()
+
+        futures = []
+        for start, end in legs:
+            # Block submission once max_in_flight requests are pending
+            in_flight.acquire()
+            futures.append(self._executor.submit(fetch, start, end))
+
+        for future in futures:
+            future.result()
+
+        if failed:
+            print(f"⚠️ {len(failed)} of {len(legs)} route legs failed this cycle")
+        if deferred:
+            print(f"⏳ {len(deferred)} of {len(legs)} route legs deferred by the API budget")
+
+        if self.anomalies is not None:
+            self.anomalies.observe(collected)
+
+        # Save the whole cycle in a single transaction
+        saved = self.traffic_repo.save_routes(collected)
+
+        if saved and self.rollups is not None:
+            self.rollups.record(collected)
+
+        if saved and self.spatial_index is not None:
+            self.spatial_index.record(collected)
+
+        return saved and not failed
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
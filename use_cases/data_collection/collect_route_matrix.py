@@ -0,0 +1,37 @@
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from interfaces.gateways.traffic_gateway import ITrafficDataGateway
+from domains.repositories import IRouteMatrixRepository
+from infrastructure.metrics import track_use_case
+
+
+class CollectRouteMatrixUseCase:
+    """ Collect a many-to-many travel time snapshot and store it as one matrix """
+
+    def __init__(
+        self,
+        traffic_gateway: ITrafficDataGateway,
+        matrix_repo: IRouteMatrixRepository
+    ):
+        self.traffic_gateway = traffic_gateway
+        self.matrix_repo = matrix_repo
+
+    @track_use_case("collect_route_matrix")
+    def execute(
+        self,
+        origins: Sequence[str],
+        destinations: Optional[Sequence[str]] = None
+    ) -> bool:
+        """ Snapshot every origin → destination pair; destinations default to the origins """
+
+        destinations: List[str] = list(origins if destinations is None else destinations)
+
+        matrix = self.traffic_gateway.get_matrix(list(origins), destinations)
+
+        missing = int(np.isnan(matrix.duration_seconds).sum())
+        if missing:
+            print(f"⚠️ {missing} of {matrix.duration_seconds.size} matrix elements had no route")
+
+        return self.matrix_repo.save_matrix(matrix)
@@ -2,17 +2,31 @@ from interfaces.gateways.traffic_gateway import ITrafficDataGateway
 from domains.repositories import ITrafficRepository
 from typing import List, Tuple
 from domains.entities import Route
+from use_cases.analytics.congestion_rollups import CongestionRollupUseCase
+from use_cases.analytics.duration_anomalies import DurationAnomalyUseCase
+from use_cases.analytics.route_spatial_index import RouteSpatialIndexUseCase
+from use_cases.data_collection.adaptive_sampling import AdaptiveSamplingUseCase
+from infrastructure.metrics import track_use_case
 
 
 class CollectTrafficDataUseCase:
     def __init__(
         self, 
         traffic_gateway: ITrafficDataGateway, 
-        traffic_repo: ITrafficRepository
+        traffic_repo: ITrafficRepository,
+        rollups: CongestionRollupUseCase = None,
+        sampling: AdaptiveSamplingUseCase = None,
+        spatial_index: RouteSpatialIndexUseCase = None,
+        anomalies: DurationAnomalyUseCase = None
     ):
         self.traffic_gateway = traffic_gateway
         self.traffic_repo = traffic_repo
+        self.rollups = rollups
+        self.sampling = sampling
+        self.spatial_index = spatial_index
+        self.anomalies = anomalies
     
+    @track_use_case("collect_traffic")
     def execute(
         self, 
         origin: str,
@@ -25,15 +39,28 @@ class CollectTrafficDataUseCase:
         if round_trip:
             routes_to_process.append((destination, origin))
 
-        results = []
+        collected: List[Route] = []
 
         for start, end in routes_to_process:
             
             # Fetch Data from Gateway
-            routes = self.traffic_gateway.get_route_data(start, end)
+            collected.extend(self.traffic_gateway.get_route_data(start, end))
 
-            # Save all segments returned from Gateway
-            for route in routes:
-                results.append(self.traffic_repo.save_route(route))
+        # Judge durations in memory, whether or not the database is reachable
+        if self.anomalies is not None:
+            self.anomalies.observe(collected)
 
-        return all(results)
\ No newline at end of file
+        # Let the sampling policy see the new durations before the next interval is set
+        if self.sampling is not None:
+            self.sampling.observe(collected)
+
+        # Save all segments returned from Gateway in a single transaction
+        saved = self.traffic_repo.save_routes(collected)
+
+        if saved and self.rollups is not None:
+            self.rollups.record(collected)
+
+        if saved and self.spatial_index is not None:
+            self.spatial_index.record(collected)
+
+        return saved
\ No newline at end of file
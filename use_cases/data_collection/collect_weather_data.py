@@ -2,6 +2,7 @@ from interfaces.gateways.weather_gateway import IWeatherDataGateway
 from domains.repositories import IWeatherRepository
 from typing import List, Tuple
 from domains.entities import WeatherConditions
+from infrastructure.metrics import track_use_case
 
 
 class CollectWeatherDataUseCase:
@@ -13,14 +14,28 @@ class CollectWeatherDataUseCase:
         self.weather_gateway = weather_gateway
         self.weather_repo = weather_repo
 
+    @track_use_case("collect_weather")
     def execute(
         self,
         longitude: float,
         latitude: float
     ) -> bool:
         
-        weather = self.weather_gateway.get_weather_data(longitude, latitude)
+        weather = self.weather_gateway.get_weather_data(latitude, longitude)
         return self.weather_repo.save_weather(weather)
+
+    @track_use_case("collect_weather_many")
+    def execute_many(
+        self,
+        points: List[Tuple[float, float]]
+    ) -> bool:
+        """ Collect weather for many (latitude, longitude) points and save them as one batch """
+
+        weathers = self.weather_gateway.get_weather_data_many(points)
+        collected = [weather for weather in weathers if weather is not None]
+
+        saved = self.weather_repo.save_weather_batch(collected)
+        return saved and len(collected) == len(weathers)
         
 
 
@@ -0,0 +1,174 @@
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from domains.entities import CollectionTask
+from domains.repositories import ICollectionTaskQueue
+
+
+TaskHandler = Callable[[dict], bool]
+
+
+class CollectionWorkerUseCase:
+    """ Run due collection tasks claimed from a shared queue
+
+    Any number of workers can point at the same queue: each claims only as many
+    tasks as it has free slots, heartbeats the leases of the tasks it is running,
+    and reports every task back so the queue schedules its next run. Handlers get
+    the task payload and return True on success; failures are retried with
+    exponential backoff.
+    """
+
+    def __init__(
+        self,
+        task_queue: ICollectionTaskQueue,
+        handlers: Dict[str, TaskHandler],
+        worker_id: Optional[str] = None,
+        max_concurrency: int = 4,
+        lease_seconds: float = 300,
+        poll_interval: float = 5.0,
+        retry_delay: float = 60,
+        max_retry_delay: float = 3600
+    ):
+        self.task_queue = task_queue
+        self.handlers = handlers
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.max_concurrency = max_concurrency
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        self.completed = 0
+        self.failed = 0
+        self.lost_leases = 0
+
+        self._in_flight: Dict[int, CollectionTask] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency,
+            thread_name_prefix="collection-worker"
+        )
+
+    # ---------- Tasks ----------
+    def _run_task(self, task: CollectionTask):
+        handler = self.handlers.get(task.kind)
+
+        try:
+            if handler is None:
+                raise ValueError(f"No handler for task kind '{task.kind}'")
+            success = handler(task.payload)
+            error = "" if success else "handler reported failure"
+        except Exception as e:
+            success, error = False, str(e)
+
+        released = True
+        try:
+            if success:
+                released = self.task_queue.complete(task.task_id, self.worker_id)
+            else:
+                retry_in = min(self.retry_delay * 2 ** max(task.attempts - 1, 0), self.max_retry_delay)
+                released = self.task_queue.fail(task.task_id, self.worker_id, retry_in, error)
+                print(f"⚠️ Task {task.key} failed, retrying in {retry_in:.0f}s: {error}")
+
+            if not released:
+                print(f"⚠️ Lease on task {task.key} expired before it finished")
+        except Exception as e:
+            # The lease expires and another worker picks the task up
+            print(f"❌ Error reporting task {task.key}: {e}")
+        finally:
+            with self._lock:
+                self._in_flight.pop(task.task_id, None)
+                self.completed += success
+                self.failed += not success
+                self.lost_leases += not released
+            self._wake.set()
+
+    def _heartbeat(self):
+        with self._lock:
+            task_ids = list(self._in_flight)
+        if not task_ids:
+            return
+
+        held = set(self.task_queue.heartbeat(self.worker_id, task_ids, self.lease_seconds))
+        for task_id in task_ids:
+            if task_id not in held:
+                print(f"⚠️ Lost lease on task {task_id}")
+
+    def poll_once(self) -> int:
+        """ Claim due tasks for every free slot; returns how many were started """
+
+        with self._lock:
+            free = self.max_concurrency - len(self._in_flight)
+
+        tasks = self.task_queue.claim(self.worker_id, free, self.lease_seconds)
+
+        for task in tasks:
+            with self._lock:
+                self._in_flight[task.task_id] = task
+            self._executor.submit(self._run_task, task)
+
+        return len(tasks)
+
+    # ---------- Loop ----------
+    def _run(self):
+        # Renew well before a lease can expire
+        heartbeat_every = self.lease_seconds / 3
+        next_heartbeat = time.monotonic() + heartbeat_every
+        next_reclaim = time.monotonic()
+
+        while not self._stop.is_set():
+            try:
+                now = time.monotonic()
+                if now >= next_heartbeat:
+                    self._heartbeat()
+                    next_heartbeat = now + heartbeat_every
+                if now >= next_reclaim:
+                    reclaimed = self.task_queue.reclaim_expired()
+                    if reclaimed:
+                        print(f"♻️ Reclaimed {reclaimed} tasks from workers that stopped heartbeating")
+                    next_reclaim = now + self.lease_seconds
+
+                self._wake.clear()
+                started = self.poll_once()
+            except Exception as e:
+                print(f"❌ Error polling collection tasks: {e}")
+                started = 0
+
+            if not started:
+                self._wake.wait(min(self.poll_interval, heartbeat_every))
+
+    def start(self):
+        if self._thread is not None:
+            return
+        print(f"🔍 Collection worker {self.worker_id} started")
+        self._thread = threading.Thread(target=self._run, name="collection-worker-poll", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """ Stop claiming and wait for the running tasks to be reported """
+
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_flight = len(self._in_flight)
+        return {
+            "worker_id": self.worker_id,
+            "in_flight": in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "lost_leases": self.lost_leases
+        }
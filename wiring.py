@@ -0,0 +1,160 @@
+from typing import Optional, Tuple
+
+import requests
+
+from infrastructure.database.partitions import PartitionManager
+from infrastructure.database.pool import PostgresConnectionPool
+from infrastructure.external.google_client import GoogleMapsClient
+from infrastructure.external.http_session import build_http_session
+from infrastructure.external.rate_limiter import RateLimiter
+from infrastructure.external.response_archive import ResponseArchive
+from infrastructure.external.weather_client import WeatherClient
+from infrastructure.settings import setting
+
+from interfaces.adapters.cached_weather import CachedWeatherGateway
+from interfaces.adapters.google_maps import GoogleMapsTrafficAdapter
+from interfaces.adapters.open_weather import WeatherAdapter
+from interfaces.adapters.route_variants import RouteVariantGateway
+
+from domains.repositories import IRouteVariantRepository, ITrafficRepository
+
+from use_cases.analytics.congestion_rollups import CongestionRollupUseCase
+from use_cases.analytics.duration_anomalies import DurationAnomalyUseCase
+from use_cases.analytics.route_spatial_index import RouteSpatialIndexUseCase
+from use_cases.data_collection.collect_route_catalog import CollectRouteCatalogUseCase
+
+
+# Builders for the collection pipeline, shared by main.Container and the one-shot
+# collector of collect.py so both wire it the same way. Required settings (API keys,
+# db_config) are read from Settings directly, optional ones through `setting`.
+
+# ---------- Database ----------
+def build_partition_manager(settings, pool: PostgresConnectionPool) -> Optional[PartitionManager]:
+    """ Monthly partitions for DB_SCHEMA_MODE "partitioned", None for plain "heap" tables """
+
+    mode = setting(settings, "DB_SCHEMA_MODE")
+    if mode == "heap":
+        return None
+    if mode == "partitioned":
+        return PartitionManager(pool=pool, months_ahead=3)
+    raise ValueError(f"Unknown DB_SCHEMA_MODE {mode!r}, expected 'heap' or 'partitioned'")
+
+
+# ---------- HTTP ----------
+def build_session(settings) -> requests.Session:
+    return build_http_session(
+        pool_size=setting(settings, "HTTP_POOL_SIZE"),
+        max_retries=setting(settings, "HTTP_MAX_RETRIES"),
+        backoff_factor=setting(settings, "HTTP_BACKOFF_FACTOR")
+    )
+
+
+def http_timeout(settings) -> Tuple[float, float]:
+    return (setting(settings, "HTTP_CONNECT_TIMEOUT"), setting(settings, "HTTP_READ_TIMEOUT"))
+
+
+def build_rate_limiter(settings, api: str) -> RateLimiter:
+    """ Budget of one API, `api` being the settings prefix: "GOOGLE" or "OPENWEATHER" """
+
+    return RateLimiter(
+        rate_per_second=setting(settings, f"{api}_RATE_PER_SECOND"),
+        burst=setting(settings, f"{api}_RATE_BURST"),
+        daily_quota=setting(settings, f"{api}_DAILY_QUOTA")
+    )
+
+
+def build_response_archive(settings) -> ResponseArchive:
+    return ResponseArchive(directory=setting(settings, "RESPONSE_ARCHIVE_DIR"))
+
+
+def _api_root(settings, api_root: Optional[str]) -> dict:
+    # The clients keep their public endpoints unless API_ROOT (or `api_root`) is set
+    api_root = api_root or setting(settings, "API_ROOT")
+    return {"api_root": api_root} if api_root else {}
+
+
+# ---------- Clients and gateways ----------
+def build_google_client(
+    settings,
+    session: requests.Session,
+    rate_limiter: RateLimiter,
+    archive: ResponseArchive,
+    api_root: Optional[str] = None
+) -> GoogleMapsClient:
+
+    return GoogleMapsClient(
+        api_key=settings.GOOGLE_MAPS_API_KEY,
+        session=session,
+        timeout=http_timeout(settings),
+        rate_limiter=rate_limiter,
+        archive=archive,
+        **_api_root(settings, api_root)
+    )
+
+
+def build_weather_client(
+    settings,
+    session: requests.Session,
+    rate_limiter: RateLimiter,
+    archive: ResponseArchive,
+    api_root: Optional[str] = None
+) -> WeatherClient:
+
+    return WeatherClient(
+        api_key=settings.OPENWEATHER_API_KEY,
+        session=session,
+        timeout=http_timeout(settings),
+        rate_limiter=rate_limiter,
+        archive=archive,
+        **_api_root(settings, api_root)
+    )
+
+
+def build_traffic_gateway(
+    google_client: GoogleMapsClient,
+    variant_repo: IRouteVariantRepository
+) -> RouteVariantGateway:
+    """ Google routes labelled with their route variant """
+
+    return RouteVariantGateway(
+        traffic_gateway=GoogleMapsTrafficAdapter(google_client=google_client),
+        variant_repo=variant_repo
+    )
+
+
+def build_weather_gateway(settings, weather_client: WeatherClient) -> CachedWeatherGateway:
+    """ OpenWeather observations, one upstream call per grid cell and TTL """
+
+    return CachedWeatherGateway(
+        weather_gateway=WeatherAdapter(weather_client=weather_client),
+        ttl=setting(settings, "WEATHER_CACHE_TTL"),
+        cell_size_km=setting(settings, "WEATHER_CELL_SIZE_KM")
+    )
+
+
+# ---------- Use cases ----------
+def build_duration_anomalies(settings, traffic_repo: ITrafficRepository) -> DurationAnomalyUseCase:
+    return DurationAnomalyUseCase(
+        traffic_repo=traffic_repo,
+        checkpoint_path=setting(settings, "ANOMALY_CHECKPOINT_PATH")
+    )
+
+
+def build_route_catalog_use_case(
+    traffic_gateway: RouteVariantGateway,
+    traffic_repo: ITrafficRepository,
+    rollups: CongestionRollupUseCase,
+    spatial_index: RouteSpatialIndexUseCase,
+    anomalies: DurationAnomalyUseCase,
+    max_workers: int = 16
+) -> CollectRouteCatalogUseCase:
+    """ Collect a route catalog; `traffic_repo` is where observations are saved (the outbox) """
+
+    return CollectRouteCatalogUseCase(
+        traffic_gateway=traffic_gateway,
+        traffic_repo=traffic_repo,
+        max_workers=max_workers,
+        rollups=rollups,
+        spatial_index=spatial_index,
+        anomalies=anomalies
+    )